@@ -1,5 +1,7 @@
-import json
+import sys
 from opentrons import protocol_api, types
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import registry
 
 CALIBRATION_CROSS_COORDS = {
     '1': {
@@ -30,8 +32,8 @@ PIPETTE_NAME = 'p20_single_gen2'
 TIPRACK_SLOT = '5'
 TIPRACK_LOADNAME = 'opentrons_96_filtertiprack_20ul'
 
-LABWARE_DEF_JSON = """{"ordering":[["A1","B1","C1","D1","E1","F1","G1","H1"],["A2","B2","C2","D2","E2","F2","G2","H2"],["A3","B3","C3","D3","E3","F3","G3","H3"],["A4","B4","C4","D4","E4","F4","G4","H4"],["A5","B5","C5","D5","E5","F5","G5","H5"],["A6","B6","C6","D6","E6","F6","G6","H6"],["A7","B7","C7","D7","E7","F7","G7","H7"],["A8","B8","C8","D8","E8","F8","G8","H8"],["A9","B9","C9","D9","E9","F9","G9","H9"],["A10","B10","C10","D10","E10","F10","G10","H10"],["A11","B11","C11","D11","E11","F11","G11","H11"],["A12","B12","C12","D12","E12","F12","G12","H12"]],"brand":{"brand":"ABGENE STORAGE","brandId":["96 Deepwell 1.2ml"]},"metadata":{"displayName":"ABGENE STORAGE 96 Well Plate 1200 µL","displayCategory":"wellPlate","displayVolumeUnits":"µL","tags":[]},"dimensions":{"xDimension":127.4,"yDimension":85.1,"zDimension":31},"wells":{"A1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":75.67,"z":4},"B1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":66.72,"z":4},"C1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":57.77,"z":4},"D1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":48.82,"z":4},"E1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":39.87,"z":4},"F1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":30.92,"z":4},"G1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":21.97,"z":4},"H1":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":14.48,"y":13.02,"z":4},"A2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":75.67,"z":4},"B2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":66.72,"z":4},"C2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":57.77,"z":4},"D2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":48.82,"z":4},"E2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":39.87,"z":4},"F2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":30.92,"z":4},"G2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":21.97,"z":4},"H2":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":23.43,"y":13.02,"z":4},"A3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":75.67,"z":4},"B3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":66.72,"z":4},"C3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":57.77,"z":4},"D3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":48.82,"z":4},"E3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":39.87,"z":4},"F3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":30.92,"z":4},"G3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":21.97,"z":4},"H3":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":32.38,"y":13.02,"z":4},"A4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":75.67,"z":4},"B4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":66.72,"z":4},"C4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":57.77,"z":4},"D4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":48.82,"z":4},"E4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":39.87,"z":4},"F4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":30.92,"z":4},"G4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":21.97,"z":4},"H4":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":41.33,"y":13.02,"z":4},"A5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":75.67,"z":4},"B5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":66.72,"z":4},"C5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":57.77,"z":4},"D5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":48.82,"z":4},"E5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":39.87,"z":4},"F5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":30.92,"z":4},"G5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":21.97,"z":4},"H5":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":50.28,"y":13.02,"z":4},"A6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":75.67,"z":4},"B6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":66.72,"z":4},"C6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":57.77,"z":4},"D6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":48.82,"z":4},"E6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":39.87,"z":4},"F6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":30.92,"z":4},"G6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":21.97,"z":4},"H6":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":59.23,"y":13.02,"z":4},"A7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":75.67,"z":4},"B7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":66.72,"z":4},"C7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":57.77,"z":4},"D7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":48.82,"z":4},"E7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":39.87,"z":4},"F7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":30.92,"z":4},"G7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":21.97,"z":4},"H7":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":68.18,"y":13.02,"z":4},"A8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":75.67,"z":4},"B8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":66.72,"z":4},"C8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":57.77,"z":4},"D8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":48.82,"z":4},"E8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":39.87,"z":4},"F8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":30.92,"z":4},"G8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":21.97,"z":4},"H8":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":77.13,"y":13.02,"z":4},"A9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":75.67,"z":4},"B9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":66.72,"z":4},"C9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":57.77,"z":4},"D9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":48.82,"z":4},"E9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":39.87,"z":4},"F9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":30.92,"z":4},"G9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":21.97,"z":4},"H9":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":86.08,"y":13.02,"z":4},"A10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":75.67,"z":4},"B10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":66.72,"z":4},"C10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":57.77,"z":4},"D10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":48.82,"z":4},"E10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":39.87,"z":4},"F10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":30.92,"z":4},"G10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":21.97,"z":4},"H10":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":95.03,"y":13.02,"z":4},"A11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":75.67,"z":4},"B11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":66.72,"z":4},"C11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":57.77,"z":4},"D11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":48.82,"z":4},"E11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":39.87,"z":4},"F11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":30.92,"z":4},"G11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":21.97,"z":4},"H11":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":103.98,"y":13.02,"z":4},"A12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":75.67,"z":4},"B12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":66.72,"z":4},"C12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":57.77,"z":4},"D12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":48.82,"z":4},"E12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":39.87,"z":4},"F12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":30.92,"z":4},"G12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":21.97,"z":4},"H12":{"depth":27,"totalLiquidVolume":1200,"shape":"circular","diameter":6.9,"x":112.93,"y":13.02,"z":4}},"groups":[{"metadata":{"displayName":"ABGENE STORAGE 96 Well Plate 1200 µL","displayCategory":"wellPlate","wellBottomShape":"v"},"brand":{"brand":"ABGENE STORAGE","brandId":["96 Deepwell 1.2ml"]},"wells":["A1","B1","C1","D1","E1","F1","G1","H1","A2","B2","C2","D2","E2","F2","G2","H2","A3","B3","C3","D3","E3","F3","G3","H3","A4","B4","C4","D4","E4","F4","G4","H4","A5","B5","C5","D5","E5","F5","G5","H5","A6","B6","C6","D6","E6","F6","G6","H6","A7","B7","C7","D7","E7","F7","G7","H7","A8","B8","C8","D8","E8","F8","G8","H8","A9","B9","C9","D9","E9","F9","G9","H9","A10","B10","C10","D10","E10","F10","G10","H10","A11","B11","C11","D11","E11","F11","G11","H11","A12","B12","C12","D12","E12","F12","G12","H12"]}],"parameters":{"format":"irregular","quirks":[],"isTiprack":false,"isMagneticModuleCompatible":false,"loadName":"abgenestorage_96_wellplate_1200ul"},"namespace":"custom_beta","version":1,"schemaVersion":2,"cornerOffsetFromSlot":{"x":0,"y":0,"z":0}}"""
-LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+# Definition of ABGENE STORAGE 96 Well Plate 800 µL.json, from the labware registry
+LABWARE_DEF = registry().definition('abgene_96_wellplate_800ul')
 LABWARE_LABEL = LABWARE_DEF.get('metadata', {}).get(
     'displayName', 'test labware')
 
@@ -1,5 +1,7 @@
-import json
+import sys
 from opentrons import protocol_api, types
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import registry
 
 CALIBRATION_CROSS_COORDS = {
     '1': {
@@ -30,8 +32,8 @@ PIPETTE_NAME = 'p20_single_gen2'
 TIPRACK_SLOT = '5'
 TIPRACK_LOADNAME = 'opentrons_96_filtertiprack_20ul'
 
-LABWARE_DEF_JSON = """{"ordering":[["A1","B1","C1","D1"],["A2","B2","C2","D2"],["A3","B3","C3","D3"],["A4","B4","C4","D4"],["A5","B5","C5","D5"],["A6","B6","C6","D6"]],"brand":{"brand":"Bloque Aluminio","brandId":["24 Eppendorf 1.5mL"]},"metadata":{"displayName":"Bloque Aluminio 24 Well Plate 1500 µL","displayCategory":"wellPlate","displayVolumeUnits":"µL","tags":[]},"dimensions":{"xDimension":128.3,"yDimension":85.7,"zDimension":48.1},"wells":{"A1":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":13.95,"y":71.6,"z":10.1},"B1":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":13.95,"y":50.2,"z":10.1},"C1":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":13.95,"y":28.8,"z":10.1},"D1":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":13.95,"y":7.4,"z":10.1},"A2":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":33.95,"y":71.6,"z":10.1},"B2":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":33.95,"y":50.2,"z":10.1},"C2":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":33.95,"y":28.8,"z":10.1},"D2":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":33.95,"y":7.4,"z":10.1},"A3":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":53.95,"y":71.6,"z":10.1},"B3":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":53.95,"y":50.2,"z":10.1},"C3":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":53.95,"y":28.8,"z":10.1},"D3":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":53.95,"y":7.4,"z":10.1},"A4":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":73.95,"y":71.6,"z":10.1},"B4":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":73.95,"y":50.2,"z":10.1},"C4":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":73.95,"y":28.8,"z":10.1},"D4":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":73.95,"y":7.4,"z":10.1},"A5":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":93.95,"y":71.6,"z":10.1},"B5":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":93.95,"y":50.2,"z":10.1},"C5":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":93.95,"y":28.8,"z":10.1},"D5":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":93.95,"y":7.4,"z":10.1},"A6":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":113.95,"y":71.6,"z":10.1},"B6":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":113.95,"y":50.2,"z":10.1},"C6":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":113.95,"y":28.8,"z":10.1},"D6":{"depth":38,"totalLiquidVolume":1500,"shape":"circular","diameter":9,"x":113.95,"y":7.4,"z":10.1}},"groups":[{"metadata":{"displayName":"Bloque Aluminio 24 Well Plate 1500 µL","displayCategory":"wellPlate","wellBottomShape":"v"},"brand":{"brand":"Bloque Aluminio","brandId":["24 Eppendorf 1.5mL"]},"wells":["A1","B1","C1","D1","A2","B2","C2","D2","A3","B3","C3","D3","A4","B4","C4","D4","A5","B5","C5","D5","A6","B6","C6","D6"]}],"parameters":{"format":"irregular","quirks":[],"isTiprack":false,"isMagneticModuleCompatible":false,"loadName":"bloquealuminio_24_wellplate_1500ul"},"namespace":"custom_beta","version":1,"schemaVersion":2,"cornerOffsetFromSlot":{"x":0,"y":0,"z":0}}"""
-LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+# Definition of Bloque Aluminio covidW 24 Eppendorfs 1500 µL.json, from the labware registry
+LABWARE_DEF = registry().definition('bloquealuminio_covidW_24_eppendorfs_1500ul')
 LABWARE_LABEL = LABWARE_DEF.get('metadata', {}).get(
     'displayName', 'test labware')
 
@@ -1,5 +1,7 @@
-import json
+import sys
 from opentrons import protocol_api, types
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import registry
 
 CALIBRATION_CROSS_COORDS = {
     '1': {
@@ -30,8 +32,8 @@ PIPETTE_NAME = 'p300_single'
 TIPRACK_SLOT = '5'
 TIPRACK_LOADNAME = 'opentrons_96_tiprack_300ul'
 
-LABWARE_DEF_JSON = """{"ordering":[["A1","B1","C1","D1","E1","F1","G1","H1"],["A2","B2","C2","D2","E2","F2","G2","H2"],["A3","B3","C3","D3","E3","F3","G3","H3"],["A4","B4","C4","D4","E4","F4","G4","H4"],["A5","B5","C5","D5","E5","F5","G5","H5"],["A6","B6","C6","D6","E6","F6","G6","H6"],["A7","B7","C7","D7","E7","F7","G7","H7"],["A8","B8","C8","D8","E8","F8","G8","H8"],["A9","B9","C9","D9","E9","F9","G9","H9"],["A10","B10","C10","D10","E10","F10","G10","H10"],["A11","B11","C11","D11","E11","F11","G11","H11"],["A12","B12","C12","D12","E12","F12","G12","H12"]],"brand":{"brand":"KingFisher","brandId":["ThermoFisher","97002534"]},"metadata":{"displayName":"KingFisher 96 well STD plate 550 ul","displayCategory":"wellPlate","displayVolumeUnits":"µL","tags":[]},"dimensions":{"xDimension":127,"yDimension":85,"zDimension":14.85},"wells":{"A1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":74,"z":2.45},"B1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":65,"z":2.45},"C1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":56,"z":2.45},"D1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":47,"z":2.45},"E1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":38,"z":2.45},"F1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":29,"z":2.45},"G1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":20,"z":2.45},"H1":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":14,"y":11,"z":2.45},"A2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":74,"z":2.45},"B2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":65,"z":2.45},"C2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":56,"z":2.45},"D2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":47,"z":2.45},"E2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":38,"z":2.45},"F2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":29,"z":2.45},"G2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":20,"z":2.45},"H2":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":23,"y":11,"z":2.45},"A3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":74,"z":2.45},"B3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":65,"z":2.45},"C3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":56,"z":2.45},"D3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":47,"z":2.45},"E3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":38,"z":2.45},"F3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":29,"z":2.45},"G3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":20,"z":2.45},"H3":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":32,"y":11,"z":2.45},"A4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":74,"z":2.45},"B4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":65,"z":2.45},"C4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":56,"z":2.45},"D4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":47,"z":2.45},"E4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":38,"z":2.45},"F4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":29,"z":2.45},"G4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":20,"z":2.45},"H4":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":41,"y":11,"z":2.45},"A5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":74,"z":2.45},"B5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":65,"z":2.45},"C5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":56,"z":2.45},"D5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":47,"z":2.45},"E5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":38,"z":2.45},"F5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":29,"z":2.45},"G5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":20,"z":2.45},"H5":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":50,"y":11,"z":2.45},"A6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":74,"z":2.45},"B6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":65,"z":2.45},"C6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":56,"z":2.45},"D6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":47,"z":2.45},"E6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":38,"z":2.45},"F6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":29,"z":2.45},"G6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":20,"z":2.45},"H6":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":59,"y":11,"z":2.45},"A7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":74,"z":2.45},"B7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":65,"z":2.45},"C7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":56,"z":2.45},"D7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":47,"z":2.45},"E7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":38,"z":2.45},"F7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":29,"z":2.45},"G7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":20,"z":2.45},"H7":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":68,"y":11,"z":2.45},"A8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":74,"z":2.45},"B8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":65,"z":2.45},"C8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":56,"z":2.45},"D8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":47,"z":2.45},"E8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":38,"z":2.45},"F8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":29,"z":2.45},"G8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":20,"z":2.45},"H8":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":77,"y":11,"z":2.45},"A9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":74,"z":2.45},"B9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":65,"z":2.45},"C9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":56,"z":2.45},"D9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":47,"z":2.45},"E9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":38,"z":2.45},"F9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":29,"z":2.45},"G9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":20,"z":2.45},"H9":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":86,"y":11,"z":2.45},"A10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":74,"z":2.45},"B10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":65,"z":2.45},"C10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":56,"z":2.45},"D10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":47,"z":2.45},"E10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":38,"z":2.45},"F10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":29,"z":2.45},"G10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":20,"z":2.45},"H10":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":95,"y":11,"z":2.45},"A11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":74,"z":2.45},"B11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":65,"z":2.45},"C11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":56,"z":2.45},"D11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":47,"z":2.45},"E11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":38,"z":2.45},"F11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":29,"z":2.45},"G11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":20,"z":2.45},"H11":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":104,"y":11,"z":2.45},"A12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":74,"z":2.45},"B12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":65,"z":2.45},"C12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":56,"z":2.45},"D12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":47,"z":2.45},"E12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":38,"z":2.45},"F12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":29,"z":2.45},"G12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":20,"z":2.45},"H12":{"depth":12.4,"totalLiquidVolume":550,"shape":"rectangular","xDimension":8,"yDimension":8,"x":113,"y":11,"z":2.45}},"groups":[{"metadata":{"displayName":"KingFisher 96 well STD plate 550 ul","displayCategory":"wellPlate","wellBottomShape":"v"},"brand":{"brand":"KingFisher","brandId":["ThermoFisher","97002534"]},"wells":["A1","B1","C1","D1","E1","F1","G1","H1","A2","B2","C2","D2","E2","F2","G2","H2","A3","B3","C3","D3","E3","F3","G3","H3","A4","B4","C4","D4","E4","F4","G4","H4","A5","B5","C5","D5","E5","F5","G5","H5","A6","B6","C6","D6","E6","F6","G6","H6","A7","B7","C7","D7","E7","F7","G7","H7","A8","B8","C8","D8","E8","F8","G8","H8","A9","B9","C9","D9","E9","F9","G9","H9","A10","B10","C10","D10","E10","F10","G10","H10","A11","B11","C11","D11","E11","F11","G11","H11","A12","B12","C12","D12","E12","F12","G12","H12"]}],"parameters":{"format":"irregular","quirks":[],"isTiprack":false,"isMagneticModuleCompatible":false,"loadName":"kingfisher_96_wellplate_550ul"},"namespace":"custom_beta","version":1,"schemaVersion":2,"cornerOffsetFromSlot":{"x":0,"y":0,"z":0}}"""
-LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+# Definition of KingFisher 96 well STD plate 550 ul.json, from the labware registry
+LABWARE_DEF = registry().definition('kingfisher_std_96_wellplate_550ul')
 LABWARE_LABEL = LABWARE_DEF.get('metadata', {}).get(
     'displayName', 'test labware')
 
@@ -1,5 +1,7 @@
-import json
+import sys
 from opentrons import protocol_api, types
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import registry
 
 CALIBRATION_CROSS_COORDS = {
     '1': {
@@ -30,8 +32,8 @@ PIPETTE_NAME = 'p20_single_gen2'
 TIPRACK_SLOT = '5'
 TIPRACK_LOADNAME = 'opentrons_96_filtertiprack_20ul'
 
-LABWARE_DEF_JSON = """{"ordering":[["A1"]],"brand":{"brand":"NALGENE","brandId":["Pool"]},"metadata":{"displayName":"NALGENE 1 Reservoir 300000 µL","displayCategory":"reservoir","displayVolumeUnits":"µL","tags":[]},"dimensions":{"xDimension":127.95,"yDimension":85.6,"zDimension":40},"wells":{"A1":{"depth":36.75,"totalLiquidVolume":300000,"shape":"rectangular","xDimension":122,"yDimension":80,"x":63.98,"y":42.8,"z":3.25}},"groups":[{"metadata":{"displayName":"NALGENE 1 Reservoir 300000 µL","displayCategory":"reservoir","wellBottomShape":"flat"},"brand":{"brand":"NALGENE","brandId":["Pool"]},"wells":["A1"]}],"parameters":{"format":"irregular","quirks":["centerMultichannelOnWells","touchTipDisabled"],"isTiprack":false,"isMagneticModuleCompatible":false,"loadName":"nalgene_1_reservoir_300000ul"},"namespace":"custom_beta","version":1,"schemaVersion":2,"cornerOffsetFromSlot":{"x":0,"y":0,"z":0}}"""
-LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+# Definition of NALGENE 1 Reservoir 300000 µL.json, from the labware registry
+LABWARE_DEF = registry().definition('nalgene_1_reservoir_300000ul')
 LABWARE_LABEL = LABWARE_DEF.get('metadata', {}).get(
     'displayName', 'test labware')
 
@@ -1,5 +1,7 @@
-import json
+import sys
 from opentrons import protocol_api, types
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import registry
 
 CALIBRATION_CROSS_COORDS = {
     '1': {
@@ -30,8 +32,8 @@ PIPETTE_NAME = 'p20_single_gen2'
 TIPRACK_SLOT = '5'
 TIPRACK_LOADNAME = 'opentrons_96_tiprack_20ul'
 
-LABWARE_DEF_JSON = """{"ordering":[["A1","B1","C1","D1","E1","F1","G1","H1"],["A2","B2","C2","D2","E2","F2","G2","H2"],["A3","B3","C3","D3","E3","F3","G3","H3"],["A4","B4","C4","D4","E4","F4","G4","H4"],["A5","B5","C5","D5","E5","F5","G5","H5"],["A6","B6","C6","D6","E6","F6","G6","H6"],["A7","B7","C7","D7","E7","F7","G7","H7"],["A8","B8","C8","D8","E8","F8","G8","H8"],["A9","B9","C9","D9","E9","F9","G9","H9"],["A10","B10","C10","D10","E10","F10","G10","H10"],["A11","B11","C11","D11","E11","F11","G11","H11"],["A12","B12","C12","D12","E12","F12","G12","H12"]],"brand":{"brand":"VWR","brandId":["732-2390"]},"metadata":{"displayName":"VWR 96 Well Plate 200 µL","displayCategory":"wellPlate","displayVolumeUnits":"µL","tags":[]},"dimensions":{"xDimension":127.7,"yDimension":85.6,"zDimension":33.4},"wells":{"A1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":74.3,"z":13.7},"B1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":65.3,"z":13.7},"C1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":56.3,"z":13.7},"D1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":47.3,"z":13.7},"E1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":38.3,"z":13.7},"F1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":29.3,"z":13.7},"G1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":20.3,"z":13.7},"H1":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":14.35,"y":11.3,"z":13.7},"A2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":74.3,"z":13.7},"B2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":65.3,"z":13.7},"C2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":56.3,"z":13.7},"D2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":47.3,"z":13.7},"E2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":38.3,"z":13.7},"F2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":29.3,"z":13.7},"G2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":20.3,"z":13.7},"H2":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":23.35,"y":11.3,"z":13.7},"A3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":74.3,"z":13.7},"B3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":65.3,"z":13.7},"C3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":56.3,"z":13.7},"D3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":47.3,"z":13.7},"E3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":38.3,"z":13.7},"F3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":29.3,"z":13.7},"G3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":20.3,"z":13.7},"H3":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":32.35,"y":11.3,"z":13.7},"A4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":74.3,"z":13.7},"B4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":65.3,"z":13.7},"C4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":56.3,"z":13.7},"D4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":47.3,"z":13.7},"E4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":38.3,"z":13.7},"F4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":29.3,"z":13.7},"G4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":20.3,"z":13.7},"H4":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":41.35,"y":11.3,"z":13.7},"A5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":74.3,"z":13.7},"B5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":65.3,"z":13.7},"C5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":56.3,"z":13.7},"D5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":47.3,"z":13.7},"E5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":38.3,"z":13.7},"F5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":29.3,"z":13.7},"G5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":20.3,"z":13.7},"H5":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":50.35,"y":11.3,"z":13.7},"A6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":74.3,"z":13.7},"B6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":65.3,"z":13.7},"C6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":56.3,"z":13.7},"D6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":47.3,"z":13.7},"E6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":38.3,"z":13.7},"F6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":29.3,"z":13.7},"G6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":20.3,"z":13.7},"H6":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":59.35,"y":11.3,"z":13.7},"A7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":74.3,"z":13.7},"B7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":65.3,"z":13.7},"C7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":56.3,"z":13.7},"D7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":47.3,"z":13.7},"E7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":38.3,"z":13.7},"F7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":29.3,"z":13.7},"G7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":20.3,"z":13.7},"H7":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":68.35,"y":11.3,"z":13.7},"A8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":74.3,"z":13.7},"B8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":65.3,"z":13.7},"C8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":56.3,"z":13.7},"D8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":47.3,"z":13.7},"E8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":38.3,"z":13.7},"F8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":29.3,"z":13.7},"G8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":20.3,"z":13.7},"H8":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":77.35,"y":11.3,"z":13.7},"A9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":74.3,"z":13.7},"B9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":65.3,"z":13.7},"C9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":56.3,"z":13.7},"D9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":47.3,"z":13.7},"E9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":38.3,"z":13.7},"F9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":29.3,"z":13.7},"G9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":20.3,"z":13.7},"H9":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":86.35,"y":11.3,"z":13.7},"A10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":74.3,"z":13.7},"B10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":65.3,"z":13.7},"C10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":56.3,"z":13.7},"D10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":47.3,"z":13.7},"E10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":38.3,"z":13.7},"F10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":29.3,"z":13.7},"G10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":20.3,"z":13.7},"H10":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":95.35,"y":11.3,"z":13.7},"A11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":74.3,"z":13.7},"B11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":65.3,"z":13.7},"C11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":56.3,"z":13.7},"D11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":47.3,"z":13.7},"E11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":38.3,"z":13.7},"F11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":29.3,"z":13.7},"G11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":20.3,"z":13.7},"H11":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":104.35,"y":11.3,"z":13.7},"A12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":74.3,"z":13.7},"B12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":65.3,"z":13.7},"C12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":56.3,"z":13.7},"D12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":47.3,"z":13.7},"E12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":38.3,"z":13.7},"F12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":29.3,"z":13.7},"G12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":20.3,"z":13.7},"H12":{"depth":19.7,"totalLiquidVolume":200,"shape":"circular","diameter":5.4,"x":113.35,"y":11.3,"z":13.7}},"groups":[{"metadata":{"displayName":"VWR 96 Well Plate 200 µL","displayCategory":"wellPlate","wellBottomShape":"v"},"brand":{"brand":"VWR","brandId":["732-2390"]},"wells":["A1","B1","C1","D1","E1","F1","G1","H1","A2","B2","C2","D2","E2","F2","G2","H2","A3","B3","C3","D3","E3","F3","G3","H3","A4","B4","C4","D4","E4","F4","G4","H4","A5","B5","C5","D5","E5","F5","G5","H5","A6","B6","C6","D6","E6","F6","G6","H6","A7","B7","C7","D7","E7","F7","G7","H7","A8","B8","C8","D8","E8","F8","G8","H8","A9","B9","C9","D9","E9","F9","G9","H9","A10","B10","C10","D10","E10","F10","G10","H10","A11","B11","C11","D11","E11","F11","G11","H11","A12","B12","C12","D12","E12","F12","G12","H12"]}],"parameters":{"format":"irregular","quirks":[],"isTiprack":false,"isMagneticModuleCompatible":false,"loadName":"vwr_96_wellplate_200ul"},"namespace":"custom_beta","version":1,"schemaVersion":2,"cornerOffsetFromSlot":{"x":0,"y":0,"z":0}}"""
-LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+# Definition of VWR 96 Well Plate 200 µL alum covidwarriors.json, from the labware registry
+LABWARE_DEF = registry().definition('vwr_96_wellplate_200ul_alum_covidwarriors')
 LABWARE_LABEL = LABWARE_DEF.get('metadata', {}).get(
     'displayName', 'test labware')
 
@@ -1,12 +1,18 @@
 import math
 from opentrons.types import Point
 from opentrons import protocol_api
+import sys
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import (Reagent, move_vol_multichannel, calc_height,
+                       plan_multi_dispense, multi_dispense, refill_reservoirs, Recorder,
+                       TipManager, plan_tips, TipInventory, KF_PATHOGEN, kit_plan, describe,
+                       Signals, well_geometry)
 import time
 import os
 import numpy as np
 from timeit import default_timer as timer
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import csv
 
 # metadata
@@ -31,12 +37,19 @@ air_gap_vol_elutionbuffer = 5
 run_id = $run_id
 
 x_offset = [0,0]
-multi_well_rack_area = 8.2 * 71.2  # Cross section of the 12 well reservoir
-num_cols = math.ceil(NUM_SAMPLES / 8)  # Columns we are working on
+MULTI_DISPENSE = False  # Aspirate once and dispense in several columns per trip (the wash trips of the 200 ul tips hold one dispense)
+INSTRUMENTATION = False  # Record every pipette command and export a Chrome trace next to the time log
+NEW_TIPRACKS = []  # Slots where full tipracks were placed since the last run, e.g. ['5', '9']
+conditioning_vol = 20  # Extra volume in each multi dispense trip, returned to the reservoir
+tip_volume = 200  # Volume of the filter tips of the m300
+num_batches = math.ceil(NUM_SAMPLES / 96)  # Plate sets filled one after the other, 96 samples each
+batch_cols = [min(12, math.ceil((NUM_SAMPLES - 96 * b) / 8)) for b in range(num_batches)]  # Columns of each set
 
 
 def run(ctx: protocol_api.ProtocolContext):
+    num_cols = batch_cols[0]  # Columns we are working on
     ctx.comment('Actual used columns: ' + str(num_cols))
+    ctx.comment('Plate sets to fill: ' + str(num_batches))
     # Define the STEPS of the protocol
     STEP = 0
     STEPS = {  # Dictionary with STEP activation, description, and times
@@ -57,26 +70,8 @@ def run(ctx: protocol_api.ProtocolContext):
             os.mkdir(folder_path)
         file_path = folder_path + '/KB_PlateFilling_pathogen_time_log.txt'
 
-    # Define Reagents as objects with their properties
-    class Reagent:
-        def __init__(self, name, flow_rate_aspirate, flow_rate_dispense, rinse,
-                     reagent_reservoir_volume, delay, num_wells, h_cono, v_fondo,
-                      tip_recycling = 'none'):
-            self.name = name
-            self.flow_rate_aspirate = flow_rate_aspirate
-            self.flow_rate_dispense = flow_rate_dispense
-            self.rinse = bool(rinse)
-            self.reagent_reservoir_volume = reagent_reservoir_volume
-            self.delay = delay #Delay of reagent in dispense
-            self.num_wells = num_wells
-            self.col = 0
-            self.vol_well = 0
-            self.h_cono = h_cono
-            self.v_cono = v_fondo
-            self.unused=[]
-            self.tip_recycling = tip_recycling
-            self.vol_well_original = reagent_reservoir_volume / num_wells
-
+    # Elution Buffer of one plate set, from the shared volume plan
+    elution_reservoir = kit_plan(KF_PATHOGEN['Elution Buffer'], num_cols * 8)
 
     # Reagents and their characteristics
     WashBuffer1 = Reagent(name='Wash Buffer 1',
@@ -87,9 +82,10 @@ def run(ctx: protocol_api.ProtocolContext):
                           reagent_reservoir_volume=100000,
                           num_wells=1,
                           h_cono=0,
-                          v_fondo=0)  # Flat surface
+                          v_fondo=0,
+                          tip_recycling='reuse')  # Flat surface
 
-    WashBuffer2 = Reagent(name='Wash Buffer 1',
+    WashBuffer2 = Reagent(name='Wash Buffer 2',
                           flow_rate_aspirate=0.75,
                           flow_rate_dispense=1,
                           rinse=True,
@@ -97,132 +93,21 @@ def run(ctx: protocol_api.ProtocolContext):
                           reagent_reservoir_volume=100000,
                           num_wells=1,
                           h_cono=0,
-                          v_fondo=0)  # Flat surface
+                          v_fondo=0,
+                          tip_recycling='reuse')  # Flat surface
 
     ElutionBuffer = Reagent(name='Elution Buffer',
                             flow_rate_aspirate=1,
                             flow_rate_dispense=1,
                             rinse=False,
                             delay=0,
-                            reagent_reservoir_volume=50*NUM_SAMPLES,
-                            num_wells=1,
-                            h_cono=1.95,
-                            v_fondo=695)  # Prismatic
+                            reagent_reservoir_volume=elution_reservoir.fill * elution_reservoir.wells,
+                            num_wells=elution_reservoir.wells)
 
     WashBuffer1.vol_well = WashBuffer1.vol_well_original
     WashBuffer2.vol_well = WashBuffer2.vol_well_original
     ElutionBuffer.vol_well = ElutionBuffer.vol_well_original
 
-    ##################
-    # Custom functions
-    def move_vol_multichannel(pipet, reagent, source, dest, vol, air_gap_vol, x_offset,
-                       pickup_height, rinse, disp_height, blow_out, touch_tip):
-        '''
-        x_offset: list with two values. x_offset in source and x_offset in destination i.e. [-1,1]
-        pickup_height: height from bottom where volume
-        rinse: if True it will do 2 rounds of aspirate and dispense before the tranfer
-        disp_height: dispense height; by default it's close to the top (z=-2), but in case it is needed it can be lowered
-        blow_out, touch_tip: if True they will be done after dispensing
-        '''
-        # Rinse before aspirating
-        if rinse == True:
-            custom_mix(pipet, reagent, location = source, vol = vol,
-                       rounds = 2, blow_out = True, mix_height = 0,
-                       x_offset = x_offset)
-        # SOURCE
-        s = source.bottom(pickup_height).move(Point(x = x_offset[0]))
-        pipet.aspirate(vol, s, rate = reagent.flow_rate_aspirate)  # aspirate liquid
-        if air_gap_vol != 0:  # If there is air_gap_vol, switch pipette to slow speed
-            pipet.aspirate(air_gap_vol, source.top(z = -2),
-                           rate = reagent.flow_rate_aspirate)  # air gap
-        # GO TO DESTINATION
-        drop = dest.top(z = disp_height).move(Point(x = x_offset[1]))
-        pipet.dispense(vol + air_gap_vol, drop,
-                       rate = reagent.flow_rate_dispense)  # dispense all
-        ctx.delay(seconds = reagent.delay) # pause for x seconds depending on reagent
-        if blow_out == True:
-            pipet.blow_out(dest.top(z = -2))
-        if touch_tip == True:
-            pipet.touch_tip(radius=0.9, speed = 20, v_offset = -5) #radius here is 0.9
-
-
-    def custom_mix(pipet, reagent, location, vol, rounds, blow_out, mix_height,
-    x_offset, source_height = 3):
-        '''
-        Function for mixing a given [vol] in the same [location] a x number of [rounds].
-        blow_out: Blow out optional [True,False]
-        x_offset = [source, destination]
-        source_height: height from bottom to aspirate
-        mix_height: height from bottom to dispense
-        '''
-        if mix_height == 0:
-            mix_height = 3
-        pipet.aspirate(1, location=location.bottom(
-            z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-        for _ in range(rounds):
-            pipet.aspirate(vol, location=location.bottom(
-                z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-            pipet.dispense(vol, location=location.bottom(
-                z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        pipet.dispense(1, location=location.bottom(
-            z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        if blow_out == True:
-            pipet.blow_out(location.top(z=-2))  # Blow out
-
-    def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5, extra_volume = 50):
-        nonlocal ctx
-        ctx.comment('Remaining volume ' + str(reagent.vol_well) +
-                    '< needed volume ' + str(aspirate_volume) + '?')
-        if reagent.vol_well < aspirate_volume + extra_volume:
-            reagent.unused.append(reagent.vol_well)
-            ctx.comment('Next column should be picked')
-            ctx.comment('Previous to change: ' + str(reagent.col))
-            # column selector position; intialize to required number
-            reagent.col = reagent.col + 1
-            ctx.comment(str('After change: ' + str(reagent.col)))
-            reagent.vol_well = reagent.vol_well_original
-            ctx.comment('New volume:' + str(reagent.vol_well))
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area
-                    #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Remaining volume:' + str(reagent.vol_well))
-            if height < min_height:
-                height = min_height
-            col_change = True
-        else:
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Calculated height is ' + str(height))
-            if height < min_height:
-                height = min_height
-            ctx.comment('Used height is ' + str(height))
-            col_change = False
-        return height, col_change
-
-    ##########
-    # pick up tip and if there is none left, prompt user for a new rack
-    def pick_up(pip):
-        nonlocal tip_track
-        if not ctx.is_simulating():
-            if tip_track['counts'][pip] == tip_track['maxes'][pip]:
-                ctx.pause('Replace ' + str(pip.max_volume) + 'µl tipracks before \
-                resuming.')
-                pip.reset_tipracks()
-                tip_track['counts'][pip] = 0
-        pip.pick_up_tip()
-    ##########
-
-    def find_side(col):
-        '''
-        Detects if the current column has the magnet at its left or right side
-        '''
-        if col % 2 == 0:
-            side = -1  # left
-        else:
-            side = 1
-        return side
-
-
 ####################################
     # load labware and modules
 
@@ -230,6 +115,7 @@ def run(ctx: protocol_api.ProtocolContext):
     ####################################
     reagent_res = ctx.load_labware(
         'nest_12_reservoir_15ml', '3', 'Reservoir 12 channel, column 1')
+    reservoir_geometry = well_geometry(reagent_res.load_name)  # volume to height of its wells
 
     # WashBuffer1 reservoir
     ####################################
@@ -276,14 +162,8 @@ def run(ctx: protocol_api.ProtocolContext):
     # Declare which reagents are in each reservoir as well as deepwell and elution plate
     WashBuffer1.reagent_reservoir = WashBuffer1_reservoir.wells()[0]
     WashBuffer2.reagent_reservoir = WashBuffer2_reservoir.wells()[0]
-    ElutionBuffer.reagent_reservoir = reagent_res.rows()[0][0]
-
-    # columns in destination plates to be filled depending the number of samples
-    wb1plate1_destination = WashBuffer1_300ul_plate1.rows()[0][:num_cols]
-    wb1plate2_destination = WashBuffer1_300ul_plate2.rows()[0][:num_cols]
-    wb2plate1_destination = WashBuffer2_450ul_plate1.rows()[0][:num_cols]
-    wb2plate2_destination = WashBuffer2_450ul_plate2.rows()[0][:num_cols]
-    elutionbuffer_destination = ElutionBuffer_50ul_plate.rows()[0][:num_cols]
+    ElutionBuffer.reagent_reservoir = reagent_res.rows()[0][:ElutionBuffer.num_wells]
+    ctx.comment(describe(ElutionBuffer.name, elution_reservoir))
 
     # pipette
     m300 = ctx.load_instrument(
@@ -295,210 +175,297 @@ def run(ctx: protocol_api.ProtocolContext):
         'maxes': {m300: len(tips300)*96}
     }
 
-    ############################################################################
-    # STEP 1 Filling with WashBuffer1 plate 1
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-
-        wash_buffer_vol = [150, 150]
-        rinse = False  # Only first time
-
-        ########
-        # Wash buffer dispense
-        for i in range(num_cols):
-            if not m300.hw_pipette['has_tip']:
-                pick_up(m300)
-            for j, transfer_vol in enumerate(wash_buffer_vol):
-                if (i == 0 and j == 0):
-                    rinse = True #Rinse only first transfer
+    # Per-command instrumentation, exported with the time log
+    if INSTRUMENTATION == True:
+        recorder = Recorder()
+        recorder.instrument(ctx, m300)
+
+    # Tips left in the tipracks by the previous runs of the robot
+    tip_inventory = TipInventory(ctx, new_racks = NEW_TIPRACKS)
+    tip_inventory.load(tip_track, m300)
+
+    # Run state on the lights and door checks, in the background
+    signals = Signals(ctx, m300)
+
+    try:
+        # Tips with the tip_recycling policy of each reagent
+        tips = TipManager(ctx, tip_track)
+        tip_plan = plan_tips([reagent for s, reagent in zip(STEPS, [WashBuffer1, WashBuffer1, WashBuffer2,
+                                                                     WashBuffer2, ElutionBuffer])
+                              if STEPS[s]['Execute'] == True] * num_batches,
+                             tip_track['maxes'][m300], m300.channels,
+                             tip_track['maxes'][m300] - tip_track['counts'][m300])
+        ctx.comment('Tips needed: ' + str(tip_plan.tips) + ', racks: ' + str(tip_plan.racks) +
+                    ', tiprack replacements: ' + str(tip_plan.swaps))
+
+        # Plate sets one after the other; the level model of the reservoirs goes on
+        # from one set to the next and a refill is only asked for when it is needed
+        step_times = {s: timedelta(0) for s in STEPS}
+        for batch in range(num_batches):
+            num_cols = batch_cols[batch]
+            ctx.comment('Plate set ' + str(batch + 1) + ': ' + str(num_cols) + ' columns')
+            # columns in destination plates to be filled depending the number of samples
+            wb1plate1_destination = WashBuffer1_300ul_plate1.rows()[0][:num_cols]
+            wb1plate2_destination = WashBuffer1_300ul_plate2.rows()[0][:num_cols]
+            wb2plate1_destination = WashBuffer2_450ul_plate1.rows()[0][:num_cols]
+            wb2plate2_destination = WashBuffer2_450ul_plate2.rows()[0][:num_cols]
+            elutionbuffer_destination = ElutionBuffer_50ul_plate.rows()[0][:num_cols]
+
+            refill_reservoirs(ctx, [(WashBuffer1, 2 * 300 * 8 * num_cols),
+                                    (WashBuffer2, 2 * 450 * 8 * num_cols),
+                                    (ElutionBuffer, 50 * 8 * num_cols)],
+                              'Replace the filled plates with empty ones for plate set ' + str(batch + 1) +
+                              ' of ' + str(num_batches) + '.' if batch > 0 else '')
+            STEP = 0
+
+            ############################################################################
+            # STEP 1 Filling with WashBuffer1 plate 1
+            ############################################################################
+            STEP += 1
+            if STEPS[STEP]['Execute'] == True:
+                start = datetime.now()
+
+                ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+                ctx.comment('###############################################')
+
+                wash_buffer_vol = [150, 150]
+                rinse = False  # Only first time
+
+                ########
+                # Wash buffer dispense
+                if MULTI_DISPENSE == True:
+                    tips.pick_up(m300, WashBuffer1)
+                    trips = plan_multi_dispense([sum(wash_buffer_vol)] * num_cols,
+                                                min(m300.max_volume, tip_volume) - conditioning_vol - air_gap_vol)
+                    multi_dispense(ctx, m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
+                                   dests = wb1plate1_destination, trips = trips,
+                                   air_gap_vol = air_gap_vol, conditioning_vol = conditioning_vol,
+                                   x_offset = x_offset, pickup_height = 1, disp_height = -2,
+                                   rinse = True, touch_tip = True, touch_tip_radius = 0.9)
                 else:
-                    rinse = False
-                move_vol_multichannel(m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
-                               dest = wb1plate1_destination[i], vol = transfer_vol,
-                               air_gap_vol = air_gap_vol, x_offset = x_offset,
-                               pickup_height = 1, rinse = rinse, disp_height = -2,
-                               blow_out = True, touch_tip = True)
-        m300.drop_tip(home_after=True)
-        tip_track['counts'][m300] += 8
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    ############################################################################
-    # STEP 2 Filling with WashBuffer1 plate 2
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-
-        wash_buffer_vol = [150, 150]
-        rinse = False  # Only first time
-
-        ########
-        # Wash buffer dispense
-        for i in range(num_cols):
-            if not m300.hw_pipette['has_tip']:
-                pick_up(m300)
-            for j, transfer_vol in enumerate(wash_buffer_vol):
-                if (i == 0 and j == 0):
-                    rinse = True
+                    for i in range(num_cols):
+                        tips.pick_up(m300, WashBuffer1)
+                        for j, transfer_vol in enumerate(wash_buffer_vol):
+                            if (i == 0 and j == 0):
+                                rinse = True #Rinse only first transfer
+                            else:
+                                rinse = False
+                            move_vol_multichannel(ctx, m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
+                                           dest = wb1plate1_destination[i], vol = transfer_vol,
+                                           air_gap_vol = air_gap_vol, x_offset = x_offset,
+                                           pickup_height = 1, rinse = rinse, disp_height = -2,
+                                           blow_out = True, touch_tip = True,
+                                           touch_tip_radius = 0.9)
+                tips.drop(m300, WashBuffer1)
+                WashBuffer1.vol_well -= sum(wash_buffer_vol) * 8 * num_cols  # level of the reservoir
+                end = datetime.now()
+                time_taken = (end - start)
+                ctx.comment('Step ' + str(STEP) + ': ' +
+                            STEPS[STEP]['description'] + ' took ' + str(time_taken))
+                step_times[STEP] += time_taken
+                STEPS[STEP]['Time:'] = str(step_times[STEP])
+
+            ############################################################################
+            # STEP 2 Filling with WashBuffer1 plate 2
+            ############################################################################
+            STEP += 1
+            if STEPS[STEP]['Execute'] == True:
+                start = datetime.now()
+
+                ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+                ctx.comment('###############################################')
+
+                wash_buffer_vol = [150, 150]
+                rinse = False  # Only first time
+
+                ########
+                # Wash buffer dispense
+                if MULTI_DISPENSE == True:
+                    tips.pick_up(m300, WashBuffer1)
+                    trips = plan_multi_dispense([sum(wash_buffer_vol)] * num_cols,
+                                                min(m300.max_volume, tip_volume) - conditioning_vol - air_gap_vol)
+                    multi_dispense(ctx, m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
+                                   dests = wb1plate2_destination, trips = trips,
+                                   air_gap_vol = air_gap_vol, conditioning_vol = conditioning_vol,
+                                   x_offset = x_offset, pickup_height = 1, disp_height = -2,
+                                   rinse = True, touch_tip = True, touch_tip_radius = 0.9)
                 else:
-                    rinse = False
-                move_vol_multichannel(m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
-                               dest = wb1plate2_destination[i], vol = transfer_vol,
-                               air_gap_vol = air_gap_vol, x_offset = x_offset,
-                               pickup_height = 1, rinse = rinse, disp_height = -2,
-                               blow_out = True, touch_tip = True)
-        m300.drop_tip(home_after=True)
-        tip_track['counts'][m300] += 8
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    ############################################################################
-    # STEP 3 Filling with WashBuffer2 plate 1
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-
-        wash_buffer_vol = [150, 150, 150]
-        rinse = False  # Only first time
-
-        ########
-        # Wash buffer dispense
-        for i in range(num_cols):
-            if not m300.hw_pipette['has_tip']:
-                pick_up(m300)
-            for j, transfer_vol in enumerate(wash_buffer_vol):
-                if (i == 0 and j == 0):
-                    rinse = True
+                    for i in range(num_cols):
+                        tips.pick_up(m300, WashBuffer1)
+                        for j, transfer_vol in enumerate(wash_buffer_vol):
+                            if (i == 0 and j == 0):
+                                rinse = True
+                            else:
+                                rinse = False
+                            move_vol_multichannel(ctx, m300, reagent = WashBuffer1, source = WashBuffer1.reagent_reservoir,
+                                           dest = wb1plate2_destination[i], vol = transfer_vol,
+                                           air_gap_vol = air_gap_vol, x_offset = x_offset,
+                                           pickup_height = 1, rinse = rinse, disp_height = -2,
+                                           blow_out = True, touch_tip = True,
+                                           touch_tip_radius = 0.9)
+                tips.drop(m300, WashBuffer1)
+                WashBuffer1.vol_well -= sum(wash_buffer_vol) * 8 * num_cols  # level of the reservoir
+                end = datetime.now()
+                time_taken = (end - start)
+                ctx.comment('Step ' + str(STEP) + ': ' +
+                            STEPS[STEP]['description'] + ' took ' + str(time_taken))
+                step_times[STEP] += time_taken
+                STEPS[STEP]['Time:'] = str(step_times[STEP])
+
+            ############################################################################
+            # STEP 3 Filling with WashBuffer2 plate 1
+            ############################################################################
+            STEP += 1
+            if STEPS[STEP]['Execute'] == True:
+                start = datetime.now()
+
+                ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+                ctx.comment('###############################################')
+
+                wash_buffer_vol = [150, 150, 150]
+                rinse = False  # Only first time
+
+                ########
+                # Wash buffer dispense
+                if MULTI_DISPENSE == True:
+                    tips.pick_up(m300, WashBuffer2)
+                    trips = plan_multi_dispense([sum(wash_buffer_vol)] * num_cols,
+                                                min(m300.max_volume, tip_volume) - conditioning_vol - air_gap_vol)
+                    multi_dispense(ctx, m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
+                                   dests = wb2plate1_destination, trips = trips,
+                                   air_gap_vol = air_gap_vol, conditioning_vol = conditioning_vol,
+                                   x_offset = x_offset, pickup_height = 1, disp_height = -2,
+                                   rinse = True, touch_tip = True, touch_tip_radius = 0.9)
                 else:
-                    rinse = False
-                move_vol_multichannel(m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
-                               dest = wb2plate1_destination[i], vol = transfer_vol,
-                               air_gap_vol = air_gap_vol, x_offset = x_offset,
-                               pickup_height = 1, rinse = rinse, disp_height = -2,
-                               blow_out = True, touch_tip = True)
-        m300.drop_tip(home_after=True)
-        tip_track['counts'][m300] += 8
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    ############################################################################
-    # STEP 4 Filling with WashBuffer2 plate 2
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-
-        ethanol_vol = [150, 150, 150]
-        rinse = False  # Only first time
-
-        ########
-        # Ethanol dispense
-        for i in range(num_cols):
-            if not m300.hw_pipette['has_tip']:
-                pick_up(m300)
-            for j, transfer_vol in enumerate(ethanol_vol):
-                if (i == 0 and j == 0):
-                    rinse = True
+                    for i in range(num_cols):
+                        tips.pick_up(m300, WashBuffer2)
+                        for j, transfer_vol in enumerate(wash_buffer_vol):
+                            if (i == 0 and j == 0):
+                                rinse = True
+                            else:
+                                rinse = False
+                            move_vol_multichannel(ctx, m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
+                                           dest = wb2plate1_destination[i], vol = transfer_vol,
+                                           air_gap_vol = air_gap_vol, x_offset = x_offset,
+                                           pickup_height = 1, rinse = rinse, disp_height = -2,
+                                           blow_out = True, touch_tip = True,
+                                           touch_tip_radius = 0.9)
+                tips.drop(m300, WashBuffer2)
+                WashBuffer2.vol_well -= sum(wash_buffer_vol) * 8 * num_cols  # level of the reservoir
+                end = datetime.now()
+                time_taken = (end - start)
+                ctx.comment('Step ' + str(STEP) + ': ' +
+                            STEPS[STEP]['description'] + ' took ' + str(time_taken))
+                step_times[STEP] += time_taken
+                STEPS[STEP]['Time:'] = str(step_times[STEP])
+
+            ############################################################################
+            # STEP 4 Filling with WashBuffer2 plate 2
+            ############################################################################
+            STEP += 1
+            if STEPS[STEP]['Execute'] == True:
+                start = datetime.now()
+
+                ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+                ctx.comment('###############################################')
+
+                ethanol_vol = [150, 150, 150]
+                rinse = False  # Only first time
+
+                ########
+                # Ethanol dispense
+                if MULTI_DISPENSE == True:
+                    tips.pick_up(m300, WashBuffer2)
+                    trips = plan_multi_dispense([sum(ethanol_vol)] * num_cols,
+                                                min(m300.max_volume, tip_volume) - conditioning_vol - air_gap_vol)
+                    multi_dispense(ctx, m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
+                                   dests = wb2plate2_destination, trips = trips,
+                                   air_gap_vol = air_gap_vol, conditioning_vol = conditioning_vol,
+                                   x_offset = x_offset, pickup_height = 1, disp_height = -2,
+                                   rinse = True, touch_tip = True, touch_tip_radius = 0.9)
                 else:
-                    rinse = False
-                move_vol_multichannel(m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
-                              dest = wb2plate2_destination[i], vol = transfer_vol,
-                              air_gap_vol = air_gap_vol, x_offset = x_offset,
-                              pickup_height = 1, rinse = rinse, disp_height = -2,
-                              blow_out = True, touch_tip = True)
-        m300.drop_tip(home_after=True)
-        tip_track['counts'][m300] += 8
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    ############################################################################
-    # STEP 5 Transfer Elution buffer
-    ############################################################################
-
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-        # Elution buffer
-        ElutionBuffer_vol = [50]
-
-        ########
-        # Water or elution buffer
-        for i in range(num_cols):
-            if not m300.hw_pipette['has_tip']:
-                pick_up(m300)
-            for transfer_vol in ElutionBuffer_vol:
-                # Calculate pickup_height based on remaining volume and shape of container
-                [pickup_height, change_col] = calc_height(
-                    ElutionBuffer, multi_well_rack_area, transfer_vol * 8)
-                ctx.comment(
-                    'Aspirate from Reservoir column: ' + str(ElutionBuffer.col))
-                ctx.comment('Pickup height is ' + str(pickup_height))
-                move_vol_multichannel(m300, reagent = ElutionBuffer, source = ElutionBuffer.reagent_reservoir,
-                              dest = elutionbuffer_destination[i], vol = transfer_vol,
-                              air_gap_vol = air_gap_vol_elutionbuffer, x_offset = x_offset,
-                              pickup_height = pickup_height, rinse = False, disp_height = -2,
-                              blow_out = True, touch_tip = False)
-        m300.drop_tip(home_after=True)
-        tip_track['counts'][m300] += 8
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    # Export the time log to a tsv file
-    if not ctx.is_simulating():
-        with open(file_path, 'w') as f:
-            f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
-            for key in STEPS.keys():
-                row = str(key)
-                for key2 in STEPS[key].keys():
-                    row += '\t' + format(STEPS[key][key2])
-                f.write(row + '\n')
-        f.close()
-
-    ############################################################################
-    # Light flash end of program
-    from opentrons.drivers.rpi_drivers import gpio
-    for i in range(3):
-        gpio.set_rail_lights(False)
-        gpio.set_button_light(1, 0, 0)
-        time.sleep(0.3)
-        gpio.set_rail_lights(True)
-        gpio.set_button_light(0, 0, 1)
-        time.sleep(0.3)
-    gpio.set_button_light(0, 1, 0)
-    ctx.comment(
-        'Finished! \nMove deepwell plates to KingFisher extractor.')
-    ctx.comment('Used tips in total: ' + str(tip_track['counts'][m300]))
-    ctx.comment('Used racks in total: ' + str(tip_track['counts'][m300] / 96))
+                    for i in range(num_cols):
+                        tips.pick_up(m300, WashBuffer2)
+                        for j, transfer_vol in enumerate(ethanol_vol):
+                            if (i == 0 and j == 0):
+                                rinse = True
+                            else:
+                                rinse = False
+                            move_vol_multichannel(ctx, m300, reagent = WashBuffer2, source = WashBuffer2.reagent_reservoir,
+                                          dest = wb2plate2_destination[i], vol = transfer_vol,
+                                          air_gap_vol = air_gap_vol, x_offset = x_offset,
+                                          pickup_height = 1, rinse = rinse, disp_height = -2,
+                                          blow_out = True, touch_tip = True,
+                                           touch_tip_radius = 0.9)
+                tips.drop(m300, WashBuffer2)
+                WashBuffer2.vol_well -= sum(ethanol_vol) * 8 * num_cols  # level of the reservoir
+                end = datetime.now()
+                time_taken = (end - start)
+                ctx.comment('Step ' + str(STEP) + ': ' +
+                            STEPS[STEP]['description'] + ' took ' + str(time_taken))
+                step_times[STEP] += time_taken
+                STEPS[STEP]['Time:'] = str(step_times[STEP])
+
+            ############################################################################
+            # STEP 5 Transfer Elution buffer
+            ############################################################################
+
+            STEP += 1
+            if STEPS[STEP]['Execute'] == True:
+                start = datetime.now()
+                ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+                ctx.comment('###############################################')
+                # Elution buffer
+                ElutionBuffer_vol = [50]
+
+                ########
+                # Water or elution buffer
+                for i in range(num_cols):
+                    tips.pick_up(m300, ElutionBuffer)
+                    for transfer_vol in ElutionBuffer_vol:
+                        # Calculate pickup_height based on remaining volume and shape of container
+                        [pickup_height, change_col] = calc_height(ctx,
+                            ElutionBuffer, reservoir_geometry.area, transfer_vol * 8,
+                            geometry = reservoir_geometry)
+                        ctx.comment(
+                            'Aspirate from Reservoir column: ' + str(ElutionBuffer.col))
+                        ctx.comment('Pickup height is ' + str(pickup_height))
+                        move_vol_multichannel(ctx, m300, reagent = ElutionBuffer, source = ElutionBuffer.reagent_reservoir[ElutionBuffer.col],
+                                      dest = elutionbuffer_destination[i], vol = transfer_vol,
+                                      air_gap_vol = air_gap_vol_elutionbuffer, x_offset = x_offset,
+                                      pickup_height = pickup_height, rinse = False, disp_height = -2,
+                                      blow_out = True, touch_tip = False)
+                tips.drop(m300, ElutionBuffer)
+                end = datetime.now()
+                time_taken = (end - start)
+                ctx.comment('Step ' + str(STEP) + ': ' +
+                            STEPS[STEP]['description'] + ' took ' + str(time_taken))
+                step_times[STEP] += time_taken
+                STEPS[STEP]['Time:'] = str(step_times[STEP])
+
+        tips.finish()
+
+        # Export the time log to a tsv file
+        if not ctx.is_simulating():
+            with open(file_path, 'w') as f:
+                f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
+                for key in STEPS.keys():
+                    row = str(key)
+                    for key2 in STEPS[key].keys():
+                        row += '\t' + format(STEPS[key][key2])
+                    f.write(row + '\n')
+            f.close()
+            if INSTRUMENTATION == True:
+                recorder.export(file_path.replace('.txt', '_trace.json'))
+
+        ############################################################################
+        # Light flash end of program, in the background
+        signals.finish(rail_lights = True)
+        ctx.comment(
+            'Finished! \nMove deepwell plates to KingFisher extractor.')
+        ctx.comment('Used tips in total: ' + str(tip_track['counts'][m300]))
+        ctx.comment('Used racks in total: ' + str(tip_track['counts'][m300] / 96))
+    finally:
+        signals.stop()
+        # Used tips for the next run, also when the run is cancelled or fails
+        tip_inventory.save()
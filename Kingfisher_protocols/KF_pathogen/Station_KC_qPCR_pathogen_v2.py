@@ -1,9 +1,13 @@
 import math
 from opentrons.types import Point
 from opentrons import protocol_api
+import sys
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import (Reagent, move_vol_multichannel, pick_up, plan_heights, Recorder,
+                       TipInventory, KF_PATHOGEN, kit_plan, stage_columns, staged_plan, describe,
+                       Signals, well_geometry)
 import time
 import os
-import numpy as np
 from timeit import default_timer as timer
 import json
 from datetime import datetime
@@ -34,15 +38,14 @@ run_id = $run_id
 # Tune variables
 volume_mmix = 20  # Volume of transfered master mix
 volume_sample = 5  # Volume of the sample
-volume_mmix_available = (NUM_SAMPLES * 1.1 * volume_mmix)  # Total volume needed
-diameter_screwcap = 8.25  # Diameter of the screwcap
 temperature = 10  # Temperature of temp module
-volume_cone = 50  # Volume in ul that fit in the screwcap cone
 x_offset = [0,0]
+INSTRUMENTATION = False  # Record every pipette command and export a Chrome trace next to the time log
+NEW_TIPRACKS = []  # Slots where full tipracks were placed since the last run, e.g. ['5', '9']
+MMIX_STAGING = True  # Master mix to PCR strips (slot 3) with the single channel, then full columns with the m20
+stage_extra = 10  # Extra volume in each strip well, left behind
 
 # Calculated variables
-area_section_screwcap = (np.pi * diameter_screwcap**2) / 4
-h_cone = (volume_cone * 3 / area_section_screwcap)
 num_cols = math.ceil(NUM_SAMPLES / 8)  # Columns we are working on
 
 def run(ctx: protocol_api.ProtocolContext):
@@ -68,37 +71,23 @@ def run(ctx: protocol_api.ProtocolContext):
             os.mkdir(folder_path)
         file_path = folder_path + '/KC_qPCR_time_log.txt'
 
-    # Define Reagents as objects with their properties
-    class Reagent:
-        def __init__(self, name, flow_rate_aspirate, flow_rate_dispense, rinse,
-                     reagent_reservoir_volume, delay, num_wells, h_cono, v_fondo,
-                      tip_recycling = 'none'):
-            self.name = name
-            self.flow_rate_aspirate = flow_rate_aspirate
-            self.flow_rate_dispense = flow_rate_dispense
-            self.rinse = bool(rinse)
-            self.reagent_reservoir_volume = reagent_reservoir_volume
-            self.delay = delay
-            self.num_wells = num_wells
-            self.col = 0
-            self.vol_well = 0
-            self.h_cono = h_cono
-            self.v_cono = v_fondo
-            self.unused=[]
-            self.tip_recycling = tip_recycling
-            self.vol_well_original = reagent_reservoir_volume / num_wells
+    # Master mix screwcaps, from the shared volume plan
+    if MMIX_STAGING == True:
+        # Full columns of the qPCR plate served by each strip column
+        stage_cols = stage_columns(NUM_SAMPLES // 8, volume_mmix, extra_volume = stage_extra)
+        mmix_reservoir = staged_plan(KF_PATHOGEN['Master Mix'], NUM_SAMPLES, stage_extra = stage_extra)
+    else:
+        stage_cols = []
+        mmix_reservoir = kit_plan(KF_PATHOGEN['Master Mix'], NUM_SAMPLES)
 
     # Reagents and their characteristics
     MMIX = Reagent(name = 'Master Mix',
                       rinse = False,
                       flow_rate_aspirate = 1,
                       flow_rate_dispense = 1,
-                      reagent_reservoir_volume = volume_mmix_available,
-                      num_wells = math.ceil(volume_mmix_available/2000), #change with num samples
-                      delay = 0,
-                      h_cono = h_cone,
-                      v_fondo = volume_cone  # V cono
-                      )
+                      reagent_reservoir_volume = mmix_reservoir.fill * mmix_reservoir.wells,
+                      num_wells = mmix_reservoir.wells, #change with num samples
+                      delay = 0)
 
     Samples = Reagent(name='Samples',
                       rinse=False,
@@ -114,99 +103,13 @@ def run(ctx: protocol_api.ProtocolContext):
     MMIX.vol_well = MMIX.vol_well_original
     Samples.vol_well = Samples.vol_well_original
 
-    ##################
-    # Custom functions
-
-    def move_vol_multichannel(pipet, reagent, source, dest, vol, air_gap_vol, x_offset,
-                       pickup_height, rinse, disp_height, blow_out, touch_tip):
-        '''
-        x_offset: list with two values. x_offset in source and x_offset in destination i.e. [-1,1]
-        pickup_height: height from bottom where volume
-        rinse: if True it will do 2 rounds of aspirate and dispense before the tranfer
-        disp_height: dispense height; by default it's close to the top (z=-2), but in case it is needed it can be lowered
-        blow_out, touch_tip: if True they will be done after dispensing
-        '''
-        # Rinse before aspirating
-        if rinse == True:
-            custom_mix(pipet, reagent, location = source, vol = vol,
-                       rounds = 2, blow_out = True, mix_height = 0,
-                       x_offset = x_offset)
-        # SOURCE
-        s = source.bottom(pickup_height).move(Point(x = x_offset[0]))
-        pipet.aspirate(vol, s, rate = reagent.flow_rate_aspirate)  # aspirate liquid
-        if air_gap_vol != 0:  # If there is air_gap_vol, switch pipette to slow speed
-            pipet.aspirate(air_gap_vol, source.top(z = -2),
-                           rate = reagent.flow_rate_aspirate)  # air gap
-        # GO TO DESTINATION
-        drop = dest.top(z = disp_height).move(Point(x = x_offset[1]))
-        pipet.dispense(vol + air_gap_vol, drop,
-                       rate = reagent.flow_rate_dispense)  # dispense all
-        ctx.delay(seconds = reagent.delay) # pause for x seconds depending on reagent
-        if blow_out == True:
-            pipet.blow_out(dest.top(z = -2))
-        if touch_tip == True:
-            pipet.touch_tip(speed = 20, v_offset = -5, radius = 0.9)
-
-
-    def custom_mix(pipet, reagent, location, vol, rounds, blow_out, mix_height,
-    x_offset, source_height = 3):
-        '''
-        Function for mixing a given [vol] in the same [location] a x number of [rounds].
-        blow_out: Blow out optional [True,False]
-        x_offset = [source, destination]
-        source_height: height from bottom to aspirate
-        mix_height: height from bottom to dispense
-        '''
-        if mix_height == 0:
-            mix_height = 3
-        pipet.aspirate(1, location=location.bottom(
-            z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-        for _ in range(rounds):
-            pipet.aspirate(vol, location=location.bottom(
-                z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-            pipet.dispense(vol, location=location.bottom(
-                z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        pipet.dispense(1, location=location.bottom(
-            z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        if blow_out == True:
-            pipet.blow_out(location.top(z=-2))  # Blow out
-
-    def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5, extra_volume = 50):
-        nonlocal ctx
-        ctx.comment('Remaining volume ' + str(reagent.vol_well) +
-                    '< needed volume ' + str(aspirate_volume) + '?')
-        if reagent.vol_well < aspirate_volume + extra_volume:
-            reagent.unused.append(reagent.vol_well)
-            ctx.comment('Next column should be picked')
-            ctx.comment('Previous to change: ' + str(reagent.col))
-            # column selector position; intialize to required number
-            reagent.col = reagent.col + 1
-            ctx.comment(str('After change: ' + str(reagent.col)))
-            reagent.vol_well = reagent.vol_well_original
-            ctx.comment('New volume:' + str(reagent.vol_well))
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area
-                    #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Remaining volume:' + str(reagent.vol_well))
-            if height < min_height:
-                height = min_height
-            col_change = True
-        else:
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Calculated height is ' + str(height))
-            if height < min_height:
-                height = min_height
-            ctx.comment('Used height is ' + str(height))
-            col_change = False
-        return height, col_change
-
     ####################################
     # load labware and modules
     # 24 well rack
     tuberack = ctx.load_labware(
         'opentrons_24_aluminumblock_generic_2ml_screwcap', '2',
         'Bloque Aluminio opentrons 24 screwcaps 2000 µL ')
+    mmix_geometry = well_geometry(tuberack.load_name)  # volume to height of the screwcaps
 
     ############################################
     # tempdeck
@@ -226,11 +129,19 @@ def run(ctx: protocol_api.ProtocolContext):
         'chilled KF plate with elutions (alum opentrons)')
     samples = source_plate.wells()[:NUM_SAMPLES]
 
+    ##################################
+    # PCR strips for the master mix of the multichannel
+    if MMIX_STAGING == True:
+        stage_plate = ctx.load_labware(
+            'opentrons_96_aluminumblock_generic_pcr_strip_200ul', '3',
+            'Bloque Aluminio opentrons PCR strips 200 µL')
+
     ##################################
     # Load Tipracks
+    # (with the staging the m20 needs 8 tips more than the columns: a second rack in slot 9)
     tips20 = [
         ctx.load_labware('opentrons_96_filtertiprack_20ul', slot)
-        for slot in ['5']
+        for slot in (['5', '9'] if MMIX_STAGING == True else ['5'])
     ]
 
     tips200 = [
@@ -241,12 +152,18 @@ def run(ctx: protocol_api.ProtocolContext):
     ################################################################################
     # Declare which reagents are in each reservoir as well as deepwell and elution plate
     MMIX.reagent_reservoir = tuberack.rows()[0][:MMIX.num_wells] # 1 row, 2 columns (first ones)
-    ctx.comment('Wells in: '+ str(tuberack.rows()[0][:MMIX.num_wells]) + ' element: '+str(MMIX.reagent_reservoir[MMIX.col]))
+    ctx.comment('Wells in: ' + str(MMIX.reagent_reservoir))
+    ctx.comment(describe(MMIX.name, mmix_reservoir))
     # setup up sample sources and destinations
     samples = source_plate.wells()[:NUM_SAMPLES]
     samples_multi = source_plate.rows()[0][:num_cols]
     pcr_wells = qpcr_plate.wells()[:NUM_SAMPLES]
     pcr_wells_multi = qpcr_plate.rows()[0][:num_cols]
+    # Master mix of the single channel: the strip wells, then the wells of the incomplete column
+    staged_samples = 8 * sum(stage_cols)
+    mmix_destinations = [(w, cols * volume_mmix + stage_extra) for i, cols in enumerate(stage_cols)
+                         for w in stage_plate.columns()[i]]
+    mmix_destinations += [(w, volume_mmix) for w in pcr_wells[staged_samples:]]
 
     # pipettes
     m20 = ctx.load_instrument(
@@ -257,89 +174,115 @@ def run(ctx: protocol_api.ProtocolContext):
     # used tip counter and set maximum tips available
     tip_track = {
         'counts': {p300: 0,
-                   m20: 0}
+                   m20: 0},
+        'maxes': {p300: len(tips200) * 96, m20: len(tips20) * 96}
     }
 
-    ############################################################################
-    # STEP 1: Transfer Master MIX
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-        p300.pick_up_tip()
-
-        for dest in pcr_wells:
-            [pickup_height, col_change] = calc_height(MMIX, area_section_screwcap, volume_mmix)
-            move_vol_multichannel(p300, reagent = MMIX, source = MMIX.reagent_reservoir[MMIX.col],
-            dest = dest, vol = volume_mmix, air_gap_vol = air_gap_vol, x_offset = x_offset,
-                   pickup_height = pickup_height, disp_height = -10, rinse = False,
-                   blow_out=True, touch_tip=True)
-        p300.drop_tip()
-        tip_track['counts'][p300]+=1
-        #MMIX.unused_two = MMIX.vol_well
-
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    ############################################################################
-    # STEP 2: TRANSFER Samples
-    ############################################################################
-
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        start = datetime.now()
-        ctx.comment('pcr_wells')
-        #Loop over defined wells
-        for s, d in zip(samples_multi, pcr_wells_multi):
-            m20.pick_up_tip()
-            #Source samples
-            move_vol_multichannel(m20, reagent = Samples, source = s, dest = d,
-            vol = volume_sample, air_gap_vol = air_gap_sample, x_offset = x_offset,
-                   pickup_height = 0.2, disp_height = -10, rinse = False,
-                   blow_out=True, touch_tip=False)
-            m20.drop_tip()
-            tip_track['counts'][m20]+=8
-
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' +
-                    STEPS[STEP]['description'] + ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    # Export the time log to a tsv file
-    if not ctx.is_simulating():
-        with open(file_path, 'w') as f:
-            f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
-            for key in STEPS.keys():
-                row = str(key)
-                for key2 in STEPS[key].keys():
-                    row += '\t' + format(STEPS[key][key2])
-                f.write(row + '\n')
-        f.close()
-
-    ############################################################################
-    # Light flash end of program
-    gpio.set_rail_lights(False)
-    time.sleep(2)
-    #os.system('mpg123 -f -8000 /var/lib/jupyter/notebooks/toreador.mp3 &')
-    for i in range(3):
-        gpio.set_rail_lights(False)
-        gpio.set_button_light(1, 0, 0)
-        time.sleep(0.3)
-        gpio.set_rail_lights(True)
-        gpio.set_button_light(0, 0, 1)
-        time.sleep(0.3)
-        gpio.set_rail_lights(False)
-    gpio.set_button_light(0, 1, 0)
-    ctx.comment('Finished! \nMove plate to PCR')
-
-    if STEPS[1]['Execute'] == True:
-        ctx.comment('200 ul Used tips in total: ' + str(tip_track['counts'][p300]))
-        ctx.comment('200 ul Used racks in total: ' + str(tip_track['counts'][p300] / 96))
-
-    if STEPS[2]['Execute'] == True:
-        ctx.comment('20 ul Used tips in total: ' + str(tip_track['counts'][m20]))
-        ctx.comment('20 ul Used racks in total: ' + str(tip_track['counts'][m20] / 96))
+    # Per-command instrumentation, exported with the time log
+    if INSTRUMENTATION == True:
+        recorder = Recorder()
+        recorder.instrument(ctx, p300, m20)
+
+    # Tips left in the tipracks by the previous runs of the robot
+    tip_inventory = TipInventory(ctx, new_racks = NEW_TIPRACKS)
+    tip_inventory.load(tip_track, p300, m20)
+
+    # Run state on the lights and door checks, in the background
+    signals = Signals(ctx, p300, m20)
+
+    try:
+        ############################################################################
+        # STEP 1: Transfer Master MIX
+        ############################################################################
+        STEP += 1
+        if STEPS[STEP]['Execute'] == True:
+            start = datetime.now()
+            pick_up(ctx, p300, tip_track)
+
+            # Calculate pickup_height of every transfer based on remaining volume in the screwcaps
+            mmix_plan = plan_heights(MMIX, mmix_geometry.area, [vol for dest, vol in mmix_destinations],
+                                     geometry = mmix_geometry)
+            for k, (dest, vol) in enumerate(mmix_destinations):
+                pickup_height = mmix_plan.heights[k]
+                move_vol_multichannel(ctx, p300, reagent = MMIX, source = MMIX.reagent_reservoir[mmix_plan.cols[k]],
+                dest = dest, vol = vol, air_gap_vol = air_gap_vol, x_offset = x_offset,
+                       pickup_height = pickup_height, disp_height = -10, rinse = False,
+                       blow_out=True, touch_tip=True, touch_tip_radius = 0.9)
+            p300.drop_tip()
+            tip_track['counts'][p300]+=1
+
+            # Full columns of the qPCR plate from the strips, with one set of tips
+            # (no air gap: the 20 ul fill the m20 tips)
+            if stage_cols:
+                pick_up(ctx, m20, tip_track)
+                pcr_full_cols = iter(pcr_wells_multi)
+                for strip, cols in zip(stage_plate.rows()[0], stage_cols):
+                    for _ in range(cols):
+                        move_vol_multichannel(ctx, m20, reagent = MMIX, source = strip,
+                        dest = next(pcr_full_cols), vol = volume_mmix, air_gap_vol = 0, x_offset = x_offset,
+                               pickup_height = 0.5, disp_height = -10, rinse = False,
+                               blow_out=True, touch_tip=True, touch_tip_radius = 0.9)
+                m20.drop_tip()
+                tip_track['counts'][m20]+=8
+            #MMIX.unused_two = MMIX.vol_well
+
+            end = datetime.now()
+            time_taken = (end - start)
+            ctx.comment('Step ' + str(STEP) + ': ' +
+                        STEPS[STEP]['description'] + ' took ' + str(time_taken))
+            STEPS[STEP]['Time:'] = str(time_taken)
+
+        ############################################################################
+        # STEP 2: TRANSFER Samples
+        ############################################################################
+
+        STEP += 1
+        if STEPS[STEP]['Execute'] == True:
+            start = datetime.now()
+            ctx.comment('pcr_wells')
+            #Loop over defined wells
+            for s, d in zip(samples_multi, pcr_wells_multi):
+                pick_up(ctx, m20, tip_track)
+                #Source samples
+                move_vol_multichannel(ctx, m20, reagent = Samples, source = s, dest = d,
+                vol = volume_sample, air_gap_vol = air_gap_sample, x_offset = x_offset,
+                       pickup_height = 0.2, disp_height = -10, rinse = False,
+                       blow_out=True, touch_tip=False)
+                m20.drop_tip()
+                tip_track['counts'][m20]+=8
+
+            end = datetime.now()
+            time_taken = (end - start)
+            ctx.comment('Step ' + str(STEP) + ': ' +
+                        STEPS[STEP]['description'] + ' took ' + str(time_taken))
+            STEPS[STEP]['Time:'] = str(time_taken)
+
+        # Export the time log to a tsv file
+        if not ctx.is_simulating():
+            with open(file_path, 'w') as f:
+                f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
+                for key in STEPS.keys():
+                    row = str(key)
+                    for key2 in STEPS[key].keys():
+                        row += '\t' + format(STEPS[key][key2])
+                    f.write(row + '\n')
+            f.close()
+            if INSTRUMENTATION == True:
+                recorder.export(file_path.replace('.txt', '_trace.json'))
+
+        ############################################################################
+        # Light flash end of program, in the background
+        signals.finish(rail_lights = False)
+        ctx.comment('Finished! \nMove plate to PCR')
+
+        if STEPS[1]['Execute'] == True:
+            ctx.comment('200 ul Used tips in total: ' + str(tip_track['counts'][p300]))
+            ctx.comment('200 ul Used racks in total: ' + str(tip_track['counts'][p300] / 96))
+
+        if STEPS[1]['Execute'] == True or STEPS[2]['Execute'] == True:
+            ctx.comment('20 ul Used tips in total: ' + str(tip_track['counts'][m20]))
+            ctx.comment('20 ul Used racks in total: ' + str(tip_track['counts'][m20] / 96))
+    finally:
+        signals.stop()
+        # Used tips for the next run, also when the run is cancelled or fails
+        tip_inventory.save()
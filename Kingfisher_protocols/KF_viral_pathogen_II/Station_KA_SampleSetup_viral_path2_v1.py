@@ -1,6 +1,11 @@
 import math
 from opentrons.types import Point
 from opentrons import protocol_api
+import sys
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import (Reagent, move_vol_multichannel, custom_mix, pick_up,
+                       SampleSourceIndex, Recorder, TipInventory,
+                       next_tips, plan_transfer_order, Signals)
 import time
 import os
 from timeit import default_timer as timer
@@ -29,6 +34,8 @@ air_gap_vol = 15
 
 volume_sample = 400
 x_offset = [0,0]
+INSTRUMENTATION = False  # Record every pipette command and export a Chrome trace next to the time log
+NEW_TIPRACKS = []  # Slots where full tipracks were placed since the last run, e.g. ['5', '9']
 
 # Screwcap variables
 diameter_screwcap = 8.25  # Diameter of the screwcap
@@ -60,26 +67,6 @@ def run(ctx: protocol_api.ProtocolContext):
         file_path = folder_path + '/KA_SampleSetup_pathogen_time_log.txt'
         file_path = folder_path + '/KA_SampleSetup_viral_path2_time_log.txt'
 
-    # Define Reagents as objects with their properties
-    class Reagent:
-        def __init__(self, name, flow_rate_aspirate, flow_rate_dispense, rinse,
-                     reagent_reservoir_volume, delay, num_wells, h_cono, v_fondo,
-                      tip_recycling = 'none'):
-            self.name = name
-            self.flow_rate_aspirate = flow_rate_aspirate
-            self.flow_rate_dispense = flow_rate_dispense
-            self.rinse = bool(rinse)
-            self.reagent_reservoir_volume = reagent_reservoir_volume
-            self.delay = delay
-            self.num_wells = num_wells
-            self.col = 0
-            self.vol_well = 0
-            self.h_cono = h_cono
-            self.v_cono = v_fondo
-            self.unused=[]
-            self.tip_recycling = tip_recycling
-            self.vol_well_original = reagent_reservoir_volume / num_wells
-
     Samples = Reagent(name = 'Samples',
                       flow_rate_aspirate = 1,
                       flow_rate_dispense = 1,
@@ -93,115 +80,6 @@ def run(ctx: protocol_api.ProtocolContext):
 
     Samples.vol_well = 700
 
-    ##################
-    # Custom functions
-    def generate_source_table(source):
-        '''
-        Concatenate the wells from the different origin racks
-        '''
-        for rack_number in range(len(source)):
-            if rack_number == 0:
-                s = source[rack_number].wells()
-            else:
-                s = s + source[rack_number].wells()
-        return s
-
-    def move_vol_multichannel(pipet, reagent, source, dest, vol, air_gap_vol, x_offset,
-                       pickup_height, rinse, disp_height, blow_out, touch_tip):
-        '''
-        x_offset: list with two values. x_offset in source and x_offset in destination i.e. [-1,1]
-        pickup_height: height from bottom where volume
-        rinse: if True it will do 2 rounds of aspirate and dispense before the tranfer
-        disp_height: dispense height; by default it's close to the top (z=-2), but in case it is needed it can be lowered
-        blow_out, touch_tip: if True they will be done after dispensing
-        '''
-        # Rinse before aspirating
-        if rinse == True:
-            custom_mix(pipet, reagent, location = source, vol = vol,
-                       rounds = 2, blow_out = True, mix_height = 0,
-                       x_offset = x_offset)
-        # SOURCE
-        s = source.bottom(pickup_height).move(Point(x = x_offset[0]))
-        pipet.aspirate(vol, s, rate = reagent.flow_rate_aspirate)  # aspirate liquid
-        if air_gap_vol != 0:  # If there is air_gap_vol, switch pipette to slow speed
-            pipet.aspirate(air_gap_vol, source.top(z = -2),
-                           rate = reagent.flow_rate_aspirate)  # air gap
-        # GO TO DESTINATION
-        drop = dest.top(z = disp_height).move(Point(x = x_offset[1]))
-        pipet.dispense(vol + air_gap_vol, drop,
-                       rate = reagent.flow_rate_dispense)  # dispense all
-        ctx.delay(seconds = reagent.delay) # pause for x seconds depending on reagent
-        if blow_out == True:
-            pipet.blow_out(dest.top(z = -5))
-        if touch_tip == True:
-            pipet.touch_tip(radius = 0.9, speed = 20, v_offset = -5)
-
-
-    def custom_mix(pipet, reagent, location, vol, rounds, blow_out, mix_height,
-    x_offset, source_height = 3):
-        '''
-        Function for mixing a given [vol] in the same [location] a x number of [rounds].
-        blow_out: Blow out optional [True,False]
-        x_offset = [source, destination]
-        source_height: height from bottom to aspirate
-        mix_height: height from bottom to dispense
-        '''
-        if mix_height == 0:
-            mix_height = 3
-        pipet.aspirate(1, location=location.bottom(
-            z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-        for _ in range(rounds):
-            pipet.aspirate(vol, location=location.bottom(
-                z=source_height).move(Point(x=x_offset[0])), rate=reagent.flow_rate_aspirate)
-            pipet.dispense(vol, location=location.bottom(
-                z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        pipet.dispense(1, location=location.bottom(
-            z=mix_height).move(Point(x=x_offset[1])), rate=reagent.flow_rate_dispense)
-        if blow_out == True:
-            pipet.blow_out(location.top(z=-2))  # Blow out
-
-    def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5, extra_volume = 50):
-        nonlocal ctx
-        ctx.comment('Remaining volume ' + str(reagent.vol_well) +
-                    '< needed volume ' + str(aspirate_volume) + '?')
-        if reagent.vol_well < aspirate_volume + extra_volume:
-            reagent.unused.append(reagent.vol_well)
-            ctx.comment('Next column should be picked')
-            ctx.comment('Previous to change: ' + str(reagent.col))
-            # column selector position; intialize to required number
-            reagent.col = reagent.col + 1
-            ctx.comment(str('After change: ' + str(reagent.col)))
-            reagent.vol_well = reagent.vol_well_original
-            ctx.comment('New volume:' + str(reagent.vol_well))
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area
-                    #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Remaining volume:' + str(reagent.vol_well))
-            if height < min_height:
-                height = min_height
-            col_change = True
-        else:
-            height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area #- reagent.h_cono
-            reagent.vol_well = reagent.vol_well - aspirate_volume
-            ctx.comment('Calculated height is ' + str(height))
-            if height < min_height:
-                height = min_height
-            ctx.comment('Used height is ' + str(height))
-            col_change = False
-        return height, col_change
-
-    ##########
-    # pick up tip and if there is none left, prompt user for a new rack
-    def pick_up(pip):
-        nonlocal tip_track
-        if not ctx.is_simulating():
-            if tip_track['counts'][pip] == tip_track['maxes'][pip]:
-                ctx.pause('Replace ' + str(pip.max_volume) + 'µl tipracks before \
-                resuming.')
-                pip.reset_tipracks()
-                tip_track['counts'][pip] = 0
-        pip.pick_up_tip()
-
     ####################################
     # load labware and modules
 
@@ -234,9 +112,12 @@ def run(ctx: protocol_api.ProtocolContext):
     # Declare which reagents are in each reservoir as well as deepwell and elution plate
 
     # setup samples and destinations
-    sample_sources_full = generate_source_table(source_racks)
+    sample_sources_full = SampleSourceIndex(source_racks)
     sample_sources = sample_sources_full[:NUM_SAMPLES]
     destinations = dest_plate.wells()[:NUM_SAMPLES]
+    if not ctx.is_simulating():  # tube and well of every sample, for the LIMS
+        sample_sources_full.export(file_path.replace('_time_log.txt', '_samples.txt'),
+                                   NUM_SAMPLES, destinations)
 
     # p20 = ctx.load_instrument(
     # 'p20_single_gen2', mount='right', tip_racks=tips20)
@@ -249,64 +130,78 @@ def run(ctx: protocol_api.ProtocolContext):
         'maxes': {p1000: len(tips1000) * 96}  # ,p20: len(tips20)*96,
     }
 
-    ############################################################################
-    # STEP 1: Add Samples
-    ############################################################################
-    STEP += 1
-    if STEPS[STEP]['Execute'] == True:
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
-        ctx.comment('###############################################')
-
-        # Transfer parameters
-        start = datetime.now()
-        for s, d in zip(sample_sources, destinations):
-            if not p1000.hw_pipette['has_tip']:
-                pick_up(p1000)
-            # Mix the sample BEFORE dispensing
-            #custom_mix(p1000, reagent = Samples, location = s, vol = volume_sample, rounds = 2, blow_out = True, mix_height = 15)
-            move_vol_multichannel(p1000, reagent = Samples, source = s, dest = d,
-            vol=volume_sample, air_gap_vol = air_gap_vol, x_offset = x_offset,
-                               pickup_height = 1, rinse = Samples.rinse, disp_height = -10,
-                               blow_out = True, touch_tip = True)
-            # Mix the sample AFTER dispensing
-            #custom_mix(p1000, reagent = Samples, location = d, vol = volume_sample, rounds = 2, blow_out = True, mix_height = 15)
-            # Drop tip and update counter
-            p1000.drop_tip()
-            tip_track['counts'][p1000] += 1
-
-        # Time statistics
-        end = datetime.now()
-        time_taken = (end - start)
-        ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'] +
-                    ' took ' + str(time_taken))
-        STEPS[STEP]['Time:'] = str(time_taken)
-
-    # Export the time log to a tsv file
-    if not ctx.is_simulating():
-        with open(file_path, 'w') as f:
-            f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
-            for key in STEPS.keys():
-                row = str(key)
-                for key2 in STEPS[key].keys():
-                    row += '\t' + format(STEPS[key][key2])
-                f.write(row + '\n')
-        f.close()
-
-    ############################################################################
-    # Light flash end of program
-    from opentrons.drivers.rpi_drivers import gpio
-    for i in range(3):
-        gpio.set_rail_lights(False)
-        gpio.set_button_light(1, 0, 0)
-        time.sleep(0.3)
-        gpio.set_rail_lights(True)
-        gpio.set_button_light(0, 0, 1)
-        time.sleep(0.3)
-    gpio.set_button_light(0, 1, 0)
-    ctx.comment(
-        'Finished! \nMove deepwell plate (slot 5) to Station C for MMIX addition and qPCR preparation.')
-    ctx.comment('Used p1000 tips in total: ' + str(tip_track['counts'][p1000]))
-    ctx.comment('Used p1000 racks in total: ' +
-                str(tip_track['counts'][p1000] / 96))
-    #ctx.comment('Used p20 tips in total: ' + str(tip_track['counts'][p20]))
-    #ctx.comment('Used p20 racks in total: ' + str(tip_track['counts'][p20] / 96))
+    # Per-command instrumentation, exported with the time log
+    if INSTRUMENTATION == True:
+        recorder = Recorder()
+        recorder.instrument(ctx, p1000)
+
+    # Tips left in the tipracks by the previous runs of the robot
+    tip_inventory = TipInventory(ctx, new_racks = NEW_TIPRACKS)
+    tip_inventory.load(tip_track, p1000)
+
+    # Run state on the lights and door checks, in the background
+    signals = Signals(ctx, p1000)
+
+    try:
+        ############################################################################
+        # STEP 1: Add Samples
+        ############################################################################
+        STEP += 1
+        if STEPS[STEP]['Execute'] == True:
+            ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'])
+            ctx.comment('###############################################')
+
+            # Transfer parameters
+            start = datetime.now()
+            # Each sample goes to its own well; the samples are given to the closest tips
+            order = plan_transfer_order(sample_sources, next_tips(p1000, len(sample_sources)))
+            for s, d in [(sample_sources[i], destinations[i]) for i in order]:
+                if not p1000.hw_pipette['has_tip']:
+                    pick_up(ctx, p1000, tip_track)
+                # Mix the sample BEFORE dispensing
+                #custom_mix(p1000, reagent = Samples, location = s, vol = volume_sample, rounds = 2, blow_out = True, mix_height = 15)
+                move_vol_multichannel(ctx, p1000, reagent = Samples, source = s, dest = d,
+                vol=volume_sample, air_gap_vol = air_gap_vol, x_offset = x_offset,
+                                   pickup_height = 1, rinse = Samples.rinse, disp_height = -10,
+                                   blow_out = True, touch_tip = True,
+                                   blow_out_height = -5, touch_tip_radius = 0.9)
+                # Mix the sample AFTER dispensing
+                #custom_mix(p1000, reagent = Samples, location = d, vol = volume_sample, rounds = 2, blow_out = True, mix_height = 15)
+                # Drop tip and update counter
+                p1000.drop_tip()
+                tip_track['counts'][p1000] += 1
+
+            # Time statistics
+            end = datetime.now()
+            time_taken = (end - start)
+            ctx.comment('Step ' + str(STEP) + ': ' + STEPS[STEP]['description'] +
+                        ' took ' + str(time_taken))
+            STEPS[STEP]['Time:'] = str(time_taken)
+
+        # Export the time log to a tsv file
+        if not ctx.is_simulating():
+            with open(file_path, 'w') as f:
+                f.write('STEP\texecution\tdescription\twait_time\texecution_time\n')
+                for key in STEPS.keys():
+                    row = str(key)
+                    for key2 in STEPS[key].keys():
+                        row += '\t' + format(STEPS[key][key2])
+                    f.write(row + '\n')
+            f.close()
+            if INSTRUMENTATION == True:
+                recorder.export(file_path.replace('.txt', '_trace.json'))
+
+        ############################################################################
+        # Light flash end of program, in the background
+        signals.finish(rail_lights = True)
+        ctx.comment(
+            'Finished! \nMove deepwell plate (slot 5) to Station C for MMIX addition and qPCR preparation.')
+        ctx.comment('Used p1000 tips in total: ' + str(tip_track['counts'][p1000]))
+        ctx.comment('Used p1000 racks in total: ' +
+                    str(tip_track['counts'][p1000] / 96))
+        #ctx.comment('Used p20 tips in total: ' + str(tip_track['counts'][p20]))
+        #ctx.comment('Used p20 racks in total: ' + str(tip_track['counts'][p20] / 96))
+    finally:
+        signals.stop()
+        # Used tips for the next run, also when the run is cancelled or fails
+        tip_inventory.save()
@@ -1,43 +1,193 @@
 #!/usr/bin/env python3
-import subprocess
+import json
 import os
+import signal
+import subprocess
+import sys
 import time
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # pip3 install inotify_simple, otherwise the folders are polled
+    INotify = None
 
 # set path to watch
 target_dir="/run/user/1003/gvfs/smb-share:server=opn.cdb.nas.csc.es,share=opentrons/RUNS/"
 #target_dir="/media/jl/DATADRIVE/RUNS_opentrons_backup"
 # set path to the script sh
 script_path="/home/jl/Documentos/code/covid19clinic/automation/KF_config/rmarkdown_runner.sh"
+# 'python' writes the report with automation/qpcr_analysis.py, 'rmarkdown' renders
+# the Rmd of the run with script_path
+report_engine = 'python'
+analysis_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qpcr_analysis.py')
+# runs already rendered, kept between restarts so the history is not scanned again
+state_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rmarkdown_runner_state.json')
+# seconds between checks; with inotify the check is done as soon as a file arrives
+poll_interval = 30
+# reports rendered at the same time, seconds before a render is killed and
+# attempts for each run before giving up until new results arrive
+render_workers = os.cpu_count() or 2
+render_timeout = 20 * 60
+render_attempts = 3
+
+
+def load_state(path):
+    if not os.path.isfile(path):
+        return {'rendered': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    # write and rename, so a crash never leaves a truncated state file
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent = 1)
+    os.replace(path + '.tmp', path)
+
 
-def generate_list_folders(target_dir):
-    dirs = os.listdir(target_dir)
-    dirs_return = dirs.copy()
-    for d in dirs:
-        for file in os.listdir(target_dir + d + '/results/'):
-            if file.endswith('.html'):
-                dirs_return.remove(d)
-                break
-    return dirs_return
-
-watching = []
-while True:
-    runs = generate_list_folders(target_dir)
-    for run in runs:
-        if run not in watching:
-            watching.append(run)
+def mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class RunWatcher:
+    '''
+    Finds the runs of target_dir with a results csv and no report yet.
+    A folder is only listed again when its modification time changes, and
+    only the folders of pending runs are checked.
+    '''
+    def __init__(self, target_dir, rendered):
+        self.target_dir = target_dir
+        self.rendered = set(rendered)
+        self.pending = {}  # run: mtime of its results folder when it was last listed
+        self.runs_mtime = None
+
+    def scan_runs(self):
+        t = mtime(self.target_dir)
+        if t is None or t == self.runs_mtime:
+            return
+        self.runs_mtime = t
+        runs = set(os.listdir(self.target_dir))
+        for run in runs - self.rendered - set(self.pending):
             print('New folder detected: ' + run)
-            #os.system(script_path + ' '+ run + '&')
-    for run in watching:
-        if os.path.isdir(target_dir + run):
-            for file in os.listdir(target_dir + run + '/results/'):
-                if file.endswith('.csv'):
-                    print('Executing rmarkdown for ' + run)
-                    os.system(script_path + ' ' + run)
-                    watching.remove(run)
-                    time.sleep(30)
-                    break
-        else:
-            watching.remove(run)
+            self.pending[run] = None
+        for run in set(self.pending) - runs:
             print('Folder removed: ' + run)
-    time.sleep(30)
+            del self.pending[run]
+
+    def results_ready(self, run):
+        results = self.target_dir + run + '/results/'
+        t = mtime(results)
+        if t is None or t == self.pending[run]:
+            return False
+        self.pending[run] = t
+        files = os.listdir(results)
+        if any(f.endswith('.html') for f in files):  # rendered out of this runner
+            self.mark_rendered(run)
+            return False
+        return any(f.endswith('.csv') for f in files)
+
+    def mark_rendered(self, run):
+        self.rendered.add(run)
+        self.pending.pop(run, None)
+
+    def poll(self):
+        self.scan_runs()
+        return [run for run in list(self.pending) if self.results_ready(run)]
+
+
+class InotifyWaiter:
+    '''
+    Wakes the runner up when something changes in target_dir or in the folder
+    of a pending run. gvfs does not always report the changes made by other
+    computers, so the folders are still checked every poll_interval.
+    '''
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.inotify = INotify()
+        self.watched = set()
+        self.mask = flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE | flags.DELETE
+
+    def update(self):
+        paths = [self.watcher.target_dir]
+        for run in self.watcher.pending:
+            paths.append(self.watcher.target_dir + run)
+            paths.append(self.watcher.target_dir + run + '/results/')
+        for path in paths:
+            if path not in self.watched and os.path.isdir(path):
+                try:
+                    self.inotify.add_watch(path, self.mask)
+                    self.watched.add(path)
+                except OSError:
+                    pass
+
+    def wait(self, timeout):
+        self.update()
+        self.inotify.read(timeout = timeout * 1000)
+
+
+def render(run):
+    '''
+    Run the render script for a run; returns the exit status and the stderr
+    '''
+    if report_engine == 'python':
+        print('Executing qpcr_analysis for ' + run)
+        command = [sys.executable, analysis_path, target_dir + run]
+    else:
+        print('Executing rmarkdown for ' + run)
+        command = [script_path, run]
+    # in its own process group, so a timeout also kills the Rscript started by the script
+    p = subprocess.Popen(command, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE,
+                         universal_newlines = True, start_new_session = True)
+    try:
+        stderr = p.communicate(timeout = render_timeout)[1]
+    except subprocess.TimeoutExpired:
+        os.killpg(p.pid, signal.SIGKILL)
+        p.communicate()
+        return None, 'Timeout after ' + str(render_timeout) + ' s'
+    return p.returncode, stderr
+
+
+def main():
+    state = load_state(state_path)
+    watcher = RunWatcher(target_dir, state['rendered'])
+    waiter = InotifyWaiter(watcher) if INotify is not None else None
+    pool = ThreadPoolExecutor(max_workers = render_workers)
+    running = {}  # run: future of its render
+    attempts = {}
+    while True:
+        for run in watcher.poll():
+            if run not in running:
+                running[run] = pool.submit(render, run)
+        for run, job in list(running.items()):
+            if not job.done():
+                continue
+            del running[run]
+            status, stderr = job.result()
+            if status == 0:
+                print('Report ready for ' + run)
+                watcher.mark_rendered(run)
+                attempts.pop(run, None)
+                continue
+            attempts[run] = attempts.get(run, 0) + 1
+            print('Render failed for ' + run + ' (exit status ' + str(status) + ', attempt ' +
+                  str(attempts[run]) + '):\n' + stderr[-2000:])
+            if attempts[run] < render_attempts:
+                watcher.pending[run] = None  # list it again in the next check
+            else:
+                attempts.pop(run)  # retried again when its results folder changes
+        if sorted(watcher.rendered) != state['rendered']:
+            state['rendered'] = sorted(watcher.rendered)
+            save_state(state, state_path)
+        # while reports are being rendered check often to collect them
+        timeout = 1 if running else poll_interval
+        if waiter is not None:
+            waiter.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+
+if __name__ == '__main__':
+    main()
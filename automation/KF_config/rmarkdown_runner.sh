@@ -8,5 +8,7 @@ Rscript -e 'library(rmarkdown);
 rmarkdown::render("'${folder}${run}'/scripts/'${rscript}'",
 "html_document", output_file = "'${run}'_resultados.html",
 output_dir="'$folder${run}'/results/")'
+status=$?  # the runner retries the runs whose render failed
 
-echo ${rscript}' executed for run '${run}
+echo ${rscript}' executed for run '${run}' (exit status '${status}')'
+exit ${status}
@@ -4,10 +4,12 @@
 from datetime import datetime
 import os
 import os.path
-import pandas as pd
-import string
-import math
-import time
+import shutil
+import sys
+import run_setup
+from sample_layout import load_layout
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root
+from functions.volumes import KF_PATHOGEN, kit_plan, staged_plan
 homedir = os.path.expanduser("~")
 main_path = '/Volumes/opentrons/'
 code_path = main_path + 'code/covid19clinic/automation/'
@@ -15,12 +17,12 @@ KF_path = code_path + 'KF_config/'
 HC_path = code_path + 'HC_config/'
 excel = main_path + 'barcode_template/muestras.xlsx'
 
-# Volumes for KF pathogen stations
-security_volume_mmix = 50
-security_volume_beads = 800
-mmix_volume = 20
-beads_volume = 10
+# Volumes for KF pathogen stations (the fill of the wells comes from functions/volumes.py,
+# the same plan the stations use)
+beads_volume = 10  # ul of beads and isopropanol in the 260 ul of each sample
 isoprop_volume = 250
+mmix_parts = (6.25, 1.25, 12.5)  # Master Mix, Assay and water in 20 ul of MMIX
+mmix_staging = True  # MMIX_STAGING of the KC station
 
 # Function to distinguish between HC and KF protocols
 def select_protocol_type(p1, p2):
@@ -39,32 +41,15 @@ def select_protocol_type(p1, p2):
             print('Please, try again')
     return pr,p
 
-def rep_data(n, name, f, d, run_name):
-    d=d.replace('$num_samples', str(n))
-    d=d.replace('$technician', '\'' + str(name) + '\'')
-    d=d.replace('$date', '\'' + str(f) + '\'')
-    d=d.replace('$run_id','\'' + str(run_name) + '\'')
-    return d
-
 ###############################################################################
 def main():
 
     # Read the excel file from the run and obtain the dictionary of samples
     # muestras.xlsx
-    df = pd.read_excel (excel,
-     sheet_name='Deepwell layout', header = None, index_col = 0)
-    df = df.iloc[1:]
-    df_dict = df.to_dict('index')
-    merged_dict={}
-    for key in df_dict:
-        for key2 in df_dict[key]:
-            merged_dict[str(key)+format(key2)]=df_dict[key][key2]
+    merged_dict = load_layout(excel)
 
     # count number of declared elements in Dictionary
-    num_samples_control = 0
-    for elem in merged_dict.values():
-        if elem != 0:
-            num_samples_control += 1
+    num_samples_control = len(merged_dict)
 
     # Get sample data from user
     control = False
@@ -116,57 +101,27 @@ def main():
         os.mkdir(final_path+'/scripts')
         os.mkdir(final_path+'/results')
         os.mkdir(final_path+'/logs')
-        os.system('cp ' + excel +' '+ final_path+'/OT'+str(id)+'_samples.xlsx')
+        shutil.copyfile(excel, final_path+'/OT'+str(id)+'_samples.xlsx')
 
     if protocol=='KF':
-        file_name = 'qpcr_template_OT'+str(id)+'_'+protocol+'.txt'
-        os.system('python3 '+code_path+'thermoqpcr_generate_template.py "' + final_path + '/'+ file_name+'"')
-    for file in os.listdir(protocol_path): # look for all protocols in folder
-        if file.endswith('.py') and 'rmarkdown' not in file:
-            fin = open(protocol_path+file, "rt") # open file and copy protocol
-            data = fin.read()
-            fin.close()
-            final_protocol=rep_data(num_samples, tec_name, t_registro, data, run_name) #replace data
-            position=file.find('_',12) # find _ position after the name and get value
-            filename=str(dia_registro)+'_'+file[:position]+'_OT'+str(id)+'.py' # assign a filename date + station name + id
-            for i in range(0,5): #Try up to 5 times with 1 sec delay
-                while True:
-                    try:
-                        fout = open(os.path.join(final_path+'/scripts/',filename), "wt")
-                        fout.write(final_protocol)
-                        fout.close()
-                    except SomeSpecificException:
-                        time.sleep(1)
-                        continue
-                    break
-
-        if file.endswith('.Rmd'):
-            fin = open(protocol_path+file, "rt") # open file and copy protocol
-            data = fin.read()
-            fin.close()
-            final_protocol=data.replace('$THERUN', str(run_name))
-            filename=str(dia_registro)+'_OT'+str(id)+'.Rmd' # assign a filename date + station name + id
-            fout = open(os.path.join(final_path+'/scripts/',filename), "wt")
-            fout.write(final_protocol)
-            fout.close()
+        qpcr_template = os.path.join(final_path, 'qpcr_template_OT'+str(id)+'_'+protocol+'.txt')
+    else:
+        qpcr_template = None
+    run_setup.setup_run(protocol_path, final_path+'/scripts/', num_samples, tec_name, t_registro,
+                        run_name, dia_registro, id, qpcr_template, merged_dict)
 
     if protocol=='KF':
         #Calculate needed volumes and wells in stations B and C
-        bead_vol = beads_volume * 8 * math.ceil(num_samples/8) * 1.1
-        isoprop_vol = isoprop_volume * 8 * math.ceil(num_samples/8) * 1.1
-        num_wells = math.ceil(num_samples / 32) #Number of wells needed
+        beads = kit_plan(KF_PATHOGEN['Beads'], num_samples)
+        total_bead = beads.fill * beads.wells
+        bead_vol = total_bead * beads_volume / (beads_volume + isoprop_volume)
+        isoprop_vol = total_bead * isoprop_volume / (beads_volume + isoprop_volume)
+        elution = kit_plan(KF_PATHOGEN['Elution Buffer'], num_samples)
 
-        #Add security volume according to proportion
-        bead_vol = bead_vol + (security_volume_beads/(beads_volume + isoprop_volume)) * beads_volume * num_wells #Add security volume in each well
-        isoprop_vol = isoprop_vol + (security_volume_beads/(beads_volume + isoprop_volume)) * isoprop_volume * num_wells #Add security volume in each well
-        total_bead = bead_vol + isoprop_vol
-
-        mmix_vol = (num_samples * 1.1 * mmix_volume)
-        num_wells_mmix = math.ceil(mmix_vol/2000) #Number of wells needed
-        mmix_vol = mmix_vol + (security_volume_mmix) * num_wells_mmix #Add security volume in each well
-        reac1_vol = mmix_vol / 20 * 6.25
-        reac2_vol = mmix_vol / 20 * 1.25
-        nfree_vol = mmix_vol / 20 * 12.5
+        mmix_plan = staged_plan if mmix_staging else kit_plan
+        mmix = mmix_plan(KF_PATHOGEN['Master Mix'], max(num_samples - 1, 1))  # the PC is done manually
+        mmix_vol = mmix.fill * mmix.wells
+        reac1_vol, reac2_vol, nfree_vol = [mmix_vol * p / sum(mmix_parts) for p in mmix_parts]
 
         #Print the information to a txt file
         f = open(final_path + '/OT' + str(id) + "volumes.txt", "wt")
@@ -175,16 +130,23 @@ def main():
         print('##############################', file=f)
         print('Es necesario un volumen de beads total de',format(round(total_bead)),' \u03BCl', file=f)
         print('La proporción de reactivos es:\n', round(bead_vol),'\u03BCl de beads \n',round(isoprop_vol), '\u03BCl de isopropanol\n', file=f)
-        print('A dividir en',format(num_wells),'pocillos', file=f)
-        print('Volumen por pocillo:',format(round(total_bead/num_wells)),'\u03BCl', file=f)
+        print('A dividir en',format(beads.wells),'pocillos', file=f)
+        print('Volumen por pocillo:',format(beads.fill),'\u03BCl', file=f)
+        print('Volumen muerto por pocillo:',', '.join(str(v) for v in beads.dead_volumes),'\u03BCl', file=f)
+        print('Cada pocillo se vacía tras la muestra:',', '.join(str(v) for v in beads.dry_after), file=f)
+        print('',file=f)
+        print('Elution Buffer (plate filling):',format(elution.wells),'pocillos de',format(elution.fill),'\u03BCl', file=f)
+        print('Cada pocillo se vacía tras la muestra:',', '.join(str(v) for v in elution.dry_after), file=f)
         print('',file=f)
         print('######### Station C ##########', file=f)
         print('Volumen y número tubos de MMIX para',num_samples, file=f)
         print('###############################', file=f)
         print('Serán necesarios',format(round(mmix_vol)),'\u03BCl', file=f)
         print('La proporción de reactivos es:\n', round(reac1_vol),'\u03BCl de 1-Step Multiplex Master Mix (No ROX, 4X)\n',round(reac2_vol), '\u03BCl de COVID-19 Assay Multiplex \n', round(nfree_vol),'\u03BCl de Nuclease-free water\n',file=f)
-        print('A dividir en',format(num_wells_mmix),'pocillos', file=f)
-        print('Volumen por pocillo:',format(round(mmix_vol/num_wells_mmix)),'\u03BCl', file=f)
+        print('A dividir en',format(mmix.wells),'pocillos', file=f)
+        print('Volumen por pocillo:',format(mmix.fill),'\u03BCl', file=f)
+        print('Volumen muerto por pocillo:',', '.join(str(v) for v in mmix.dead_volumes),'\u03BCl', file=f)
+        print('Cada pocillo se vacía tras la muestra:',', '.join(str(v) for v in mmix.dry_after), file=f)
         f.close()
         print('Revisa los volúmenes y pocillos necesarios en el archivo OT' + str(id) + 'volumes.txt dentro de la carpeta '+run_name)
         f2 = open(main_path + 'summary/run_history.txt','a')
@@ -0,0 +1,177 @@
+# Interpretation of the qPCR results exported by the 7500 Fast, same rules as
+# KF_config/test_rmarkdown.Rmd without starting R for every run.
+# Usage:
+#   python3 qpcr_analysis.py RUNS/2020_05_04_OT1_KF            (one run)
+#   python3 qpcr_analysis.py --batch RUNS/ > summary.tsv        (all the runs)
+import argparse
+import csv
+import glob
+import html
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+
+TARGETS = ['N gene', 'ORF1ab', 'S gene', 'MS2']
+GENES = [0, 1, 2]  # columns of the matrix that count as positive targets
+MS2 = 3
+NUM_WELLS = 96
+INTERPRETATIONS = ['control', 'No válido', 'Positivo', 'Indetectable', 'revisar']
+
+# One element per used well, ordered as in the report
+#   cq: matrix wells x TARGETS, nan if Undetermined or not present
+#   present: False if the target is not in the export for that well
+#   pos_targets: number of positive genes, -1 if any of them is not present
+QpcrResult = namedtuple('QpcrResult', ['run', 'samples', 'positions', 'cq', 'present',
+                                       'pos_targets', 'interpretation'])
+
+
+def read_export(csv_file):
+    '''
+    Stream the export csv (20 lines of header before the table) into the Cq matrix
+    '''
+    cq = np.full((NUM_WELLS, len(TARGETS)), np.nan)
+    present = np.zeros((NUM_WELLS, len(TARGETS)), dtype = bool)
+    used = np.zeros(NUM_WELLS, dtype = bool)
+    samples = np.empty(NUM_WELLS, dtype = object)
+    positions = np.empty(NUM_WELLS, dtype = object)
+    target_index = {t: i for i, t in enumerate(TARGETS)}
+    with open(csv_file, newline = '', encoding = 'utf-8', errors = 'replace') as f:
+        rows = csv.reader(f, skipinitialspace = True)
+        for header in rows:
+            if header and header[0].strip() == 'Well':
+                break
+        header = [h.strip() for h in header]
+        col = {name: header.index(name) for name in ['Well', 'Well Position', 'Sample', 'Target', 'Cq']}
+        for row in rows:
+            if len(row) <= col['Cq'] or not row[col['Well']].strip().isdigit():
+                continue
+            w = int(row[col['Well']]) - 1
+            used[w] = True
+            samples[w] = row[col['Sample']].strip()
+            positions[w] = row[col['Well Position']].strip()
+            t = target_index.get(row[col['Target']].strip())
+            if t is None:
+                continue
+            present[w, t] = True
+            value = row[col['Cq']].strip()
+            if value != 'Undetermined':
+                cq[w, t] = float(value)
+    wells = np.flatnonzero(used)
+    return samples[wells], positions[wells], wells, cq[wells], present[wells]
+
+
+def interpret(samples, cq, present):
+    '''
+    Vectorized calling rules, in order:
+    PC and NC are controls; MS2 Undetermined is not valid; 2 or more positive
+    genes is positive; MS2 detected without positive genes is undetectable;
+    anything else (1 positive gene, missing targets) has to be reviewed
+    '''
+    determined = present & ~np.isnan(cq)
+    genes_present = present[:, GENES].all(axis = 1)
+    pos_targets = np.where(genes_present, determined[:, GENES].sum(axis = 1), -1)
+    control = np.isin(samples, ['PC', 'NC'])
+    conditions = [control,
+                  present[:, MS2] & ~determined[:, MS2],
+                  genes_present & (pos_targets >= 2),
+                  genes_present & determined[:, MS2] & (pos_targets == 0)]
+    return pos_targets, np.select(conditions, INTERPRETATIONS[:4], default = 'revisar')
+
+
+def analyze(csv_file, run = None):
+    samples, positions, wells, cq, present = read_export(csv_file)
+    # Sample names are shortened as in the report (characters 4 to 12)
+    samples = np.array([s[3:12] if len(s) > 3 else s for s in samples], dtype = object)
+    pos_targets, interpretation = interpret(samples, cq, present)
+    # PC first, then by well
+    order = np.argsort(np.where(samples == 'PC', -1, wells), kind = 'stable')
+    return QpcrResult(run, samples[order], positions[order], cq[order], present[order],
+                      pos_targets[order], interpretation[order])
+
+
+def summary(result):
+    '''
+    Number of samples of each interpretation by number of positive targets (0 to 3)
+    '''
+    keep = (result.interpretation != 'control') & (result.pos_targets >= 0)
+    names = sorted(set(result.interpretation[keep]))
+    counts = np.zeros((len(names), 4), dtype = int)
+    np.add.at(counts, ([names.index(i) for i in result.interpretation[keep]],
+                       result.pos_targets[keep]), 1)
+    return names, counts
+
+
+def _cq_text(cq, present):
+    if not present:
+        return 'NA'
+    return 'Undetermined' if np.isnan(cq) else '%.2f' % cq
+
+
+def write_report(result, out_file):
+    names, counts = summary(result)
+    title = 'Kingfisher results table ' + html.escape(str(result.run or ''))
+    lines = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>' + title + '</title>',
+             '<style>table{border-collapse:collapse}td,th{padding:2px 8px;border-bottom:1px solid #ddd}'
+             'tr:nth-child(even){background:#f5f5f5}</style></head><body>',
+             '<h1>' + title + '</h1>', '<p>' + datetime.now().strftime('%d/%m/%Y') + '</p>',
+             '<h2>Summary</h2>', '<p>Resumen de interpretación según número de targets positivos</p>',
+             '<table><tr><th>Resultado</th><th colspan="4">Número de targets</th></tr>',
+             '<tr><th></th>' + ''.join('<th>' + str(n) + '</th>' for n in range(4)) + '</tr>']
+    for name, row in zip(names, counts):
+        lines.append('<tr><td>' + html.escape(name) + '</td>' +
+                     ''.join('<td>' + str(c) + '</td>' for c in row) + '</tr>')
+    lines += ['</table>', '<h2>Tabla resultados</h2>', '<table><tr>' +
+              ''.join('<th>' + h + '</th>' for h in ['Sample', 'Well Position'] + TARGETS +
+                      ['pos_targets', 'interpretation']) + '</tr>']
+    for i in range(len(result.samples)):
+        color = 'red' if result.interpretation[i] == 'revisar' else 'black'
+        cells = [html.escape(str(result.samples[i])), html.escape(str(result.positions[i]))]
+        cells += [_cq_text(result.cq[i, t], result.present[i, t]) for t in range(len(TARGETS))]
+        cells += [str(result.pos_targets[i]) if result.pos_targets[i] >= 0 else 'NA',
+                  '<span style="color:' + color + '">' + html.escape(result.interpretation[i]) + '</span>']
+        lines.append('<tr>' + ''.join('<td>' + c + '</td>' for c in cells) + '</tr>')
+    lines.append('</table></body></html>')
+    with open(out_file, 'w', encoding = 'utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def analyze_run(run_path):
+    '''
+    Analyze the csv of run_path/results and write the report next to it
+    '''
+    run = os.path.basename(os.path.normpath(run_path))
+    csv_files = sorted(glob.glob(os.path.join(run_path, 'results', '*.csv')))
+    if not csv_files:
+        return None
+    result = analyze(csv_files[0], run)
+    write_report(result, os.path.join(run_path, 'results', run + '_resultados.html'))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Interpretation of the qPCR results of a run')
+    parser.add_argument('path', help = 'run folder, or folder with all the runs with --batch')
+    parser.add_argument('--batch', action = 'store_true',
+                        help = 'analyze every run and print a summary table')
+    args = parser.parse_args()
+    if not args.batch:
+        if analyze_run(args.path) is None:
+            sys.exit('No results csv in ' + args.path)
+        return
+    print('\t'.join(['run', 'samples'] + INTERPRETATIONS[1:]))
+    for run in sorted(os.listdir(args.path)):
+        try:
+            result = analyze_run(os.path.join(args.path, run))
+        except (OSError, ValueError) as e:
+            print(run + '\terror: ' + str(e), file = sys.stderr)
+            continue
+        if result is None:
+            continue
+        counts = [int(np.sum(result.interpretation == i)) for i in INTERPRETATIONS]
+        print('\t'.join([run, str(len(result.samples) - counts[0])] + [str(c) for c in counts[1:]]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# Catalog of the runs and their samples (SQLite), built from summary/run_history.txt
+# Usage:
+#   python3 run_catalog.py sample 20A123456     (runs that processed a sample)
+#   python3 run_catalog.py per-day 2020-05      (samples per day of a month)
+#   python3 run_catalog.py history              (same lines as run_history.txt)
+#   python3 run_catalog.py import               (add the new lines of run_history.txt)
+# run_history.txt on the share is still the record of the runs, appended by the
+# run setup of every Mac. SQLite locking is not reliable over SMB, so the catalog
+# is a local file of the computer that queries it, brought up to date with the
+# new lines of run_history.txt before every query.
+import argparse
+import os
+import sqlite3
+import sys
+from sample_layout import load_layout
+
+main_path = '/Volumes/opentrons/'
+history_path = main_path + 'summary/run_history.txt'
+catalog_path = os.path.join(os.path.expanduser('~'), 'run_catalog.sqlite')
+
+# One row of runs per line of run_history.txt, in the same order: a run registered
+# twice keeps both entries, as the text file does
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_name TEXT NOT NULL,
+    run_id INTEGER,
+    protocol TEXT,
+    date TEXT,          -- YYYY-MM-DD
+    registered TEXT,    -- registration time as written in run_history.txt
+    num_samples INTEGER,
+    technician TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    well TEXT NOT NULL,
+    sample TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_date ON runs(date);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs(run_id);
+CREATE INDEX IF NOT EXISTS runs_technician ON runs(technician);
+CREATE INDEX IF NOT EXISTS runs_run_name ON runs(run_name);
+CREATE INDEX IF NOT EXISTS samples_sample ON samples(sample);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run);
+'''
+
+
+def connect(path = catalog_path):
+    db = sqlite3.connect(path, timeout = 30)
+    db.executescript(SCHEMA)
+    return db
+
+
+def add_run(db, run_name, run_id, protocol, date, registered, num_samples, technician, layout):
+    '''
+    layout: dictionary well: sample, see sample_layout.load_layout
+    '''
+    with db:
+        cursor = db.execute('INSERT INTO runs (run_name, run_id, protocol, date, registered, '
+                            'num_samples, technician) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (run_name, run_id, protocol, date, registered, num_samples, technician))
+        db.executemany('INSERT INTO samples (run, well, sample) VALUES (?, ?, ?)',
+                       [(cursor.lastrowid, well, str(sample)) for well, sample in layout.items()])
+    return cursor.lastrowid
+
+
+def runs_with_sample(db, sample):
+    return db.execute('SELECT runs.run_name, runs.date, runs.technician, samples.well '
+                      'FROM samples JOIN runs ON runs.id = samples.run '
+                      'WHERE samples.sample = ? ORDER BY runs.date', (sample,)).fetchall()
+
+
+def samples_per_day(db, month):
+    '''
+    month: YYYY-MM
+    '''
+    return db.execute('SELECT date, SUM(num_samples), COUNT(*) FROM runs '
+                      'WHERE date >= ? AND date < ? GROUP BY date ORDER BY date',
+                      (month + '-01', month + '-32')).fetchall()
+
+
+def history(db):
+    return db.execute('SELECT run_name, num_samples, technician, registered FROM runs '
+                      'ORDER BY id').fetchall()
+
+
+def _parse_run_name(run_name):
+    # 2020_05_04_OT1_KF -> date, run id and protocol
+    parts = run_name.split('_')
+    try:
+        return '-'.join(parts[:3]), int(parts[3][2:]), parts[4]
+    except (IndexError, ValueError):
+        return None, None, None
+
+
+def import_history(db, history_file = history_path, runs_path = main_path + 'RUNS/'):
+    '''
+    Add the lines of run_history.txt that are not in the catalog yet, with the
+    samples of their OT<id>_samples.xlsx
+    '''
+    if not os.path.isfile(history_file):  # the share is not mounted
+        return 0
+    imported = db.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+    added = 0
+    with open(history_file) as f:
+        lines = [line.split(' ', 3) for line in f]
+    for run_name, num_samples, technician, registered in [l for l in lines if len(l) == 4][imported:]:
+        date, run_id, protocol = _parse_run_name(run_name)
+        excel = os.path.join(runs_path, run_name, 'OT' + str(run_id) + '_samples.xlsx')
+        layout = load_layout(excel) if os.path.isfile(excel) else {}
+        add_run(db, run_name, run_id, protocol, date, registered.strip(), int(num_samples),
+                technician, layout)
+        added += 1
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Queries to the catalog of runs')
+    parser.add_argument('query', choices = ['sample', 'per-day', 'history', 'import'])
+    parser.add_argument('value', nargs = '?', help = 'sample name or month (YYYY-MM)')
+    parser.add_argument('--catalog', default = catalog_path)
+    args = parser.parse_args()
+    db = connect(args.catalog)
+    added = import_history(db)
+    if args.query == 'sample':
+        for row in runs_with_sample(db, args.value):
+            print('\t'.join(map(str, row)))
+    elif args.query == 'per-day':
+        print('date\tsamples\truns')
+        for row in samples_per_day(db, args.value):
+            print('\t'.join(map(str, row)))
+    elif args.query == 'history':
+        for row in history(db):
+            print(*row)
+    else:
+        print(str(added) + ' runs added to ' + args.catalog, file = sys.stderr)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
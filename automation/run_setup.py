@@ -0,0 +1,69 @@
+# Rendering of the station protocols, the Rmd and the qPCR template of a run in
+# a single process. Templates are parsed once and the files are written in
+# parallel, each one to a temporary file that is renamed when complete, so an
+# interrupted setup never leaves half written protocols in the run folder.
+import os
+import string
+from concurrent.futures import ThreadPoolExecutor
+from thermoqpcr_generate_template import generate_template
+
+write_workers = 8
+
+_templates = {}  # path: (mtime, string.Template)
+
+
+def load_template(path):
+    mtime = os.stat(path).st_mtime
+    if path not in _templates or _templates[path][0] != mtime:
+        with open(path, 'rt') as f:
+            _templates[path] = (mtime, string.Template(f.read()))
+    return _templates[path][1]
+
+
+def write_atomic(path, text):
+    with open(path + '.tmp', 'wt') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+
+def protocol_filename(file, day, id):
+    position=file.find('_',12) # find _ position after the name and get value
+    return str(day)+'_'+file[:position]+'_OT'+str(id)+'.py' # date + station name + id
+
+
+def render_protocols(protocol_path, scripts_path, num_samples, technician, registered,
+                     run_name, day, id):
+    '''
+    Fill the $ fields of every station template (.py) and Rmd of protocol_path.
+    Returns a list of (path in scripts_path, text)
+    '''
+    fields = {'num_samples': str(num_samples),
+              'technician': '\'' + str(technician) + '\'',
+              'date': '\'' + str(registered) + '\'',
+              'run_id': '\'' + str(run_name) + '\''}
+    files = []
+    for file in sorted(os.listdir(protocol_path)): # look for all protocols in folder
+        if file.endswith('.py') and 'rmarkdown' not in file:
+            text = load_template(os.path.join(protocol_path, file)).safe_substitute(fields)
+            files.append((os.path.join(scripts_path, protocol_filename(file, day, id)), text))
+        elif file.endswith('.Rmd'):
+            text = load_template(os.path.join(protocol_path, file)).safe_substitute(THERUN = run_name)
+            files.append((os.path.join(scripts_path, str(day)+'_OT'+str(id)+'.Rmd'), text))
+    return files
+
+
+def setup_run(protocol_path, scripts_path, num_samples, technician, registered, run_name,
+              day, id, qpcr_template = None, layout = None):
+    '''
+    Write the protocols of the run and, if qpcr_template is given, the qPCR plate
+    template with the samples of layout, all at the same time. Returns the written paths.
+    '''
+    files = render_protocols(protocol_path, scripts_path, num_samples, technician,
+                             registered, run_name, day, id)
+    with ThreadPoolExecutor(max_workers = write_workers) as pool:
+        jobs = [pool.submit(write_atomic, path, text) for path, text in files]
+        if qpcr_template is not None:
+            jobs.append(pool.submit(generate_template, qpcr_template, layout))
+        for job in jobs:
+            job.result()  # raise the errors of the writes
+    return [path for path, _ in files] + ([qpcr_template] if qpcr_template else [])
@@ -0,0 +1,49 @@
+# Sample layout of the 'Deepwell layout' sheet of muestras.xlsx, shared by the
+# run setup and the qPCR template generation. The layout is cached in the local
+# disk, so the workbook is only parsed (and pandas imported) when it changes.
+import hashlib
+import json
+import os
+
+cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'covid19clinic')
+
+
+def parse_layout(excel):
+    '''
+    Dictionary well: sample ('A1': '20A123456') of the wells with a sample
+    '''
+    import pandas as pd
+    df = pd.read_excel(excel, sheet_name='Deepwell layout', header = None, index_col = 0)
+    cells = df.iloc[1:].astype(object).stack()  # empty cells are dropped
+    cells = cells[cells != 0]
+    return {str(row) + format(col): value.item() if hasattr(value, 'item') else value
+            for (row, col), value in cells.items()}
+
+
+def load_layout(excel, cache_dir = cache_dir):
+    '''
+    Same as parse_layout, cached by modification time and content hash
+    '''
+    os.makedirs(cache_dir, exist_ok = True)
+    cache_file = os.path.join(cache_dir, 'layout_' +
+                              hashlib.sha1(os.path.abspath(excel).encode()).hexdigest() + '.json')
+    st = os.stat(excel)
+    cached = None
+    if os.path.isfile(cache_file):
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if cached['mtime'] == st.st_mtime and cached['size'] == st.st_size:
+            return cached['layout']
+    with open(excel, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if cached is not None and cached['sha1'] == digest:  # touched but not changed
+        layout = cached['layout']
+    else:
+        import io
+        layout = parse_layout(io.BytesIO(content))
+    with open(cache_file + '.tmp', 'w') as f:
+        json.dump({'mtime': st.st_mtime, 'size': st.st_size, 'sha1': digest,
+                   'layout': layout}, f)
+    os.replace(cache_file + '.tmp', cache_file)
+    return layout
@@ -0,0 +1,200 @@
+# Duration of the STEPS of every run, from the *_time_log.txt of the stations,
+# stored in the run catalog to find the steps that became slower.
+# Usage:
+#   python3 step_times.py ingest [folder ...]        (RUNS/ by default, also robot notebooks)
+#   python3 step_times.py regressions [--since YYYY-MM-DD] [--tolerance 0.25]
+#   python3 step_times.py summary                    (median time of each step and band)
+import argparse
+import glob
+import os
+import re
+import statistics
+import sys
+import run_catalog
+
+main_path = '/Volumes/opentrons/'
+runs_path = main_path + 'RUNS/'
+
+band_width = 24  # runs are compared with runs of the same band of NUM_SAMPLES (3 columns)
+history_runs = 20  # previous runs of the same step and band used as reference
+min_history = 5  # steps with fewer previous runs are not judged
+tolerance = 0.25  # a step regressed if it takes 25% more than the median of its history
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS step_times (
+    run_name TEXT NOT NULL,
+    station TEXT NOT NULL,      -- KB_PlateFilling_pathogen, from <station>_time_log.txt
+    step INTEGER NOT NULL,
+    description TEXT,
+    date TEXT,                  -- YYYY-MM-DD
+    num_samples INTEGER,
+    band INTEGER,               -- (num_samples - 1) // band_width
+    seconds REAL,               -- NULL if the step was not executed
+    wait_seconds REAL,
+    log_mtime REAL,
+    PRIMARY KEY (run_name, station, step)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS step_times_history ON step_times(station, step, band, date);
+'''
+
+_duration = re.compile(r'(?:(\d+) days?, )?(\d+):(\d+):(\d+(?:\.\d*)?)$')
+_run_name = re.compile(r'\d{4}_\d{2}_\d{2}_')  # 2020_05_04_OT1_KF
+
+
+def parse_duration(text):
+    '''
+    Seconds of a str(timedelta): '0:03:50.123456', '1 day, 0:00:01'. None if empty
+    '''
+    m = _duration.match(text.strip())
+    if m is None:
+        return None
+    days, h, mi, s = m.groups()
+    return int(days or 0) * 86400 + int(h) * 3600 + int(mi) * 60 + float(s)
+
+
+def read_time_log(path):
+    '''
+    Rows (step, description, seconds, wait_seconds) of a time log:
+    STEP, execution, description, wait_time and execution_time (missing if not executed)
+    '''
+    rows = []
+    with open(path) as f:
+        next(f, None)
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 3 or not fields[0].isdigit():
+                continue
+            wait = float(fields[3]) if len(fields) > 3 and fields[3] else None
+            seconds = parse_duration(fields[4]) if len(fields) > 4 else None
+            rows.append((int(fields[0]), fields[2], seconds, wait))
+    return rows
+
+
+def find_time_logs(folders):
+    '''
+    (run_name, station, path) of the time logs under folders. The run is the folder
+    of the log (the run folder of the robot) or the parent of its logs/ folder.
+    Logs that are not in a run folder (the viral kit stations write them to the
+    notebooks folder, each run over the last) are skipped with a warning
+    '''
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            for name in filenames:
+                if not name.endswith('_time_log.txt'):
+                    continue
+                run_dir = os.path.dirname(dirpath) if os.path.basename(dirpath) == 'logs' else dirpath
+                path = os.path.join(dirpath, name)
+                if not _run_name.match(os.path.basename(run_dir)):
+                    print('Skipped, not in a run folder: ' + path, file = sys.stderr)
+                    continue
+                yield os.path.basename(run_dir), name[:-len('_time_log.txt')], path
+
+
+def _num_samples(db, run_name, folders):
+    row = db.execute('SELECT num_samples FROM runs WHERE run_name = ? ORDER BY id DESC LIMIT 1',
+                     (run_name,)).fetchone()
+    if row is not None:
+        return row[0]
+    # Runs not in the catalog: NUM_SAMPLES of the protocols of the run
+    for folder in folders:
+        for script in glob.glob(os.path.join(folder, run_name, 'scripts', '*.py')):
+            with open(script) as f:
+                m = re.search(r'^NUM_SAMPLES = (\d+)', f.read(), re.M)
+            if m:
+                return int(m.group(1))
+    return None
+
+
+def ingest(db, folders):
+    '''
+    Add the time logs that are new or changed since the last ingest. Returns the number of logs
+    '''
+    db.executescript(SCHEMA)
+    known = {(r[0], r[1]): r[2] for r in
+             db.execute('SELECT run_name, station, MAX(log_mtime) FROM step_times GROUP BY run_name, station')}
+    added = 0
+    for run_name, station, path in find_time_logs(folders):
+        mtime = os.stat(path).st_mtime
+        if known.get((run_name, station)) == mtime:
+            continue
+        num_samples = _num_samples(db, run_name, folders)
+        band = (num_samples - 1) // band_width if num_samples else None
+        date = '-'.join(run_name.split('_')[:3])
+        with db:
+            db.executemany('INSERT OR REPLACE INTO step_times VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                           [(run_name, station, step, description, date, num_samples, band,
+                             seconds, wait, mtime)
+                            for step, description, seconds, wait in read_time_log(path)])
+        known[(run_name, station)] = mtime
+        added += 1
+    return added
+
+
+def regressions(db, since = None, tolerance = tolerance):
+    '''
+    Steps of the runs since the date (all if None) that took longer than
+    (1 + tolerance) times the median of the previous runs of the same band
+    '''
+    db.executescript(SCHEMA)
+    rows = db.execute('SELECT station, step, band, date, run_name, description, seconds '
+                      'FROM step_times WHERE seconds IS NOT NULL AND band IS NOT NULL '
+                      'ORDER BY station, step, band, date, run_name').fetchall()
+    flagged = []
+    history = []
+    key = None
+    for station, step, band, date, run_name, description, seconds in rows:
+        if (station, step, band) != key:
+            key = (station, step, band)
+            history = []
+        if len(history) >= min_history and (since is None or date >= since):
+            reference = statistics.median(history[-history_runs:])
+            if seconds > reference * (1 + tolerance):
+                flagged.append((run_name, station, step, description, band, reference, seconds))
+        history.append(seconds)
+    return flagged
+
+
+def summary(db):
+    db.executescript(SCHEMA)
+    times = {}
+    for station, step, band, description, seconds in db.execute(
+            'SELECT station, step, band, description, seconds FROM step_times '
+            'WHERE seconds IS NOT NULL ORDER BY station, step, band'):
+        times.setdefault((station, step, band, description), []).append(seconds)
+    return [key + (len(s), statistics.median(s)) for key, s in times.items()]
+
+
+def _samples(band):
+    if band is None:
+        return '?'
+    return str(band * band_width + 1) + '-' + str((band + 1) * band_width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Step durations of the runs')
+    parser.add_argument('command', choices = ['ingest', 'regressions', 'summary'])
+    parser.add_argument('folders', nargs = '*', default = [runs_path])
+    parser.add_argument('--since', help = 'only runs from this date (YYYY-MM-DD)')
+    parser.add_argument('--tolerance', type = float, default = tolerance)
+    parser.add_argument('--catalog', default = run_catalog.catalog_path)
+    args = parser.parse_args()
+    db = run_catalog.connect(args.catalog)
+    if args.command == 'ingest':
+        run_catalog.import_history(db)  # NUM_SAMPLES of the runs
+        print(str(ingest(db, args.folders)) + ' time logs added to ' + args.catalog, file = sys.stderr)
+    elif args.command == 'regressions':
+        print('run\tstation\tstep\tdescription\tsamples\tmedian\tseconds')
+        for run_name, station, step, description, band, reference, seconds in \
+                regressions(db, args.since, args.tolerance):
+            print('\t'.join([run_name, station, str(step), description, _samples(band),
+                             '%.0f' % reference, '%.0f' % seconds]))
+    else:
+        print('station\tstep\tdescription\tsamples\truns\tmedian')
+        for station, step, band, description, runs, median in summary(db):
+            print('\t'.join([station, str(step), description, _samples(band), str(runs),
+                             '%.0f' % median]))
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,53 @@
-import pandas as pd
-import string
 import os
 import os.path
 import sys
+from collections import namedtuple
+from sample_layout import load_layout
 
 homedir=os.path.expanduser("~")
-out_file = sys.argv[1]
 main_path = '/Volumes/opentrons/'
 code_path = main_path + '/code/covid19clinic/automation/'
-input_file = code_path + 'qpcr_kf_template.txt'
 excel = main_path + '/barcode_template/muestras.xlsx'
 
-#Read the excel file from the run and obtain the dictionary of samples
-df = pd.read_excel (excel, sheet_name='Deepwell layout', header = None, index_col = 0)
-df = df.iloc[1:]
-df_dict = df.to_dict('index')
-merged_dict={}
-for key in df_dict:
-    for key2 in df_dict[key]:
-        merged_dict[str(key)+format(key2)]=df_dict[key][key2]
-
-#input file
-fin = open(input_file, "rt")
-#output file to write the result to
-fout = open(out_file+'_temp', "wt")
-#for each line in the input file
-
-for line in fin:
-	#read replace the string and write to output file
-    if line[0] in list(string.ascii_uppercase[0:8]):
-        well = line.rstrip().split('\t')[0]
-        if merged_dict[well] != 0 and well != 'A1' and well != 'H12':
-            fout.write(line.replace(well+'\t', well+'\t'+format(merged_dict[well])))
-        else:
-            fout.write(line)
-    else:
-        fout.write(line)
-
-#close input and output files
-fin.close()
-fout.close()
-
-#Transform into windows format
-WINDOWS_LINE_ENDING = b'\r\n'
-UNIX_LINE_ENDING = b'\n'
-contents = open(out_file+'_temp', 'rb').read()
-open(out_file, 'wb').write(contents.replace(UNIX_LINE_ENDING, WINDOWS_LINE_ENDING))
-os.system('rm '+out_file+'_temp')
+# Plate template of each qPCR instrument:
+#   template: text file exported from the instrument software with the empty plate
+#   separator: field separator of the well lines
+#   sample_column: field of the well lines where the sample name goes (the well is the first)
+#   skip_wells: wells whose name is already in the template (controls)
+TemplateFormat = namedtuple('TemplateFormat', ['template', 'separator', 'sample_column', 'skip_wells'])
+TEMPLATE_FORMATS = {
+    '7500fast': TemplateFormat(code_path + 'qpcr_kf_template.txt', '\t', 1, ('A1', 'H12'))
+}
+
+
+def template_lines(lines, merged_dict, template_format):
+    '''
+    Generator with the lines of the template, with the sample names of merged_dict
+    '''
+    sep = template_format.separator
+    samples = {well: format(sample) for well, sample in merged_dict.items()
+               if well not in template_format.skip_wells}
+    for line in lines:
+        well = line.split(sep, 1)[0]
+        if well in samples:
+            fields = line.rstrip('\n').split(sep)
+            fields[template_format.sample_column] = samples[well]
+            line = sep.join(fields) + '\n'
+        yield line
+
+
+def generate_template(out_file, merged_dict, template_format = '7500fast'):
+    '''
+    Write the qPCR plate template of the run with the sample names of merged_dict,
+    in one pass and with Windows line endings
+    '''
+    template_format = TEMPLATE_FORMATS[template_format]
+    with open(template_format.template, 'rt') as fin, \
+         open(out_file + '.tmp', 'wt', newline = '\r\n') as fout:
+        fout.writelines(template_lines(fin, merged_dict, template_format))
+    os.replace(out_file + '.tmp', out_file)
+
+
+if __name__ == '__main__':
+    #Read the excel file from the run and obtain the dictionary of samples
+    generate_template(sys.argv[1], load_layout(excel), *sys.argv[2:3])
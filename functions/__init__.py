@@ -0,0 +1,20 @@
+'''
+Shared runtime for the station protocols.
+
+Copy this folder to /var/lib/jupyter/notebooks/ in every OT2 robot. Stations
+import it once and the definitions are kept loaded between protocol uploads.
+'''
+from .functions import (Reagent, move_vol_multichannel, custom_mix, calc_height,
+                        distribute_custom, plan_distribute, plan_multi_dispense, multi_dispense,
+                        divide_volume, divide_destinations, generate_source_table,
+                        find_side, pick_up, SampleSourceIndex,
+                        refill_reservoirs)
+from .heights import HeightPlan, plan_heights
+from .instrumentation import Recorder
+from .tips import TipPlan, TipManager, TipInventory, plan_tips
+from .paths import next_tips, plan_transfer_order
+from .volumes import (ReservoirPlan, KF_PATHOGEN, plan_reservoir, kit_plan,
+                      stage_columns, staged_plan, describe)
+from .signals import Signals
+from .labware import registry
+from .geometry import VolumeTable, well_geometry, liquid_height, dead_volume
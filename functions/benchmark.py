@@ -0,0 +1,147 @@
+'''
+Dry run of the stations of every kit for a range of samples, in a process
+pool, to measure a change to a station or to the shared functions before it
+reaches the robots:
+
+    python -m functions.benchmark -o baseline.tsv                 (1-96 samples)
+    python -m functions.benchmark --compare baseline.tsv -o new.tsv
+    python -m functions.benchmark --kit KF_pathogen --station KC -n 8,48,96
+
+One tab separated row per station and number of samples with the estimated
+duration, commands, tips, tiprack replacements and reagent taken from every
+source labware (see dry_run.Estimate). --compare lists the rows that changed
+and exits with 1 when any of them got worse.
+'''
+import argparse
+import csv
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .dry_run import estimate, _parse_samples
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KITS = {
+    'KF_pathogen': 'Kingfisher_protocols/KF_pathogen',
+    'KF_viral_pathogen_II': 'Kingfisher_protocols/KF_viral_pathogen_II'
+}
+COLUMNS = ['kit', 'station', 'num_samples', 'seconds', 'commands', 'tips', 'tip_swaps',
+           'reagent_ul', 'tips_by_pipette', 'reagents', 'error']
+# Columns compared with --compare: a row is worse when any of them grows
+MEASURES = ['seconds', 'commands', 'tips', 'tip_swaps', 'reagent_ul']
+
+
+def stations(kits = None, station = None):
+    '''
+    (kit, script) of the stations of kits (all if None) whose name contains station
+    '''
+    for kit in kits or KITS:
+        for path in sorted(glob.glob(os.path.join(ROOT, KITS[kit], 'Station_*.py'))):
+            if station is None or station in os.path.basename(path):
+                yield kit, path
+
+
+def run_one(task):
+    '''
+    Row of one station and number of samples. Runs in a worker process
+    '''
+    kit, path, num_samples = task
+    row = {'kit': kit, 'station': os.path.basename(path)[:-3], 'num_samples': num_samples}
+    try:
+        e = estimate(path, num_samples)
+    except Exception as error:  # the station does not run with these samples
+        row['error'] = type(error).__name__ + ': ' + str(error)
+        return row
+    row.update({
+        'seconds': round(e.total, 1),
+        'commands': e.commands,
+        'tips': sum(e.tips.values()),
+        'tip_swaps': e.tip_swaps,
+        'reagent_ul': round(sum(e.volumes.values())),
+        'tips_by_pipette': '; '.join(k + '=' + str(v) for k, v in sorted(e.tips.items())),
+        'reagents': '; '.join(k.strip() + '=' + str(round(v)) for k, v in sorted(e.volumes.items())),
+        'error': ''})
+    return row
+
+
+def benchmark(tasks, workers = None):
+    '''
+    Rows of the (kit, path, num_samples) tasks, in the same order
+    '''
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(run_one, tasks, chunksize = 8))
+
+
+def write(rows, f):
+    writer = csv.DictWriter(f, COLUMNS, delimiter = '\t', restval = '', lineterminator = '\n')
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def read(path):
+    with open(path, newline = '') as f:
+        return list(csv.DictReader(f, delimiter = '\t'))
+
+
+def compare(baseline, rows, tolerance = 0.01):
+    '''
+    (row, changes, worse) of the rows that differ from the baseline by more than
+    tolerance (fraction) in any measure, or that fail or stop failing
+    '''
+    old = {(r['kit'], r['station'], str(r['num_samples'])): r for r in baseline}
+    changed = []
+    for row in rows:
+        before = old.get((row['kit'], row['station'], str(row['num_samples'])))
+        if before is None:
+            continue
+        if bool(before['error']) != bool(row.get('error')):
+            changed.append((row, [('error', before['error'] or 'ok', row.get('error') or 'ok')],
+                            bool(row.get('error'))))
+            continue
+        if row.get('error'):
+            continue
+        changes = []
+        worse = False
+        for measure in MEASURES:
+            a, b = float(before[measure]), float(row[measure])
+            if abs(b - a) > tolerance * max(abs(a), 1):
+                changes.append((measure, before[measure], row[measure]))
+                worse = worse or b > a
+        if changes:
+            changed.append((row, changes, worse))
+    return changed
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Dry run benchmark of the stations')
+    parser.add_argument('-n', '--num_samples', default = '1-96',
+                        help = 'numbers of samples, a list (8,48,96) or a range (1-96)')
+    parser.add_argument('--kit', action = 'append', choices = list(KITS), help = 'all the kits by default')
+    parser.add_argument('--station', help = 'only the stations whose file name contains this')
+    parser.add_argument('-o', '--output', help = 'table file (standard output by default)')
+    parser.add_argument('--compare', help = 'table of a previous benchmark')
+    parser.add_argument('--tolerance', type = float, default = 0.01)
+    parser.add_argument('-j', '--workers', type = int, default = None)
+    args = parser.parse_args(argv)
+
+    tasks = [(kit, path, n) for kit, path in stations(args.kit, args.station)
+             for n in _parse_samples(args.num_samples)]
+    rows = benchmark(tasks, args.workers)
+    if args.output:
+        with open(args.output, 'w') as f:
+            write(rows, f)
+    elif not args.compare:
+        write(rows, sys.stdout)
+    if args.compare:
+        changed = compare(read(args.compare), rows, args.tolerance)
+        for row, changes, worse in changed:
+            print(('WORSE ' if worse else 'better ') + row['station'] + ' ' + str(row['num_samples']) + ': ' +
+                  ', '.join(m + ' ' + str(a) + ' -> ' + str(b) for m, a, b in changes))
+        print(str(len(changed)) + ' of ' + str(len(rows)) + ' rows changed', file = sys.stderr)
+        if any(worse for _, _, worse in changed):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+'''
+Geometry of the OT2 deck and of the labware used by the stations.
+
+Only what is needed to estimate gantry movements offline: slot origins, well
+positions and labware heights (mm, deck coordinates).
+'''
+import re
+from collections import namedtuple
+
+from .labware import registry
+
+# Front left corner of every slot (ot2_standard deck). Slot 12 is the fixed trash
+SLOTS = {
+    '1': (0.0, 0.0), '2': (132.5, 0.0), '3': (265.0, 0.0),
+    '4': (0.0, 90.5), '5': (132.5, 90.5), '6': (265.0, 90.5),
+    '7': (0.0, 181.0), '8': (132.5, 181.0), '9': (265.0, 181.0),
+    '10': (0.0, 271.5), '11': (132.5, 271.5), '12': (265.0, 271.5)
+}
+TRASH_SLOT = '12'
+TRASH_HEIGHT = 82.0  # drop tip height of the fixed trash
+MODULE_HEIGHTS = {'tempdeck': 80.09, 'magdeck': 87.0}  # labware offset of the modules
+
+# Well of a labware relative to its front left corner
+WellGeometry = namedtuple('WellGeometry', ['name', 'x', 'y', 'z', 'depth', 'diameter'])
+LabwareGeometry = namedtuple('LabwareGeometry', ['load_name', 'height', 'wells'])
+
+# Opentrons labware that is not in labware_simulate or Custom labware:
+# wells: (rows, columns, x first well, y first well, x spacing, y spacing), height, depth, diameter
+STANDARD_LABWARE = {
+    'opentrons_96_filtertiprack_20ul': ((8, 12, 14.38, 74.24, 9, 9), 64.69, 39.2, 3.27),
+    'opentrons_96_filtertiprack_200ul': ((8, 12, 14.38, 74.24, 9, 9), 64.49, 59.3, 5.59),
+    'opentrons_96_tiprack_300ul': ((8, 12, 14.38, 74.24, 9, 9), 64.49, 59.3, 5.23),
+    'opentrons_96_filtertiprack_1000ul': ((8, 12, 14.38, 74.24, 9, 9), 97.47, 97.47, 7.62),
+    'opentrons_24_tuberack_generic_2ml_screwcap': ((4, 6, 18.21, 75.43, 19.89, 19.28), 84.0, 42.0, 8.5),
+    'opentrons_24_aluminumblock_generic_2ml_screwcap': ((4, 6, 20.75, 68.63, 17.25, 17.25), 42.0, 39.0, 8.5),
+    'nest_12_reservoir_15ml': ((1, 12, 14.38, 42.78, 9, 0), 31.4, 26.85, 8.2),
+    'perkinelmer_12_reservoir_21000ul': ((1, 12, 14.38, 42.78, 9, 0), 44.0, 41.0, 8.2),
+    'vwr_96_wellplate_200ul_alum_opentrons': ((8, 12, 14.38, 74.24, 9, 9), 22.0, 14.0, 5.5),
+    'opentrons_96_aluminumblock_generic_pcr_strip_200ul': ((8, 12, 14.38, 74.24, 9, 9), 49.35, 20.2, 5.46)
+}
+
+_cache = {}
+
+
+def _grid(load_name, wells, height, depth, diameter):
+    rows, cols, x0, y0, dx, dy = wells
+    return LabwareGeometry(load_name, height, [
+        WellGeometry(chr(ord('A') + r) + str(c + 1), x0 + c * dx, y0 - r * dy,
+                     height - depth, depth, diameter)
+        for c in range(cols) for r in range(rows)])
+
+
+def _from_table(load_name, height, table):
+    return LabwareGeometry(load_name, height, [
+        WellGeometry(str(w['name']), float(w['x']), float(w['y']), float(w['z']), float(w['depth']),
+                     float(w['diameter'])) for w in table])
+
+
+def _load_definitions():
+    labware = registry()
+    for load_name in labware.tables:
+        _cache[load_name] = _from_table(load_name, labware.height(load_name), labware.wells(load_name))
+
+
+def labware_geometry(load_name):
+    '''
+    Wells (in column order) and height of a labware. Custom labware comes from the
+    labware registry; unknown labware is guessed from the number of wells in its name.
+    '''
+    if not _cache:
+        _load_definitions()
+    if load_name not in _cache:
+        if load_name in STANDARD_LABWARE:
+            _cache[load_name] = _grid(load_name, *STANDARD_LABWARE[load_name])
+        else:
+            n = re.search(r'_(\d+)_', load_name)
+            n = int(n.group(1)) if n else 96
+            rows = {1: 1, 12: 1, 24: 4, 48: 6}.get(n, 8)
+            cols = max(n // rows, 1)
+            _cache[load_name] = _grid(load_name, (rows, cols, 14.38, 74.24, 9, 9), 50.0, 40.0, 6.0)
+    return _cache[load_name]
+
+
+def slot_origin(slot):
+    return SLOTS[str(slot)]
@@ -0,0 +1,522 @@
+'''
+Offline time estimator for the station protocols.
+
+The station script is run against a lightweight mock of the opentrons
+ProtocolContext that adds up the time of every command (aspirate and dispense
+at the configured flow rates, delays, gantry moves between slots, tip pick up
+and drop) instead of moving the robot. The opentrons package is not needed.
+
+    python -m functions.dry_run Station_KC_qPCR_pathogen_v2.py -n 48
+    python -m functions.dry_run Station_KB_PlateFilling_pathogen_v2.py -n 1-96 > times.tsv
+
+With a single number of samples the time of every STEP is printed; with a
+range, one tab separated row per number of samples.
+'''
+import argparse
+import math
+import os
+import re
+import sys
+import time
+import types
+from collections import namedtuple, defaultdict
+from datetime import datetime, timedelta
+
+from . import deck
+from .instrumentation import STEP_COMMENT, timedelta_seconds
+
+# Times in seconds and speeds in mm/s of our OT2 robots. Adjust them after
+# comparing the estimation with the *_time_log.txt of real runs
+COSTS = {
+    'xy_speed': 400,
+    'z_speed': 125,
+    'arc_clearance': 10,  # height over the labware when moving between wells
+    'command': 0.05,  # overhead of every command sent to the robot
+    'pick_up_tip': 3.5,
+    'drop_tip': 2.0,
+    'home_plunger': 1.5,  # after every drop tip
+    'blow_out': 1.0,
+    'home': 8.0,
+    'tempdeck_rate': 0.1,  # degrees per second
+    'ambient_temperature': 25
+}
+
+# max volume, min volume, channels, default flow rate (ul/s)
+PIPETTES = {
+    'p20_single_gen2': (20, 1, 1, 7.56),
+    'p20_multi_gen2': (20, 1, 8, 7.6),
+    'p300_single_gen2': (300, 20, 1, 92.86),
+    'p300_multi_gen2': (300, 20, 8, 94),
+    'p1000_single_gen2': (1000, 100, 1, 274.7)
+}
+
+StepTime = namedtuple('StepTime', ['step', 'description', 'seconds'])
+# steps: list of StepTime; other: time outside the steps (setup, end of run)
+# pauses: messages of ctx.pause; tip_swaps: tipracks replaced during the run
+# commands: commands sent to the robot (moves not included); tips: tips used by pipette
+# volumes: ul taken out of each labware that is a source (aspirated - dispensed, air gaps not included)
+Estimate = namedtuple('Estimate', ['num_samples', 'steps', 'other', 'total',
+                                   'pauses', 'tip_swaps', 'costs', 'commands', 'tips', 'volumes'])
+AIR_HEIGHT = 3  # aspirations this close to the top of the well are air gaps (top(z = -2))
+
+
+class Point(namedtuple('Point', ['x', 'y', 'z'])):
+    __slots__ = ()
+
+    def __new__(cls, x = 0, y = 0, z = 0):
+        return super().__new__(cls, x, y, z)
+
+    def __add__(self, other):
+        return Point(self.x + other.x, self.y + other.y, self.z + other.z)
+
+
+class Location(namedtuple('Location', ['point', 'labware'])):
+    __slots__ = ()
+
+    def move(self, point):
+        return Location(self.point + point, self.labware)
+
+
+class Well:
+    def __init__(self, parent, geometry, x, y, z):
+        self.parent = parent
+        self.name = geometry.name
+        self.depth = geometry.depth
+        self.diameter = geometry.diameter
+        self.has_tip = True  # only meaningful in tipracks
+        self._x, self._y, self._z = x, y, z
+
+    def top(self, z = 0):
+        return Location(Point(self._x, self._y, self._z + self.depth + z), self)
+
+    def bottom(self, z = 0):
+        return Location(Point(self._x, self._y, self._z + z), self)
+
+    def center(self):
+        return self.bottom(self.depth / 2)
+
+    def __repr__(self):
+        return self.name + ' of ' + repr(self.parent)
+
+
+class Labware:
+    def __init__(self, load_name, slot, label = None, offset = 0):
+        geometry = deck.labware_geometry(load_name)
+        x, y = deck.slot_origin(slot)
+        self.load_name = load_name
+        self.name = label or load_name
+        self.slot = str(slot)
+        self.parent = self.slot
+        self.highest_z = offset + geometry.height
+        self._wells = [Well(self, w, x + w.x, y + w.y, offset + w.z) for w in geometry.wells]
+        self._by_name = {w.name: w for w in self._wells}
+
+    def wells(self, *names):
+        if names:
+            return [self._by_name[n] for n in names]
+        return list(self._wells)
+
+    def wells_by_name(self):
+        return dict(self._by_name)
+
+    def rows(self):
+        rows = defaultdict(list)
+        for w in self._wells:
+            rows[w.name[0]].append(w)
+        return [rows[r] for r in sorted(rows)]
+
+    def columns(self):
+        columns = defaultdict(list)
+        for w in self._wells:
+            columns[int(w.name[1:])].append(w)
+        return [columns[c] for c in sorted(columns)]
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def _tips_from(self, start_well, num_channels):
+        column = [c for c in self.columns() if start_well in c][0]
+        i = column.index(start_well)
+        return column[i:i + num_channels]
+
+    def next_tip(self, num_tips = 1):
+        for column in self.columns():
+            for i in range(len(column) - num_tips + 1):
+                if all(w.has_tip for w in column[i:i + num_tips]):
+                    return column[i]
+        return None
+
+    def use_tips(self, start_well, num_channels = 1):
+        for w in self._tips_from(start_well, num_channels):
+            w.has_tip = False
+
+    def return_tips(self, start_well, num_channels = 1):
+        for w in self._tips_from(start_well, num_channels):
+            w.has_tip = True
+
+    def reset(self):
+        for w in self._wells:
+            w.has_tip = True
+
+    def __repr__(self):
+        return self.name + ' on ' + self.slot
+
+
+class TempDeck:
+    def __init__(self, ctx, slot):
+        self._ctx = ctx
+        self.slot = str(slot)
+        self.temperature = COSTS['ambient_temperature']
+        self.labware = None
+
+    def load_labware(self, load_name, label = None):
+        self.labware = self._ctx._add_labware(
+            Labware(load_name, self.slot, label, offset = deck.MODULE_HEIGHTS['tempdeck']))
+        return self.labware
+
+    def set_temperature(self, celsius):
+        # set_temperature waits until the temperature is reached
+        self._ctx._spend('temperature', abs(self.temperature - celsius) / COSTS['tempdeck_rate'])
+        self.temperature = celsius
+
+    def deactivate(self):
+        self.temperature = COSTS['ambient_temperature']
+
+
+class FlowRates:
+    def __init__(self, rate):
+        self.aspirate = rate
+        self.dispense = rate
+        self.blow_out = rate
+
+
+class Pipette:
+    def __init__(self, ctx, name, mount, tip_racks):
+        self._ctx = ctx
+        self.name = name
+        self.mount = mount
+        self.max_volume, self.min_volume, self.channels, rate = PIPETTES[name]
+        self.flow_rate = FlowRates(rate)
+        self.tip_racks = list(tip_racks or [])
+        self.starting_tip = None
+        self.hw_pipette = {'has_tip': False}
+        self.current_volume = 0
+        self._tip_location = None  # for return_tip
+        self._well = None  # well of the last location, used by touch_tip
+        self._air = 0  # air gaps in the tip, they go out first
+
+    def _move(self, location):
+        if location is not None:
+            if isinstance(location, Well):
+                location = location.top()
+            self._ctx._travel(location)
+            self._well = location.labware if isinstance(location.labware, Well) else None
+
+    def move_to(self, location):
+        self._move(location)
+        self._ctx._spend('command', COSTS['command'])
+        return self
+
+    def _liquid(self, volume):
+        # volume out of (in, if negative) the labware of the last well
+        if self._well is not None:
+            self._ctx.volumes[self._well.parent.name] += volume * self.channels
+
+    def aspirate(self, volume = None, location = None, rate = 1.0):
+        if volume is None:
+            volume = self.max_volume - self.current_volume
+        self._move(location)
+        if self._well is not None and self._ctx._position.z < self._well.top(-AIR_HEIGHT).point.z:
+            self._liquid(volume)
+        else:
+            self._air += volume
+        self._ctx._spend('aspirate', volume / (self.flow_rate.aspirate * rate) + COSTS['command'])
+        self.current_volume += volume
+        return self
+
+    def dispense(self, volume = None, location = None, rate = 1.0):
+        if volume is None:
+            volume = self.current_volume
+        self._move(location)
+        air = min(self._air, volume)
+        self._air -= air
+        self._liquid(air - volume)
+        self._ctx._spend('dispense', volume / (self.flow_rate.dispense * rate) + COSTS['command'])
+        self.current_volume = max(self.current_volume - volume, 0)
+        return self
+
+    def mix(self, repetitions = 1, volume = None, location = None, rate = 1.0):
+        self._move(location)
+        for _ in range(repetitions):
+            self.aspirate(volume, rate = rate)
+            self.dispense(volume, rate = rate)
+        return self
+
+    def blow_out(self, location = None):
+        self._move(location)
+        self._liquid(min(self._air - self.current_volume, 0))
+        self._ctx._spend('blow_out', COSTS['blow_out'])
+        self.current_volume = 0
+        self._air = 0
+        return self
+
+    def touch_tip(self, location = None, radius = 1.0, v_offset = -1.0, speed = 60.0):
+        self._move(location)
+        diameter = self._well.diameter if self._well is not None else 0
+        # Four sides, going from the center to the wall and back
+        self._ctx._spend('touch_tip', 4 * radius * diameter / speed + 4 * COSTS['command'])
+        return self
+
+    def _next_tip(self):
+        for rack in self.tip_racks:
+            well = rack.next_tip(self.channels)
+            if well is not None:
+                return well
+        return None
+
+    def pick_up_tip(self, location = None):
+        if location is None:
+            location = self._next_tip()
+            if location is None:
+                # In the robot pick_up pauses the run to replace the tipracks
+                self._ctx.tip_swaps += 1
+                self.reset_tipracks()
+                location = self._next_tip()
+        location.parent.use_tips(location, self.channels)
+        self._ctx.tips[self.name] += self.channels
+        self._tip_location = location
+        self._move(location)
+        self._ctx._spend('pick_up_tip', COSTS['pick_up_tip'])
+        self.hw_pipette['has_tip'] = True
+        return self
+
+    def drop_tip(self, location = None, home_after = True):
+        self._move(location if location is not None else self._ctx._trash)
+        self._ctx._spend('drop_tip', COSTS['drop_tip'] + (COSTS['home_plunger'] if home_after else 0))
+        self.hw_pipette['has_tip'] = False
+        self.current_volume = 0
+        self._air = 0
+        return self
+
+    def return_tip(self, home_after = True):
+        self.drop_tip(self._tip_location, home_after)
+        self._tip_location.parent.return_tips(self._tip_location, self.channels)
+        return self
+
+    def reset_tipracks(self):
+        for rack in self.tip_racks:
+            rack.reset()
+
+
+class DryRunContext:
+    '''
+    Mock of opentrons ProtocolContext. Every command adds its time to elapsed.
+    '''
+    def __init__(self):
+        self.elapsed = 0.0
+        self.costs = defaultdict(float)  # seconds by kind of command
+        self.steps = []
+        self.pauses = []
+        self.tip_swaps = 0
+        self.commands = 0
+        self.tips = defaultdict(int)
+        self.volumes = defaultdict(float)
+        self._position = Point(0, 0, 0)
+        self._labware = None
+        self._labware_heights = [deck.TRASH_HEIGHT]
+        x, y = deck.slot_origin(deck.TRASH_SLOT)
+        self._trash = Location(Point(x + 82.84, y + 80, deck.TRASH_HEIGHT), None)
+
+    def _spend(self, kind, seconds):
+        self.elapsed += seconds
+        self.costs[kind] += seconds
+        if kind not in ('move', 'sleep'):
+            self.commands += 1
+
+    def _add_labware(self, labware):
+        self._labware_heights.append(labware.highest_z)
+        return labware
+
+    def _travel(self, location):
+        p = location.point
+        labware = location.labware.parent if isinstance(location.labware, Well) else location.labware
+        if labware is not None and labware is self._labware:
+            # Inside the same labware the gantry only clears the labware
+            safe_z = labware.highest_z + COSTS['arc_clearance']
+        else:
+            safe_z = max(self._labware_heights) + COSTS['arc_clearance']
+        if (p.x, p.y) == (self._position.x, self._position.y):
+            z_travel = abs(p.z - self._position.z)
+        else:
+            z_travel = max(safe_z - self._position.z, 0) + max(safe_z - p.z, 0)
+        xy_travel = math.hypot(p.x - self._position.x, p.y - self._position.y)
+        self._spend('move', xy_travel / COSTS['xy_speed'] + z_travel / COSTS['z_speed'])
+        self._position = p
+        self._labware = labware
+
+    def load_labware(self, load_name, location, label = None):
+        return self._add_labware(Labware(load_name, location, label))
+
+    def load_module(self, module_name, location):
+        return TempDeck(self, location)
+
+    def load_instrument(self, instrument_name, mount, tip_racks = None):
+        return Pipette(self, instrument_name, mount, tip_racks)
+
+    def is_simulating(self):
+        return True
+
+    def comment(self, msg):
+        m = STEP_COMMENT.match(str(msg))
+        if m:
+            step = StepTime(int(m.group(1)), m.group(2), timedelta_seconds(m.group(3)))
+            for i, s in enumerate(self.steps):
+                if s.step == step.step:  # the step is repeated, as in the batches of plates
+                    self.steps[i] = s._replace(seconds = s.seconds + step.seconds)
+                    break
+            else:
+                self.steps.append(step)
+
+    def delay(self, seconds = 0, minutes = 0, msg = None):
+        self._spend('delay', seconds + 60 * minutes)
+
+    def pause(self, msg = None):
+        self.pauses.append(msg)
+
+    def home(self):
+        self._spend('home', COSTS['home'])
+        self._position = Point(*deck.slot_origin(deck.TRASH_SLOT), z = max(self._labware_heights))
+
+    def set_rail_lights(self, on):
+        pass
+
+
+def _mock_modules():
+    opentrons = types.ModuleType('opentrons')
+    opentrons_types = types.ModuleType('opentrons.types')
+    opentrons_types.Point = Point
+    opentrons_types.Location = Location
+    protocol_api = types.ModuleType('opentrons.protocol_api')
+    protocol_api.ProtocolContext = DryRunContext
+    gpio = types.ModuleType('opentrons.drivers.rpi_drivers.gpio')
+    gpio.set_rail_lights = lambda on: None
+    gpio.set_button_light = lambda red = False, green = False, blue = False: None
+    gpio.read_window_switches = lambda: True
+    drivers = types.ModuleType('opentrons.drivers')
+    rpi_drivers = types.ModuleType('opentrons.drivers.rpi_drivers')
+    rpi_drivers.gpio = gpio
+    drivers.rpi_drivers = rpi_drivers
+    opentrons.types = opentrons_types
+    opentrons.protocol_api = protocol_api
+    opentrons.drivers = drivers
+    return {'opentrons': opentrons, 'opentrons.types': opentrons_types,
+            'opentrons.protocol_api': protocol_api, 'opentrons.drivers': drivers,
+            'opentrons.drivers.rpi_drivers': rpi_drivers,
+            'opentrons.drivers.rpi_drivers.gpio': gpio}
+
+
+def render(source, num_samples = None, run_id = 'dry_run'):
+    '''
+    Fill the $ fields of the KF_config templates and set NUM_SAMPLES
+    '''
+    source = source.replace('$num_samples', str(num_samples or 96))
+    source = source.replace('$run_id', repr(run_id))
+    source = source.replace('$technician', 'dry_run').replace('$date', datetime.now().strftime('%Y_%m_%d'))
+    if num_samples is not None:
+        source = re.sub(r'^NUM_SAMPLES = .*$', 'NUM_SAMPLES = ' + str(num_samples), source,
+                        count = 1, flags = re.M)
+    return source
+
+
+def estimate(path, num_samples = None):
+    '''
+    Run the station script in path with a mock context and return an Estimate.
+    num_samples: overrides NUM_SAMPLES of the script
+    '''
+    with open(path, encoding = 'utf-8') as f:
+        source = render(f.read(), num_samples)
+    code = compile(source, path, 'exec')
+    ctx = DryRunContext()
+
+    class Clock(datetime):
+        # datetime.now() of the script follows the estimated time
+        @classmethod
+        def now(cls, tz = None):
+            return datetime(2020, 1, 1) + timedelta(seconds = ctx.elapsed)
+
+    mocks = _mock_modules()
+    saved_modules = {name: sys.modules.get(name) for name in mocks}
+    saved_path = list(sys.path)
+    sleep = time.sleep
+    sys.modules.update(mocks)
+    time.sleep = lambda seconds: ctx._spend('sleep', seconds)
+    try:
+        namespace = {'__name__': 'dry_run_protocol', '__file__': path}
+        exec(code, namespace)
+        namespace['datetime'] = Clock
+        namespace['run'](ctx)
+    finally:
+        time.sleep = sleep
+        sys.path[:] = saved_path
+        for name, module in saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    other = ctx.elapsed - sum(s.seconds for s in ctx.steps)
+    return Estimate(num_samples or namespace.get('NUM_SAMPLES'), ctx.steps, other, ctx.elapsed,
+                    ctx.pauses, ctx.tip_swaps, dict(ctx.costs), ctx.commands, dict(ctx.tips),
+                    {name: v for name, v in ctx.volumes.items() if v > 0.5})
+
+
+def _duration(seconds):
+    return str(timedelta(seconds = round(seconds)))
+
+
+def _parse_samples(text):
+    samples = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            samples.extend(range(int(first), int(last) + 1))
+        else:
+            samples.append(int(part))
+    return samples
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Estimate the duration of a station protocol')
+    parser.add_argument('protocol', help = 'station script (.py)')
+    parser.add_argument('-n', '--num_samples', default = None,
+                        help = 'number of samples, a list (8,48,96) or a range (1-96)')
+    args = parser.parse_args(argv)
+
+    samples = _parse_samples(args.num_samples) if args.num_samples else [None]
+    if len(samples) == 1:
+        e = estimate(args.protocol, samples[0])
+        print(os.path.basename(args.protocol) + ' with ' + str(e.num_samples) + ' samples')
+        print('STEP\tdescription\ttime')
+        for s in e.steps:
+            print(str(s.step) + '\t' + s.description + '\t' + _duration(s.seconds))
+        print('\tsetup and end of run\t' + _duration(e.other))
+        print('\ttotal\t' + _duration(e.total))
+        if e.tip_swaps:
+            print(str(e.tip_swaps) + ' tiprack replacements (not included)')
+        return
+    header = None
+    rows = []
+    for n in samples:
+        try:
+            e = estimate(args.protocol, n)
+        except Exception as error:  # the protocol does not run with n samples
+            rows.append(str(n) + '\t' + type(error).__name__ + ': ' + str(error))
+            continue
+        if header is None:
+            header = ['num_samples'] + ['STEP ' + str(s.step) + ' ' + s.description for s in e.steps] + ['total']
+        rows.append('\t'.join([str(n)] + [_duration(s.seconds) for s in e.steps] + [_duration(e.total)]))
+    print('\t'.join(header or ['num_samples']))
+    print('\n'.join(rows))
+
+
+if __name__ == '__main__':
+    main()
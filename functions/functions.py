@@ -1,16 +1,28 @@
 #How to activate simulator
 #opentrons_simulate /Users/covid19warriors/Documents/covid19clinic/Station\ B/Station_B_S2_Aitor_JL_v1.py -L /Users/covid19warriors/Desktop/labware2
+#The folder containing this package has to be in the python path (see README.md)
+import bisect
+import math
+from collections import namedtuple
+try:
+    from opentrons.types import Point
+except ImportError:
+    # Offline scripts (simulations, planners) can run without the robot software
+    Point = namedtuple('Point', ['x', 'y', 'z'], defaults = [0, 0, 0])
+
+from .geometry import liquid_height
+
 
 class Reagent:
     def __init__(self, name, flow_rate_aspirate, flow_rate_dispense, rinse,
-                 reagent_reservoir_volume, delay, num_wells, h_cono, v_fondo,
+                 reagent_reservoir_volume, delay, num_wells, h_cono = 0, v_fondo = 0,
                   tip_recycling = 'none'):
         self.name = name
         self.flow_rate_aspirate = flow_rate_aspirate
         self.flow_rate_dispense = flow_rate_dispense
         self.rinse = bool(rinse)
         self.reagent_reservoir_volume = reagent_reservoir_volume
-        self.delay = delay
+        self.delay = delay #Delay of reagent in dispense
         self.num_wells = num_wells
         self.col = 0
         self.vol_well = 0
@@ -18,87 +30,20 @@ class Reagent:
         self.v_cono = v_fondo
         self.unused=[]
         self.tip_recycling = tip_recycling
-        self.vol_well_original = reagent_reservoir_volume / num_wells
-
-
-#Reagents and their characteristics
-Ethanol = Reagent(name = 'Ethanol',
-                flow_rate_aspirate = 0.5,
-                flow_rate_dispense = 1,
-                rinse = True,
-                reagent_reservoir_volume = 12000,
-                delay = 2,
-                num_wells = 4, #num_Wells max is 4
-                h_cono = 1.95,
-                v_fondo = 1.95*7*71/2, #Prismatic
-                tip_recycling = 'A1')
-
-Beads = Reagent(name = 'Magnetic beads',
-                flow_rate_aspirate = 0.5,
-                flow_rate_dispense = 1,
-                rinse = True,
-                reagent_reservoir_volume = 12000,
-                delay = 2,
-                num_wells = 4,
-                h_cono = 1.95,
-                v_fondo = 1.95*7*71/2, #Prismatic
-                tip_recycling = 'A2')
-
-Isopropanol = Reagent(name = 'Isopropanol',
-                flow_rate_aspirate = 0.5,
-                flow_rate_dispense = 1,
-                rinse = True,
-                reagent_reservoir_volume = 5000,
-                delay = 2,
-                num_wells = 2, #num_Wells max is 2
-                h_cono = 1.95,
-                v_fondo = 1.95*7*71/2, #Prismatic
-                tip_recycling = 'A3')
-
-Water = Reagent(name = 'Water',
-                flow_rate_aspirate = 1,
-                flow_rate_dispense = 1,
-                rinse = False,
-                reagent_reservoir_volume = 6000,
-                num_wells = 1, #num_Wells max is 1
-                h_cono = 1.95,
-                v_fondo = 1.95*7*71/2) #Prismatic
-
-Elution = Reagent(name = 'Elution',
-                flow_rate_aspirate = 0.25,
-                flow_rate_dispense = 1,
-                rinse = False,
-                reagent_reservoir_volume = 800,
-                num_wells = num_cols, #num_cols comes from available columns
-                h_cono = 4,
-                v_fondo = 4*math.pi*4**3/3) #Sphere
-
-Ethanol.vol_well=Ethanol.vol_well_original()
-Beads.vol_well=Beads.vol_well_original()
-Isopropanol.vol_well=Isopropanol.vol_well_original()
-Water.vol_well=Water.vol_well_original()
-Elution.vol_well=350
-
-beads = reagent_res.rows()[0][:Beads.num_wells] # 1 row, 4 columns (first ones)
-isoprop = reagent_res.rows()[0][4:(4 + Isopropanol.num_wells)] # 1 row, 2 columns (from 5 to 6)
-etoh = reagent_res.rows()[0][6:Ethanol.num_wells] # 1 row, 2 columns (from 7 to 10)
-water = reagent_res.rows()[0][-1] # 1 row, 1 column (last one) full of water
-work_destinations = deepwell_plate.rows()[0][:Elution.num_wells]
-final_destinations = elution_plate.rows()[0][:Elution.num_wells]
-
-tip_recycle = [ctx.load_labware('opentrons_96_tiprack_300ul', '5', '200µl filter tiprack')]
-
-pipette.pick_up_tip(tip_recycle[reagent.tip_recycling])
-pipette.return_tip()
-
-def move_vol_multichannel(pipet, reagent, source, dest, vol, air_gap_vol, x_offset,
-                   pickup_height, rinse, disp_height, blow_out, touch_tip):
+        self.vol_well_original = reagent_reservoir_volume / num_wells if num_wells else 0
+
+
+def move_vol_multichannel(ctx, pipet, reagent, source, dest, vol, air_gap_vol, x_offset,
+                   pickup_height, rinse, disp_height, blow_out, touch_tip,
+                   blow_out_height = -2, touch_tip_radius = 1.0):
     '''
     x_offset: list with two values. x_offset in source and x_offset in destination i.e. [-1,1]
     pickup_height: height from bottom where volume
     rinse: if True it will do 2 rounds of aspirate and dispense before the tranfer
     disp_height: dispense height; by default it's close to the top (z=-2), but in case it is needed it can be lowered
     blow_out, touch_tip: if True they will be done after dispensing
+    blow_out_height: height from top where the blow out is done
+    touch_tip_radius: fraction of the well radius used in touch_tip
     '''
     # Rinse before aspirating
     if rinse == True:
@@ -117,9 +62,9 @@ def move_vol_multichannel(pipet, reagent, source, dest, vol, air_gap_vol, x_offs
                    rate = reagent.flow_rate_dispense)  # dispense all
     ctx.delay(seconds = reagent.delay) # pause for x seconds depending on reagent
     if blow_out == True:
-        pipet.blow_out(dest.top(z = -2))
+        pipet.blow_out(dest.top(z = blow_out_height))
     if touch_tip == True:
-        pipet.touch_tip(speed = 20, v_offset = -5)
+        pipet.touch_tip(radius = touch_tip_radius, speed = 20, v_offset = -5)
 
 
 def custom_mix(pipet, reagent, location, vol, rounds, blow_out, mix_height,
@@ -145,8 +90,19 @@ x_offset, source_height = 3):
     if blow_out == True:
         pipet.blow_out(location.top(z=-2))  # Blow out
 
-def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5, extra_volume = 50):
-    nonlocal ctx
+
+def _liquid_height(reagent, cross_section_area, volume, geometry):
+    if geometry is not None:
+        return float(liquid_height(geometry, volume))
+    return (volume - reagent.v_cono) / cross_section_area #- reagent.h_cono
+
+
+def calc_height(ctx, reagent, cross_section_area, aspirate_volume, min_height = 0.5, extra_volume = 50,
+                geometry = None):
+    '''
+    geometry: VolumeTable of the reservoir (geometry.well_geometry); if given the
+    height is interpolated in it and cross_section_area and reagent.v_cono are not used
+    '''
     ctx.comment('Remaining volume ' + str(reagent.vol_well) +
                 '< needed volume ' + str(aspirate_volume) + '?')
     if reagent.vol_well < aspirate_volume + extra_volume:
@@ -158,15 +114,14 @@ def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5,
         ctx.comment(str('After change: ' + str(reagent.col)))
         reagent.vol_well = reagent.vol_well_original
         ctx.comment('New volume:' + str(reagent.vol_well))
-        height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area
-                #- reagent.h_cono
+        height = _liquid_height(reagent, cross_section_area, reagent.vol_well - aspirate_volume, geometry)
         reagent.vol_well = reagent.vol_well - aspirate_volume
         ctx.comment('Remaining volume:' + str(reagent.vol_well))
         if height < min_height:
             height = min_height
         col_change = True
     else:
-        height = (reagent.vol_well - aspirate_volume - reagent.v_cono) / cross_section_area #- reagent.h_cono
+        height = _liquid_height(reagent, cross_section_area, reagent.vol_well - aspirate_volume, geometry)
         reagent.vol_well = reagent.vol_well - aspirate_volume
         ctx.comment('Calculated height is ' + str(height))
         if height < min_height:
@@ -175,25 +130,149 @@ def calc_height(reagent, cross_section_area, aspirate_volume, min_height = 0.5,
         col_change = False
     return height, col_change
 
-def distribute_custom(pipette, volume, src, dest, waste_pool, pickup_height, extra_dispensal, disp_height=0):
+
+def refill_reservoirs(ctx, needs, message = ''):
+    '''
+    needs: list of (reagent, volume) that will be aspirated next. Pauses the run
+    once, with message and the reservoirs to refill, when the volume left in the
+    level model (vol_well and the unused columns) of any of them is not enough,
+    or when there is a message. Returns the refilled reagents
+    '''
+    refills = []
+    for reagent, volume in needs:
+        available = reagent.vol_well + (reagent.num_wells - reagent.col - 1) * reagent.vol_well_original
+        if available < volume + 50:
+            message += ('\n' if message else '') + 'Refill ' + reagent.name + ' with ' + \
+                str(reagent.reagent_reservoir_volume) + ' ul (' + str(round(available)) + ' ul left, ' + \
+                str(volume) + ' ul needed).'
+            reagent.col = 0
+            reagent.vol_well = reagent.vol_well_original
+            reagent.unused = []
+            refills.append(reagent)
+    if message:
+        ctx.pause(message + ' Resume when done.')
+    return refills
+
+
+def distribute_custom(pipette, volume, src, dest, waste_pool, pickup_height, extra_dispensal,
+                      disp_height = 0, air_gap_vol = 20):
     # Custom distribute function that allows for blow_out in different location and adjustement of touch_tip
     pipette.aspirate((len(dest) * volume) +
                      extra_dispensal, src.bottom(pickup_height))
     pipette.touch_tip(speed=20, v_offset=-5)
     pipette.move_to(src.top(z=5))
-    pipette.aspirate(5)  # air gap
+    pipette.aspirate(air_gap_vol)  # air gap
     for d in dest:
-        pipette.dispense(5, d.top())
+        pipette.dispense(air_gap_vol, d.top())
         drop = d.top(z = disp_height)
         pipette.dispense(volume, drop)
         pipette.move_to(d.top(z=5))
-        pipette.aspirate(5)  # air gap
+        pipette.aspirate(air_gap_vol)  # air gap
     try:
         pipette.blow_out(waste_pool.wells()[0].bottom(pickup_height + 3))
     except:
         pipette.blow_out(waste_pool.bottom(pickup_height + 3))
     return (len(dest) * volume)
 
+
+def plan_distribute(reagent, num_dests, volume, max_volume, extra_dispensal, air_gap_vol = 20,
+                    extra_volume = 50):
+    '''
+    Group num_dests destinations in trips of distribute_custom from the wells of
+    reagent, starting at reagent.col and reagent.vol_well.
+    max_volume: the smaller of the pipette and the tip volumes; a trip holds
+    volume for each destination plus extra_dispensal and one air gap
+    extra_volume: same meaning as in calc_height
+    The trips of each well are as even as possible and a well is only left when
+    it cannot serve one more destination (the extra_dispensal is blown out back
+    into it), so no trip is cut short by a well change.
+    Returns a list of trips, each one a list of destination indexes. The volume
+    taken from the wells by each trip is volume * len(trip), for plan_heights with
+    extra_volume = extra_volume + extra_dispensal
+    '''
+    size = int((max_volume - extra_dispensal - air_gap_vol) // volume)
+    if size < 1:
+        raise ValueError('A trip of ' + str(volume) + ' ul does not fit in ' + str(max_volume) + ' ul')
+    trips = []
+    col = reagent.col
+    left = reagent.vol_well
+    start = 0
+    while start < num_dests:
+        n = min(int((left - extra_dispensal - extra_volume) // volume), num_dests - start)
+        if n < 1:
+            col += 1
+            if col >= reagent.num_wells:
+                raise ValueError('Not enough ' + reagent.name + ' for ' + str(num_dests) + ' destinations')
+            left = reagent.vol_well_original
+            continue
+        num_trips = math.ceil(n / size)
+        for t in range(num_trips):
+            k = n * (t + 1) // num_trips - n * t // num_trips
+            trips.append(list(range(start, start + k)))
+            start += k
+        left -= n * volume
+    return trips
+
+
+def plan_multi_dispense(volumes, max_volume):
+    '''
+    Group the volumes needed by each destination in trips of at most max_volume.
+    volumes: list with the total volume of each destination
+    Returns a list of trips, each one a list of (destination index, volume).
+    A destination that does not fit in a trip gets the fewest equal dispenses
+    that fit, as the transfers of move_vol_multichannel, and a trip only takes
+    whole dispenses: there are no remainders smaller than the pipette minimum.
+    '''
+    trips = []
+    trip = []
+    free = max_volume
+    for i, vol in enumerate(volumes):
+        parts = math.ceil(vol / max_volume)
+        for v in [vol / parts] * parts:
+            if v > free:
+                trips.append(trip)
+                trip = []
+                free = max_volume
+            trip.append((i, v))
+            free -= v
+    if len(trip) > 0:
+        trips.append(trip)
+    return trips
+
+
+def multi_dispense(ctx, pipet, reagent, source, dests, trips, air_gap_vol, conditioning_vol,
+                   x_offset, pickup_height, disp_height, rinse = False, touch_tip = False,
+                   touch_tip_radius = 1.0):
+    '''
+    Aspirate once per trip and dispense in several destinations (see plan_multi_dispense).
+    conditioning_vol: extra volume aspirated in each trip and returned to the source with
+    the blow out, so every dispense is done with a pre-wetted piston
+    rinse: if True the source is mixed before the first trip
+    touch_tip: if True it will be done after the last dispense of each trip
+    '''
+    if rinse == True:
+        custom_mix(pipet, reagent, location = source, vol = trips[0][0][1],
+                   rounds = 2, blow_out = True, mix_height = 0,
+                   x_offset = x_offset)
+    for trip in trips:
+        # SOURCE
+        s = source.bottom(pickup_height).move(Point(x = x_offset[0]))
+        pipet.aspirate(sum(vol for _, vol in trip) + conditioning_vol, s,
+                       rate = reagent.flow_rate_aspirate)
+        if air_gap_vol != 0:
+            pipet.aspirate(air_gap_vol, source.top(z = -2),
+                           rate = reagent.flow_rate_aspirate)  # air gap
+        # DESTINATIONS, the air gap goes out with the first dispense
+        for k, (i, vol) in enumerate(trip):
+            drop = dests[i].top(z = disp_height).move(Point(x = x_offset[1]))
+            pipet.dispense(vol + (air_gap_vol if k == 0 else 0), drop,
+                           rate = reagent.flow_rate_dispense)
+        ctx.delay(seconds = reagent.delay) # pause for x seconds depending on reagent
+        if touch_tip == True:
+            pipet.touch_tip(radius = touch_tip_radius, speed = 20, v_offset = -5)
+        pipet.blow_out(source.top(z = -2)) # conditioning volume back to the source
+
+
 def divide_volume(volume,max_vol):
     num_transfers=math.ceil(volume/max_vol)
     vol_roundup=math.ceil(volume/num_transfers)
@@ -202,9 +281,120 @@ def divide_volume(volume,max_vol):
     vol_list.append(last_vol)
     return vol_list
 
-##### FLOW RATES #######
-m300.flow_rate.aspirate = 150
-m300.flow_rate.dispense = 300
-m300.flow_rate.blow_out = 300
-p1000.flow_rate.aspirate = 100
-p1000.flow_rate.dispense = 1000
+
+def divide_destinations(l, n):
+    # Divide the list of destinations in size n lists.
+    for i in range(0, len(l), n):
+        yield l[i:i + n]
+
+
+class SampleSourceIndex:
+    '''
+    Sample number -> tube of the source racks, in the order of the racks and of
+    the wells in each rack (columns, or serpentine: every other column from the
+    bottom). Racks can have any number of tubes (24, 32, 48...). Indexing and
+    slices work as in the list of wells it replaces, sample 0 is the first tube.
+    '''
+    def __init__(self, racks, order = 'columns'):
+        if order not in ('columns', 'serpentine'):
+            raise ValueError('Unknown order ' + str(order))
+        self.racks = list(racks)
+        self.order = order
+        self.offsets = [0]  # first sample of each rack
+        for rack in self.racks:
+            self.offsets.append(self.offsets[-1] + len(rack.wells()))
+        self._wells = {}  # rack index: (wells, names), filled when the rack is used
+
+    def _rack_wells(self, r):
+        if r not in self._wells:
+            rack = self.racks[r]
+            # wells_by_name has the order of wells(); the names of the wells are its keys
+            names = {id(w): n for n, w in rack.wells_by_name().items()}
+            if self.order == 'serpentine':
+                wells = [w for c, column in enumerate(rack.columns())
+                         for w in (column if c % 2 == 0 else column[::-1])]
+            else:
+                wells = rack.wells()
+            self._wells[r] = (wells, [names[id(w)] for w in wells])
+        return self._wells[r]
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def locate(self, sample):
+        '''
+        (rack index, well name, slot) of the sample
+        '''
+        if sample < 0:
+            sample += len(self)
+        if not 0 <= sample < len(self):
+            raise IndexError('Sample ' + str(sample) + ' out of the ' + str(len(self)) + ' tubes')
+        r = bisect.bisect_right(self.offsets, sample) - 1
+        return r, self._rack_wells(r)[1][sample - self.offsets[r]], str(self.racks[r].parent)
+
+    def __getitem__(self, sample):
+        if isinstance(sample, slice):
+            return [self[i] for i in range(*sample.indices(len(self)))]
+        if sample < 0:
+            sample += len(self)
+        r, _, _ = self.locate(sample)
+        return self._rack_wells(r)[0][sample - self.offsets[r]]
+
+    def __iter__(self):
+        for r in range(len(self.racks)):
+            yield from self._rack_wells(r)[0]
+
+    def export(self, path, num_samples = None, destinations = None):
+        '''
+        Tab separated table of the samples for the LIMS: sample number (from 1),
+        slot, rack, tube and, if given, the destination well of each sample
+        '''
+        num_samples = len(self) if num_samples is None else num_samples
+        if destinations:
+            names = {id(w): n for plate in {id(d.parent): d.parent for d in destinations}.values()
+                     for n, w in plate.wells_by_name().items()}
+        with open(path, 'w') as f:
+            f.write('sample\tslot\track\ttube' + ('\tdestination' if destinations else '') + '\n')
+            for i in range(num_samples):
+                r, name, slot = self.locate(i)
+                row = [str(i + 1), slot, str(r + 1), name]
+                if destinations:
+                    row.append(names[id(destinations[i])])
+                f.write('\t'.join(row) + '\n')
+
+
+def generate_source_table(source):
+    '''
+    Wells of the different origin racks, one after the other
+    '''
+    return list(SampleSourceIndex(source))
+
+
+def find_side(col):
+    '''
+    Detects if the current column has the magnet at its left or right side
+    '''
+    if col % 2 == 0:
+        side = -1  # left
+    else:
+        side = 1
+    return side
+
+
+##########
+# pick up tip and if there is none left, prompt user for a new rack
+def pick_up(ctx, pip, tip_track):
+    '''
+    Returns the well of the tiprack the tip was picked up from (None if the
+    racks were empty and the simulator replaced them)
+    '''
+    if not ctx.is_simulating():
+        if tip_track['counts'][pip] == tip_track['maxes'][pip]:
+            ctx.pause('Replace ' + str(pip.max_volume) + 'µl tipracks before \
+            resuming.')
+            pip.reset_tipracks()
+            tip_track['counts'][pip] = 0
+    location = next((tip for tip in (rack.next_tip(pip.channels) for rack in pip.tip_racks)
+                     if tip is not None), None)
+    pip.pick_up_tip(location)
+    return location
@@ -0,0 +1,137 @@
+'''
+Volume to height of the liquid in the wells of a labware, from the well shape
+of its definition (labware registry) and the shape of its bottom, precomputed
+as a lookup table. calc_height and plan_heights interpolate in it when they
+are given a geometry instead of using the straight prism of cross_section_area
+minus the bottom volume of the reagent (v_fondo).
+Bottoms:
+    'flat': the well is a prism (cylinder or box)
+    'v': cone (circular wells) or pyramid (square wells) of depth bottom_depth
+    'wedge': V-shaped trough along the long side of a rectangular well (reservoirs)
+    'u': spherical cap of depth bottom_depth
+The bottom depth of registry labware is the one that makes the well hold the
+totalLiquidVolume of its definition, or the one of BOTTOM_DEPTHS.
+'''
+import math
+from collections import namedtuple
+import numpy as np
+
+from .labware import registry
+
+# section: 'circular' or 'rectangular'; width: diameter or x dimension; length: y dimension
+WellShape = namedtuple('WellShape', ['section', 'width', 'length', 'depth', 'bottom', 'bottom_depth'])
+# heights: height from the bottom of the well; volumes: volume below each height
+# area: cross section of the well above the bottom
+VolumeTable = namedtuple('VolumeTable', ['load_name', 'heights', 'volumes', 'area'])
+
+# Opentrons labware used as a reagent source by the stations; its definitions come with
+# the robot software and are not in the labware registry
+SCREWCAP_CONE = 3 * 50 / (math.pi * 8.25 ** 2 / 4)  # depth of the 50 ul cone of the 2 ml screwcaps
+STANDARD_WELLS = {
+    'opentrons_24_tuberack_generic_2ml_screwcap': WellShape('circular', 8.25, 8.25, 42.0, 'v', SCREWCAP_CONE),
+    'opentrons_24_aluminumblock_generic_2ml_screwcap': WellShape('circular', 8.25, 8.25, 39.0, 'v', SCREWCAP_CONE),
+    'nest_12_reservoir_15ml': WellShape('rectangular', 8.2, 71.2, 26.85, 'wedge', 1.95)
+}
+# Bottom depth of registry labware with 'v' or 'u' bottom whose totalLiquidVolume is a
+# nominal volume and not the one of the well (measured, in mm)
+BOTTOM_DEPTHS = {}
+
+_tables = {}
+
+
+def well_shape(load_name):
+    '''
+    WellShape of the first well of a labware. A 'v' bottom is a cone or pyramid,
+    or a wedge when the well is more than twice as long as wide
+    '''
+    if load_name in STANDARD_WELLS:
+        return STANDARD_WELLS[load_name]
+    labware = registry()
+    if load_name not in labware:
+        raise KeyError('No definition of ' + load_name + ' in the labware registry')
+    w = labware.wells(load_name)[0]
+    width, length = sorted([float(w['diameter']), float(w['length'])])
+    bottom = str(w['bottom']) or 'flat'
+    if bottom == 'v' and length > 2 * width:
+        bottom = 'wedge'
+    shape = WellShape(str(w['shape']), width, length, float(w['depth']), bottom, 0.0)
+    if bottom == 'flat':
+        return shape
+    if load_name in BOTTOM_DEPTHS:
+        return shape._replace(bottom_depth = BOTTOM_DEPTHS[load_name])
+    return shape._replace(bottom_depth = fitted_bottom_depth(shape, float(w['volume']), load_name))
+
+
+def fitted_bottom_depth(shape, total_volume, load_name = ''):
+    '''
+    Depth of the bottom that makes the well hold total_volume, up to the width of the
+    well (half of it for a 'u' bottom, a half sphere)
+    '''
+    deepest = shape.width / 2 if shape.bottom == 'u' else shape.width
+    depths = np.linspace(0, min(deepest, shape.depth), 201)[1:]
+    area = section_area(shape)
+    # volume that the bottom takes from the prism of the well, growing with its depth
+    missing = [area * b - volume_below(shape._replace(bottom_depth = b), b) for b in depths]
+    lost = area * shape.depth - total_volume
+    if not missing[0] <= lost <= missing[-1]:
+        raise ValueError('The totalLiquidVolume of ' + load_name + ' does not fit a ' +
+                         shape.bottom + ' bottom; add its bottom depth to BOTTOM_DEPTHS')
+    return float(np.interp(lost, missing, depths))
+
+
+def section_area(shape):
+    if shape.section == 'circular':
+        return math.pi * shape.width ** 2 / 4
+    return shape.width * shape.length
+
+
+def volume_below(shape, heights):
+    '''
+    Volume of the well below each height, in ul (mm3)
+    '''
+    h = np.clip(np.asarray(heights, dtype = float), 0, shape.depth)
+    area = section_area(shape)
+    b = shape.bottom_depth
+    if shape.bottom == 'flat' or b <= 0:
+        return area * h
+    t = np.minimum(h, b)
+    if shape.bottom == 'v':
+        bottom = area * t ** 3 / (3 * b ** 2)
+    elif shape.bottom == 'wedge':
+        bottom = area * t ** 2 / (2 * b)
+    elif shape.bottom == 'u':
+        # cap of the sphere whose cap of depth b has the radius of the well
+        r = shape.width / 2
+        radius = (r ** 2 + b ** 2) / (2 * b)
+        bottom = area / r ** 2 * t ** 2 * (3 * radius - t) / 3
+    else:
+        raise ValueError('Unknown well bottom ' + str(shape.bottom))
+    return bottom + area * np.maximum(h - b, 0)
+
+
+def volume_table(load_name, shape, step = 0.05):
+    heights = np.append(np.arange(0, shape.depth, step), shape.depth)
+    return VolumeTable(load_name, heights, volume_below(shape, heights), section_area(shape))
+
+
+def well_geometry(load_name, step = 0.05):
+    '''
+    VolumeTable of the wells of a labware, computed once per process
+    '''
+    if (load_name, step) not in _tables:
+        _tables[(load_name, step)] = volume_table(load_name, well_shape(load_name), step)
+    return _tables[(load_name, step)]
+
+
+def liquid_height(geometry, volumes):
+    '''
+    Height of the liquid for each volume in the well (the depth of the well when it overflows)
+    '''
+    return np.interp(volumes, geometry.volumes, geometry.heights)
+
+
+def dead_volume(geometry, height):
+    '''
+    Volume below a height, as the volume left when the pipette can not go lower
+    '''
+    return float(np.interp(height, geometry.heights, geometry.volumes))
@@ -0,0 +1,66 @@
+import numpy as np
+from collections import namedtuple
+
+from .geometry import liquid_height
+
+# One element per aspiration of the step:
+#   heights: pickup height from the bottom of the well
+#   cols: reservoir column (well) to aspirate from
+#   col_changes: True if the aspiration is the first one of a new column
+#   remaining: volume left in the well after the aspiration
+HeightPlan = namedtuple('HeightPlan', ['heights', 'cols', 'col_changes', 'remaining'])
+
+
+def plan_heights(reagent, cross_section_area, aspirate_volumes, min_height = 0.5,
+                 extra_volume = 50, update_reagent = True, geometry = None):
+    '''
+    Closed form version of calc_height for all the aspirations of a step at once.
+    aspirate_volumes: list with the volume of every aspiration, in order
+    min_height, extra_volume: same meaning as in calc_height
+    update_reagent: if True reagent.col, reagent.vol_well and reagent.unused are
+    left as calc_height would leave them after the same aspirations
+    geometry: VolumeTable of the reservoir, as in calc_height
+    '''
+    vols = np.asarray(aspirate_volumes, dtype = float)
+    n = len(vols)
+    # aspirated[j] is the volume taken from the reagent before aspiration j
+    aspirated = np.concatenate(([0.0], np.cumsum(vols)))
+    remaining = np.empty(n)
+    cols = np.empty(n, dtype = int)
+    col_changes = np.zeros(n, dtype = bool)
+    unused = []
+
+    col = reagent.col
+    vol_start = reagent.vol_well  # volume in the well when it was first used
+    base = 0.0  # volume aspirated before the current well was first used
+    start = 0
+    while start < n:
+        # Aspiration j stays in the well while
+        # vol_start - (aspirated[j] - base) >= vols[j] + extra_volume
+        end = int(np.searchsorted(aspirated[1:], vol_start - extra_volume + base,
+                                  side = 'right'))
+        if col_changes[start]:
+            end = max(end, start + 1)  # first aspiration of a new column is always done
+        end = max(end, start)
+        remaining[start:end] = vol_start - (aspirated[start + 1:end + 1] - base)
+        cols[start:end] = col
+        if end == n:
+            break
+        # Not enough volume left, next column should be picked
+        unused.append(vol_start - (aspirated[end] - base))
+        col += 1
+        col_changes[end] = True
+        vol_start = reagent.vol_well_original
+        base = aspirated[end]
+        start = end
+
+    if geometry is not None:
+        heights = np.maximum(liquid_height(geometry, remaining), min_height)
+    else:
+        heights = np.maximum((remaining - reagent.v_cono) / cross_section_area, min_height)
+
+    if update_reagent and n > 0:
+        reagent.col = col
+        reagent.vol_well = remaining[-1]
+        reagent.unused.extend(unused)
+    return HeightPlan(heights, cols, col_changes, remaining)
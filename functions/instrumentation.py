@@ -0,0 +1,131 @@
+'''
+Opt-in instrumentation of the commands sent by a station.
+
+The pipette methods and ctx.delay are wrapped so every call is stored with
+its monotonic start time, duration, volume and location in a preallocated
+ring buffer. At the end of the run the buffer is exported as Chrome trace
+events (open it in chrome://tracing or https://ui.perfetto.dev).
+'''
+import json
+import re
+import time
+import numpy as np
+
+PIPETTE_COMMANDS = ['aspirate', 'dispense', 'blow_out', 'touch_tip', 'pick_up_tip',
+                    'drop_tip', 'move_to', 'mix', 'air_gap', 'return_tip']
+
+# Comment written by the stations at the end of every STEP
+STEP_COMMENT = re.compile(r'^Step (\d+): (.*) took (.*)$', re.S)
+
+
+def timedelta_seconds(text):
+    # Inverse of str(timedelta)
+    days = 0
+    if 'day' in text:
+        d, text = text.split(', ')
+        days = int(d.split()[0])
+    h, m, s = text.strip().split(':')
+    return days * 86400 + int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def _arguments(args, kwargs):
+    # volume and location of a pipette command, whatever the calling convention
+    volume = kwargs.get('volume')
+    location = kwargs.get('location')
+    for a in args:
+        if isinstance(a, (int, float)) and not isinstance(a, bool):
+            if volume is None:
+                volume = a
+        elif location is None:
+            location = a
+    return volume, location
+
+
+class Recorder:
+    '''
+    Ring buffer with the last `size` commands of a run. When it is full the
+    oldest commands are overwritten, so memory does not grow with the run.
+    '''
+    def __init__(self, size = 50000, clock = time.monotonic):
+        self.size = size
+        self.clock = clock
+        self.t0 = clock()
+        self.count = 0
+        self.starts = np.zeros(size)
+        self.durations = np.zeros(size)
+        self.volumes = np.full(size, np.nan)
+        self.commands = np.empty(size, dtype = object)
+        self.instruments = np.empty(size, dtype = object)
+        self.locations = np.empty(size, dtype = object)
+        self.steps = []  # (step, description, start, duration)
+
+    def record(self, command, instrument, start, end, volume = None, location = None):
+        i = self.count % self.size
+        self.starts[i] = start - self.t0
+        self.durations[i] = end - start
+        self.volumes[i] = np.nan if volume is None else volume
+        self.commands[i] = command
+        self.instruments[i] = instrument
+        self.locations[i] = location  # converted to text only when exported
+        self.count += 1
+
+    def _wrap(self, method, command, instrument):
+        def wrapper(*args, **kwargs):
+            start = self.clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(command, instrument, start, self.clock(), *_arguments(args, kwargs))
+        return wrapper
+
+    def _comment(self, method):
+        def wrapper(msg, *args, **kwargs):
+            m = STEP_COMMENT.match(str(msg))
+            if m:
+                end = self.clock() - self.t0
+                seconds = timedelta_seconds(m.group(3))
+                self.steps.append((int(m.group(1)), m.group(2), end - seconds, seconds))
+            return method(msg, *args, **kwargs)
+        return wrapper
+
+    def instrument(self, ctx, *pipettes):
+        '''
+        Wrap the commands of the given pipettes, ctx.delay and ctx.comment (STEP times)
+        '''
+        for pip in pipettes:
+            name = str(pip.name if hasattr(pip, 'name') else pip) + ' (' + str(pip.mount) + ')'
+            for command in PIPETTE_COMMANDS:
+                if hasattr(pip, command):
+                    setattr(pip, command, self._wrap(getattr(pip, command), command, name))
+        ctx.delay = self._wrap(ctx.delay, 'delay', 'ctx')
+        ctx.comment = self._comment(ctx.comment)
+
+    def export(self, path):
+        '''
+        Write the recorded commands as Chrome trace event JSON
+        '''
+        n = min(self.count, self.size)
+        order = np.arange(self.count - n, self.count) % self.size
+        threads = {'STEPS': 0}
+        events = []
+        for step, description, start, duration in self.steps:
+            events.append({'name': 'STEP ' + str(step) + ': ' + description, 'cat': 'STEP',
+                           'ph': 'X', 'pid': 1, 'tid': 0,
+                           'ts': round(start * 1e6), 'dur': round(duration * 1e6)})
+        for i in order:
+            tid = threads.setdefault(self.instruments[i], len(threads))
+            args = {}
+            if not np.isnan(self.volumes[i]):
+                args['volume'] = float(self.volumes[i])
+            if self.locations[i] is not None:
+                args['location'] = str(self.locations[i])
+            events.append({'name': self.commands[i], 'cat': self.instruments[i],
+                           'ph': 'X', 'pid': 1, 'tid': tid,
+                           'ts': round(self.starts[i] * 1e6), 'dur': round(self.durations[i] * 1e6),
+                           'args': args})
+        for name, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                           'args': {'name': name}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'commands': self.count, 'dropped': self.count - n}}, f)
@@ -0,0 +1,200 @@
+'''
+Registry of the custom labware definitions (labware_simulate/ and Custom
+labware/). The definitions are validated once and kept as a table of well
+geometry per labware (centers, bottom, depth, cross section and volume) in a
+numpy .npz cache next to this file, which loads without parsing any JSON,
+together with the definitions themselves for load_labware_from_definition.
+The cache is rebuilt when the hash of any definition file changes. It is
+committed with the package and copied to the robots with the functions
+folder; there the definition folders are not available and the cache is used
+as it is. After changing a definition, rebuild the cache and commit it:
+
+    python -m functions.labware          (validate the definitions and rebuild the cache)
+'''
+import glob
+import hashlib
+import json
+import math
+import os
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# When a load name is in several files, the first folder wins
+FOLDERS = [os.path.join(ROOT, 'labware_simulate'), os.path.join(ROOT, 'Custom labware')]
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labware_cache.npz')
+
+# Wells in the order of the definition (columns). x, y: center; z: bottom; area: cross section
+# diameter, length: diameter (circular) or x and y dimensions (rectangular)
+# bottom: wellBottomShape of the group of the well ('flat', 'u', 'v'), '' if not given
+WELL_DTYPE = np.dtype([('name', 'U4'), ('x', 'f8'), ('y', 'f8'), ('z', 'f8'), ('depth', 'f8'),
+                       ('shape', 'U11'), ('diameter', 'f8'), ('length', 'f8'), ('bottom', 'U4'),
+                       ('area', 'f8'), ('volume', 'f8')])
+INFO_DTYPE = np.dtype([('load_name', 'U100'), ('height', 'f8'), ('is_tiprack', '?'), ('file', 'U200')])
+# Every definition file and its hash when the cache was written
+FILE_DTYPE = np.dtype([('file', 'U200'), ('sha1', 'U40')])
+CACHE_VERSION = 3  # caches of other versions are rebuilt
+DEFINITION_PREFIX = '__definition__'  # key of the JSON text of each definition in the cache
+
+
+def definition_files(folders = FOLDERS):
+    files = []
+    for folder in folders:
+        files += sorted(glob.glob(os.path.join(folder, '**', '*.json'), recursive = True))
+    return files
+
+
+def _sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def validate(definition):
+    '''
+    Problems of a labware definition, empty if it can be used
+    '''
+    problems = []
+    for key in ['ordering', 'wells', 'parameters', 'dimensions']:
+        if key not in definition:
+            problems.append('no ' + key)
+    if problems:
+        return problems
+    if not definition['parameters'].get('loadName'):
+        problems.append('no loadName')
+    if 'zDimension' not in definition['dimensions']:
+        problems.append('no zDimension')
+    wells = definition['wells']
+    for name in [n for column in definition['ordering'] for n in column]:
+        w = wells.get(name)
+        if w is None:
+            problems.append('well ' + name + ' of the ordering is not defined')
+            continue
+        for key in ['x', 'y', 'z', 'depth']:
+            if not isinstance(w.get(key), (int, float)):
+                problems.append('well ' + name + ' without ' + key)
+        if w.get('shape') == 'circular' and not w.get('diameter'):
+            problems.append('circular well ' + name + ' without diameter')
+        if w.get('shape') == 'rectangular' and not (w.get('xDimension') and w.get('yDimension')):
+            problems.append('rectangular well ' + name + ' without xDimension or yDimension')
+    return problems
+
+
+def well_table(definition):
+    names = [n for column in definition['ordering'] for n in column]
+    bottoms = {}
+    for group in definition.get('groups', []):
+        for name in group.get('wells', []):
+            bottoms[name] = group.get('metadata', {}).get('wellBottomShape', '')
+    table = np.zeros(len(names), dtype = WELL_DTYPE)
+    for i, name in enumerate(names):
+        w = definition['wells'][name]
+        if w.get('shape') == 'rectangular':
+            diameter, length = w['xDimension'], w['yDimension']
+            area = diameter * length
+        else:
+            diameter = length = w.get('diameter', 0)
+            area = math.pi * diameter ** 2 / 4
+        table[i] = (name, w['x'], w['y'], w['z'], w['depth'], w.get('shape', 'circular'),
+                    diameter, length, bottoms.get(name, ''), area, w.get('totalLiquidVolume', 0))
+    return table
+
+
+class Registry:
+    '''
+    Well tables of the custom labware by load name
+    '''
+    def __init__(self, folders = FOLDERS, cache_path = CACHE_PATH):
+        self.folders = folders
+        self.cache_path = cache_path
+        self.problems = {}  # file: problems of the definitions that were left out
+        self.info = {}  # load_name: row of INFO_DTYPE
+        self.tables = {}  # load_name: wells, WELL_DTYPE array
+        self.definitions = {}  # load_name: definition as JSON text
+        self.load()
+
+    def _hashes(self):
+        return {os.path.relpath(path, ROOT): _sha1(path) for path in definition_files(self.folders)}
+
+    def load(self):
+        hashes = self._hashes()
+        if os.path.isfile(self.cache_path):
+            with np.load(self.cache_path, allow_pickle = False) as cache:
+                current = '__version__' in cache.files and int(cache['__version__']) == CACHE_VERSION
+                files = {str(r['file']): str(r['sha1']) for r in cache['__files__']}
+                if current and (files == hashes or not any(os.path.isdir(f) for f in self.folders)):
+                    self.info = {str(r['load_name']): r for r in cache['__info__']}
+                    self.tables = {name: cache[name] for name in self.info}
+                    self.definitions = {name: str(cache[DEFINITION_PREFIX + name]) for name in self.info}
+                    return
+        if not any(os.path.isdir(f) for f in self.folders):
+            return  # no definitions and no cache: an empty registry, not an empty cache
+        self.build(hashes)
+
+    def build(self, hashes = None):
+        '''
+        Parse and validate every definition and write the cache
+        '''
+        hashes = self._hashes() if hashes is None else hashes
+        self.info, self.tables, self.definitions, self.problems = {}, {}, {}, {}
+        for file in hashes:
+            with open(os.path.join(ROOT, file), encoding = 'utf-8') as f:
+                text = f.read()
+            definition = json.loads(text)
+            problems = validate(definition)
+            if problems:
+                self.problems[file] = problems
+                continue
+            load_name = definition['parameters']['loadName']
+            if load_name in self.tables:
+                continue
+            self.tables[load_name] = well_table(definition)
+            self.definitions[load_name] = text
+            self.info[load_name] = np.array((load_name, definition['dimensions']['zDimension'],
+                                             bool(definition['parameters'].get('isTiprack')), file),
+                                            dtype = INFO_DTYPE)
+        info = np.array([tuple(r.tolist()) for r in self.info.values()], dtype = INFO_DTYPE)
+        files = np.array(list(hashes.items()), dtype = FILE_DTYPE)
+        try:
+            np.savez_compressed(self.cache_path, __version__ = CACHE_VERSION, __info__ = info, __files__ = files,
+                     **self.tables, **{DEFINITION_PREFIX + name: np.array(text)
+                                       for name, text in self.definitions.items()})
+        except OSError:  # read only folder, the tables are kept in memory
+            pass
+
+    def __contains__(self, load_name):
+        return load_name in self.tables
+
+    def wells(self, load_name):
+        return self.tables[load_name]
+
+    def definition(self, load_name):
+        '''
+        Labware definition, as protocol.load_labware_from_definition takes it
+        '''
+        return json.loads(self.definitions[load_name])
+
+    def height(self, load_name):
+        return float(self.info[load_name]['height'])
+
+    def is_tiprack(self, load_name):
+        return bool(self.info[load_name]['is_tiprack'])
+
+
+_registry = None
+
+
+def registry():
+    '''
+    Registry shared by the stations and the dry run of this process
+    '''
+    global _registry
+    if _registry is None:
+        _registry = Registry()
+    return _registry
+
+
+if __name__ == '__main__':
+    r = Registry()
+    r.build()
+    for file, problems in sorted(r.problems.items()):
+        print(file + ': ' + '; '.join(problems))
+    print(str(len(r.tables)) + ' labware in ' + CACHE_PATH)
@@ -0,0 +1,66 @@
+'''
+Order of the transfers of a step to shorten the XY travel of the gantry. Only
+the order changes: every source keeps going to its own destination, so the
+sample -> well mapping of the run is the same.
+'''
+import numpy as np
+
+
+def _xy(wells):
+    points = [w.top().point for w in wells]
+    return np.array([[p.x, p.y] for p in points], dtype = float).reshape(-1, 2)
+
+
+def _distances(a, b):
+    return np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+
+
+def next_tips(pip, num_tips):
+    '''
+    Wells of the next num_tips tips the pipette will pick up, in the order of the
+    tipracks (a new set of racks after the last one, as in the tiprack replacement)
+    '''
+    if pip.channels > 1:
+        tips = [column[0] for rack in pip.tip_racks for column in rack.columns()]
+    else:
+        tips = [w for rack in pip.tip_racks for column in rack.columns() for w in column]
+    free = [w for w in tips if w.has_tip]
+    while len(free) < num_tips:
+        free += tips
+    return free[:num_tips]
+
+
+def _assign(cost):
+    '''
+    Permutation p with low sum(cost[k, p[k]]): greedy, then swaps of pairs
+    while any of them lowers the total
+    '''
+    n = len(cost)
+    order = np.empty(n, dtype = int)
+    left = np.ones(n, dtype = bool)
+    for k in range(n):
+        order[k] = np.flatnonzero(left)[np.argmin(cost[k, left])]
+        left[order[k]] = False
+    rows = np.arange(n)
+    for _ in range(n * n):
+        current = cost[rows, order]
+        swapped = cost[:, order]  # swapped[a, b]: cost of a doing the transfer of b
+        gain = swapped + swapped.T - current[:, None] - current[None, :]
+        a, b = np.unravel_index(np.argmin(gain), gain.shape)
+        if gain[a, b] >= -1e-9:
+            break
+        order[a], order[b] = order[b], order[a]
+    return order
+
+
+def plan_transfer_order(sources, tips):
+    '''
+    Indexes of the transfers of sources in the order to do them, when every
+    transfer takes a new tip. tips: wells of the tips that will be picked up, in
+    order (see next_tips). Each tip is given the transfer with the closest source,
+    as the travel from the tip to the source is the only one that depends on the
+    order (the destination, the trash and the next tip come after in any case)
+    '''
+    if len(sources) < 2:
+        return list(range(len(sources)))
+    return [int(i) for i in _assign(_distances(_xy(tips[:len(sources)]), _xy(sources)))]
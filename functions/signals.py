@@ -0,0 +1,137 @@
+'''
+State of the run on the lights of the robot, from a background thread, so the
+protocol never waits for a flash. The thread also polls the door switch: when
+the door is open the button flashes red and the run pauses itself before the
+next tip pick up or aspiration of the pipettes (the protocol API is only used
+from the protocol thread).
+    'running': blue button
+    'paused': yellow button, slow blink (ctx.pause of the station)
+    'tips': yellow button, fast blink (pause to replace the tipracks)
+    'door': red button, fast blink (door open)
+    'finished': the end of run flashes of the stations, then green button
+'''
+import threading
+import time
+
+# (rail lights, button (red, green, blue), seconds) of every frame; None keeps the rail lights
+PATTERNS = {
+    'running': [(None, (0, 0, 1), 1.0)],
+    'paused': [(None, (1, 1, 0), 0.8), (None, (0, 0, 0), 0.8)],
+    'tips': [(None, (1, 1, 0), 0.3), (None, (0, 0, 0), 0.3)],
+    'door': [(None, (1, 0, 0), 0.3), (None, (0, 0, 0), 0.3)],
+    'finished': [(False, (1, 0, 0), 0.3), (True, (0, 0, 1), 0.3)] * 3
+}
+CHECKED_COMMANDS = ['pick_up_tip', 'aspirate']
+
+_current = None  # signals of the last run, stopped when a new run starts
+
+
+class Signals:
+    '''
+    Light signalling of a run. Start it once the pipettes are loaded, call
+    finish() at the end of the run instead of flashing the lights and stop()
+    when the run ends in any way
+    '''
+    def __init__(self, ctx, *pipettes, poll_interval = 0.2, pause_on_door = True):
+        global _current
+        self.ctx = ctx
+        self.poll_interval = poll_interval
+        self.pause_on_door = pause_on_door
+        self.state = 'running'
+        self.door_open = False
+        self.final_rails = True
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if ctx.is_simulating():
+            return
+        from opentrons.drivers.rpi_drivers import gpio
+        self.gpio = gpio
+        if _current is not None:
+            _current._halt()
+        _current = self
+        self._attach(pipettes)
+        self._thread = threading.Thread(target = self._loop, name = 'signals', daemon = True)
+        self._thread.start()
+
+    def _attach(self, pipettes):
+        pause = self.ctx.pause
+
+        def signalled_pause(msg = None, *args, **kwargs):
+            self.set_state('tips' if msg and 'tiprack' in str(msg) else 'paused')
+            return pause(msg, *args, **kwargs)
+        self.ctx.pause = signalled_pause
+        for pip in pipettes:
+            for command in CHECKED_COMMANDS:
+                setattr(pip, command, self._checked(getattr(pip, command)))
+
+    def _checked(self, method):
+        def wrapper(*args, **kwargs):
+            self.checkpoint()
+            return method(*args, **kwargs)
+        return wrapper
+
+    def set_state(self, state):
+        if state not in PATTERNS:
+            raise ValueError('Unknown signal state ' + str(state))
+        self.state = state
+        self._changed.set()
+
+    def checkpoint(self):
+        '''
+        Between commands of the protocol thread: pause if the door is open, and
+        back to 'running' after a pause
+        '''
+        if self.door_open and self.pause_on_door:
+            self.ctx.pause('Door open. Close it and resume.')
+        elif self.state in ('paused', 'tips'):
+            self.set_state('running')
+
+    def _show(self, frame):
+        rails, (red, green, blue) = frame[0], frame[1]
+        if rails is not None:
+            self.gpio.set_rail_lights(rails)
+        self.gpio.set_button_light(red, green, blue)
+
+    def _loop(self):
+        shown = None
+        k = 0
+        next_frame = 0
+        while not self._stop.is_set():
+            if self.state != 'finished':
+                self.door_open = not self.gpio.read_window_switches()
+            name = 'door' if self.door_open and self.state != 'finished' else self.state
+            if name != shown:
+                shown, k, next_frame = name, 0, 0
+            now = time.monotonic()
+            if now >= next_frame:
+                frames = PATTERNS[name]
+                if name == 'finished' and k == len(frames):
+                    self._show((self.final_rails, (0, 1, 0)))
+                    return
+                frame = frames[k % len(frames)]
+                if len(frames) > 1 or k == 0:
+                    self._show(frame)
+                k += 1
+                next_frame = now + frame[2]
+            self._changed.wait(min(self.poll_interval, max(next_frame - time.monotonic(), 0)))
+            self._changed.clear()
+
+    def finish(self, rail_lights = True):
+        '''
+        End of run flashes, in the background. rail_lights: state of the rail lights after them
+        '''
+        self.final_rails = rail_lights
+        self.set_state('finished')
+
+    def stop(self):
+        '''
+        End the thread, in a finally of the station so a cancelled or failed run
+        does not leave it driving the lights. The flashes of finish() play to the end
+        '''
+        if self.state != 'finished':
+            self._halt()
+
+    def _halt(self):
+        self._stop.set()
+        self._changed.set()
@@ -0,0 +1,236 @@
+'''
+Tip policies per reagent (Reagent.tip_recycling):
+    'none': the tip is replaced every time the station drops it
+    'reuse': the tip is kept while the pipette keeps working with the same
+             reagent, also between STEPS; it is dropped when the reagent changes
+    'park': like 'reuse', but when the reagent changes the tip is dropped back
+            in its place of the tiprack and picked up again for the next use of
+            the reagent
+'''
+import json
+import math
+import os
+from collections import namedtuple
+from datetime import datetime
+from .functions import pick_up
+
+POLICIES = ('none', 'reuse', 'park')
+INVENTORY_PATH = '/var/lib/jupyter/notebooks/tip_inventory.json'
+
+# tips: tips used in the run; racks: full racks used; swaps: tiprack replacements (pauses)
+TipPlan = namedtuple('TipPlan', ['tips', 'racks', 'swaps'])
+
+
+def _policy(reagent):
+    policy = getattr(reagent, 'tip_recycling', 'none')
+    if policy not in POLICIES:
+        raise ValueError('Unknown tip_recycling ' + str(policy) + ' for ' + reagent.name)
+    return policy
+
+
+def plan_tips(uses, tips_available, channels = 1, tips_left = None):
+    '''
+    Tips and tiprack replacements of a run before it starts.
+    uses: reagent of every block of the pipette that picks up a tip and drops
+    it when done (usually one per STEP), in order
+    tips_available: tips in the tipracks of the pipette (len(tipracks) * 96)
+    tips_left: tips left in the tipracks at the start, if they are not full
+    '''
+    mounted = None
+    parked = set()
+    tips = 0
+    swaps = 0
+    in_racks = tips_available if tips_left is None else tips_left
+    for reagent in uses:
+        policy = _policy(reagent)
+        if mounted is reagent and policy != 'none':
+            continue
+        if mounted is not None and _policy(mounted) == 'park':
+            parked.add(mounted)
+        mounted = reagent
+        if policy == 'park' and reagent in parked:
+            parked.discard(reagent)
+            continue
+        if in_racks < channels:  # new racks, the parked tips are lost with the old ones
+            swaps += 1
+            in_racks = tips_available
+            parked.clear()
+        in_racks -= channels
+        tips += channels
+    return TipPlan(tips, math.ceil(tips / 96), swaps)
+
+
+class TipManager:
+    '''
+    Applies the tip policies during the run. pick_up and drop replace the
+    pick_up(ctx, pip, tip_track) and pip.drop_tip() calls of the stations.
+    '''
+    def __init__(self, ctx, tip_track):
+        self.ctx = ctx
+        self.tip_track = tip_track
+        self.mounted = {}  # pipette: reagent of the tip in the pipette
+        self.parked = {}  # pipette: {reagent: location of its parked tip}
+        self.locations = {}  # pipette: well of the tiprack of the tip in the pipette
+
+    def _release(self, pip):
+        reagent = self.mounted.pop(pip, None)
+        location = self.locations.pop(pip, None)
+        if not pip.hw_pipette['has_tip']:
+            return
+        if reagent is not None and _policy(reagent) == 'park' and location is not None:
+            # Back to its own well, not with return_tip: the tiprack would offer
+            # it again as a new tip. It is marked as available just before reusing it
+            self.parked.setdefault(pip, {})[reagent] = location
+            pip.drop_tip(location, home_after = True)
+        else:
+            pip.drop_tip(home_after = True)
+
+    def pick_up(self, pip, reagent):
+        policy = _policy(reagent)
+        if pip.hw_pipette['has_tip']:
+            if self.mounted.get(pip) is reagent:  # not dropped since the last pick_up
+                return
+            self._release(pip)
+        parked = self.parked.get(pip, {})
+        if policy == 'park' and reagent in parked:
+            location = parked.pop(reagent)
+            location.parent.return_tips(location, pip.channels)
+            pip.pick_up_tip(location)
+        else:
+            if self.tip_track['counts'][pip] == self.tip_track['maxes'][pip]:
+                parked.clear()  # the tipracks are replaced with the parked tips
+            location = pick_up(self.ctx, pip, self.tip_track)
+            self.tip_track['counts'][pip] += pip.channels
+        self.locations[pip] = location
+        self.mounted[pip] = reagent
+
+    def drop(self, pip, reagent):
+        '''
+        The station is done with the tip; it is only dropped if the policy says so
+        '''
+        if _policy(reagent) == 'none':
+            self._release(pip)
+
+    def finish(self):
+        for pip in list(self.mounted):
+            if _policy(self.mounted[pip]) == 'park':
+                self.mounted[pip] = None  # no need to park it at the end
+            self._release(pip)
+
+
+class TipInventory:
+    '''
+    Used tips of the tipracks of the robot, kept between runs in INVENTORY_PATH
+    by slot and rack barcode (the load name of the rack when there is no
+    barcode). A rack found with other barcode in the slot is a new, full rack.
+    new_racks: slots where the technician placed full racks since the last run
+    (NEW_TIPRACKS of the stations), their used tips are forgotten
+    '''
+    def __init__(self, ctx, path = INVENTORY_PATH, barcodes = None, new_racks = None):
+        self.ctx = ctx
+        self.path = path
+        self.barcodes = barcodes or {}  # slot: barcode of the rack
+        self.racks = {}  # key: tiprack of this run
+        self.inventory = {}
+        if os.path.isfile(path):
+            with open(path) as f:
+                self.inventory = _forget(json.load(f), [str(s) for s in new_racks or []])
+
+    def _key(self, rack):
+        slot = str(rack.parent)
+        return slot + ':' + str(self.barcodes.get(slot, rack.load_name))
+
+    def load(self, tip_track, *pips):
+        '''
+        Mark the used tips of the racks of pips, so they pick up from the next
+        free tip, and count them in tip_track. When some rack is partly used the
+        run starts with a pause that lists them, for the technician to check
+        that they are the racks in the robot
+        '''
+        partial = []
+        for pip in pips:
+            unusable = 0
+            total = 0
+            for rack in pip.tip_racks:
+                key = self._key(rack)
+                self.racks[key] = rack
+                wells = rack.wells_by_name()
+                used = self.inventory.get(key, {}).get('used', [])
+                for name in used:
+                    rack.use_tips(wells[name])
+                if used:
+                    partial.append('slot ' + str(rack.parent) + ' (' + str(len(wells) - len(used)) +
+                                   ' tips left)')
+                total += len(rack.wells())
+                for column in rack.columns():
+                    empty = sum(not w.has_tip for w in column)
+                    # a multichannel pipette needs whole columns
+                    unusable += (len(column) if empty and pip.channels > 1 else empty)
+            tip_track['counts'][pip] += unusable
+            self.ctx.comment('Tips available for ' + str(pip) + ': ' + str(total - unusable))
+        if partial and not self.ctx.is_simulating():
+            self.ctx.pause('Tipracks partly used by previous runs: ' + ', '.join(partial) +
+                           '. Resume to use their tips. If any of them is a full rack now, cancel ' +
+                           'the run and add its slot to NEW_TIPRACKS.')
+        self._attach(pips)
+
+    def _attach(self, pips):
+        '''
+        Save before every pause of the run and after every tiprack replacement, so
+        a cancelled run leaves the inventory as it was at its last pause at worst
+        '''
+        pause = self.ctx.pause
+
+        def saved_pause(*args, **kwargs):
+            self.save()
+            return pause(*args, **kwargs)
+        self.ctx.pause = saved_pause
+        for pip in pips:
+            reset = pip.reset_tipracks
+
+            def saved_reset(reset = reset):
+                reset()
+                self.save()
+            pip.reset_tipracks = saved_reset
+
+    def save(self):
+        '''
+        Write the used tips of the racks of the run, atomically
+        '''
+        if self.ctx.is_simulating():
+            return
+        updated = datetime.now().isoformat(timespec = 'seconds')
+        for key, rack in self.racks.items():
+            used = [name for name, w in rack.wells_by_name().items() if not w.has_tip]
+            self.inventory[key] = {'used': used, 'updated': updated}
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(self.inventory, f, indent = 1)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def _forget(inventory, slots):
+    return {k: v for k, v in inventory.items() if k.split(':')[0] not in slots}
+
+
+def reset_inventory(slots = None, path = INVENTORY_PATH):
+    '''
+    Forget the used tips of slots (all if None), after putting new racks in them
+    '''
+    if not os.path.isfile(path):
+        return
+    with open(path) as f:
+        inventory = {} if slots is None else _forget(json.load(f), slots)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(inventory, f, indent = 1)
+    os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    # python3 -m functions.tips reset [slot ...]: new racks were placed in the robot
+    import sys
+    if sys.argv[1:2] == ['reset']:
+        reset_inventory([str(s) for s in sys.argv[2:]] or None)
+    else:
+        with open(INVENTORY_PATH) as f:
+            for key, rack in sorted(json.load(f).items()):
+                print(key, 96 - len(rack['used']), 'tips left, updated', rack['updated'])
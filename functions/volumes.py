@@ -0,0 +1,132 @@
+'''
+Volume to put in each well of the reservoirs of a run, shared by the run setup
+(OT<id>volumes.txt) and the stations (reagent_reservoir_volume and num_wells).
+The wells are used as calc_height and plan_heights use them: the pipette moves
+to the next well when the volume left is below the next aspiration plus
+extra_volume, and that volume is lost.
+'''
+import math
+from collections import namedtuple
+
+# fill: volume to put in every well
+# wells: number of wells to fill
+# dead_volumes: volume left in each well when the pipette moves on (or at the end of the run)
+# dry_after: progress of the run (samples by default) when each well is left
+ReservoirPlan = namedtuple('ReservoirPlan', ['fill', 'wells', 'dead_volumes', 'dry_after'])
+
+# Aspirations of the reservoirs of the Kingfisher pathogen kit stations
+#   per: aspirations are per column (8 samples) or per sample
+#   volumes: volume of the aspirations of each column or sample, in ul
+#   capacity: volume of a well (or tube) of the reservoir
+#   margin: fraction added for the losses of pipetting (rinse, drops)
+Reservoir = namedtuple('Reservoir', ['name', 'per', 'volumes', 'capacity', 'margin'])
+KF_PATHOGEN = {
+    # Station KB sample prep: 2 x 130 ul per column with the multichannel, 12 well reservoir
+    # (nest_12_reservoir_15ml, as the elution buffer)
+    'Beads': Reservoir('Magnetic beads and Lysis', 'column', [130 * 8, 130 * 8], 15000, 0.1),
+    # Station KB plate filling: 50 ul per column, 12 well reservoir
+    'Elution Buffer': Reservoir('Elution Buffer', 'column', [50 * 8], 15000, 0.1),
+    # Station KC: 20 ul per sample with the single channel, 2 ml screwcaps
+    'Master Mix': Reservoir('Master Mix', 'sample', [20], 2000, 0.1),
+}
+
+
+def _use_wells(fill, aspirations, extra_volume):
+    '''
+    (index of the last aspiration, volume left) of every well used, as calc_height
+    '''
+    wells = []
+    volume = fill
+    for i, a in enumerate(aspirations):
+        if volume < a + extra_volume:
+            wells.append((i - 1, volume))
+            volume = fill
+        volume -= a
+    wells.append((len(aspirations) - 1, volume))
+    return wells
+
+
+def plan_reservoir(aspirations, capacity, extra_volume = 50, margin = 0, progress = None):
+    '''
+    Fewest wells and lowest fill that serve all the aspirations, in order.
+    aspirations: volume of every aspiration from the reservoir
+    capacity: volume of a well
+    margin: fraction added to the fill for losses, within the capacity
+    progress: progress of the run after each aspiration (samples done), for dry_after
+    '''
+    if len(aspirations) == 0:  # nothing to serve, as the master mix of a run with only the control
+        return ReservoirPlan(0, 0, [], [])
+    if max(aspirations) + extra_volume > capacity:
+        raise ValueError('Aspirations of ' + str(max(aspirations)) + ' ul do not fit in wells of ' +
+                         str(capacity) + ' ul')
+    capacity_fill = capacity / (1 + margin)
+    num_wells = len(_use_wells(capacity_fill, aspirations, extra_volume))
+    # Lowest fill with the same wells (bisection, to the ul)
+    low, high = max(aspirations) + extra_volume, capacity_fill
+    while high - low > 1:
+        middle = (low + high) / 2
+        if len(_use_wells(middle, aspirations, extra_volume)) <= num_wells:
+            high = middle
+        else:
+            low = middle
+    # The margin is lost on the way: wells, dead volumes and dry points are those
+    # of the volume that is left for the aspirations
+    fill = min(math.ceil(high * (1 + margin)), capacity)
+    wells = _use_wells(high, aspirations, extra_volume)
+    progress = progress or list(range(1, len(aspirations) + 1))
+    return ReservoirPlan(fill, len(wells), [round(v) for _, v in wells],
+                         [progress[i] for i, _ in wells])
+
+
+def kit_plan(reservoir, num_samples, extra_volume = 50):
+    '''
+    ReservoirPlan of a Reservoir of the kit for num_samples
+    '''
+    units = math.ceil(num_samples / 8) if reservoir.per == 'column' else num_samples
+    size = 8 if reservoir.per == 'column' else 1
+    aspirations = reservoir.volumes * units
+    progress = [min((i // len(reservoir.volumes) + 1) * size, num_samples) for i in range(len(aspirations))]
+    return plan_reservoir(aspirations, reservoir.capacity, extra_volume, reservoir.margin, progress)
+
+
+def stage_columns(num_cols, volume, capacity = 200, extra_volume = 10, min_cols = 3):
+    '''
+    Columns of the plate served by each column of staging wells (strips), as even
+    as possible, when every staging well holds volume for each of its columns
+    plus extra_volume, which is left behind. No staging below min_cols columns:
+    filling the strips and changing pipette takes longer than it saves
+    '''
+    if num_cols < min_cols:
+        return []
+    strips = math.ceil(num_cols / int((capacity - extra_volume) // volume))
+    return [num_cols // strips + (i < num_cols % strips) for i in range(strips)]
+
+
+def staged_plan(reservoir, num_samples, stage_capacity = 200, stage_extra = 10, extra_volume = 50):
+    '''
+    ReservoirPlan of a per sample Reservoir when the full columns of the plate
+    are staged: the 8 wells of each staging column are filled first (see
+    stage_columns) and then the wells of the last, incomplete column
+    '''
+    volume = reservoir.volumes[0]
+    aspirations = []
+    progress = []
+    done = 0
+    for cols in stage_columns(num_samples // 8, volume, stage_capacity, stage_extra):
+        done += cols * 8
+        aspirations += [cols * volume + stage_extra] * 8
+        progress += [done] * 8
+    for sample in range(done, num_samples):
+        aspirations.append(volume)
+        progress.append(sample + 1)
+    return plan_reservoir(aspirations, reservoir.capacity, extra_volume, reservoir.margin, progress)
+
+
+def describe(name, plan):
+    '''
+    Line for the technician and the run log
+    '''
+    return (name + ': ' + str(plan.wells) + ' well(s) of ' + str(plan.fill) + ' ul (' +
+            str(plan.fill * plan.wells) + ' ul). Dead volume: ' +
+            ', '.join(str(v) for v in plan.dead_volumes) + ' ul. Each well empty after sample: ' +
+            ', '.join(str(s) for s in plan.dry_after))
@@ -1,6 +1,7 @@
 from opentrons import protocol_api
-
-from opentrons.drivers.rpi_drivers import gpio
+import sys
+sys.path.append('/var/lib/jupyter/notebooks') # Location of the shared functions package in the robot
+from functions import Signals
 # metadata
 metadata = {
     'protocolName': 'S2 Station C Version 2',
@@ -44,16 +45,8 @@ def distribute_custom(pipette, volume_mmix, mmix, size_transfer, d, waste_pool,
     #pipette.aspirate(5) #air gap
     pipette.dispense(5)
 
-def check_door():
-    return gpio.read_window_switches()
-
 def run(ctx: protocol_api.ProtocolContext):
 
-
-    if check_door() == True:
-        gpio.set_button_light(0.5,0,0.5)
-    else:
-        gpio.set_button_light(1,0,0)
     #Load labware
     deepwell_plate = ctx.load_labware('abgenestorage_96_wellplate_1200ul','5', 'ABGENE 1200ul 96 well sample plate')
 
@@ -72,15 +65,21 @@ def run(ctx: protocol_api.ProtocolContext):
     # pipettes
     p300 = ctx.load_instrument('p300_multi_gen2', mount='right', tip_racks=tips200)
 
-    # setup up sample sources and destinations
-    dests = deepwell_plate.rows()[0][:]
+    # Run state on the lights, the door is checked during the whole run
+    signals = Signals(ctx, p300)
+
+    try:
+        # setup up sample sources and destinations
+        dests = deepwell_plate.rows()[0][:]
 
 
-    #transfer water "sample" with P300
-    if TRANSFER_WATER == True:
-        p300.pick_up_tip()
-        for dest in dests:
-            #Distribute the mmix in different wells
-            for _ in range(2):
-                distribute_custom(p300, volume_sample, water, size_transfer, dest, water, 1, extra_dispensal)
-    gpio.set_button_light(0,1,0)
+        #transfer water "sample" with P300
+        if TRANSFER_WATER == True:
+            p300.pick_up_tip()
+            for dest in dests:
+                #Distribute the mmix in different wells
+                for _ in range(2):
+                    distribute_custom(p300, volume_sample, water, size_transfer, dest, water, 1, extra_dispensal)
+        signals.finish()
+    finally:
+        signals.stop()
@@ -17,7 +17,7 @@ for s in steps:
 def get_sec(time_str):
     """Get Seconds from time."""
     h, m, s = time_str.split(':')
-    return int(h) * 3600 + int(m) * 60 + int(s[:1])
+    return int(h) * 3600 + int(m) * 60 + float(s)
 
 v=0
 for val in values: